@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Lokaler Stand-in für die DB Community API und die Telegram Bot API
+Liefert /journeys (mit laterRef-Folgeseiten), /locations sowie Telegram
+getMe/sendMessage/editMessageText - mit einstellbarer Latenz, Fehlerquote
+und 429-Antworten. Läuft in einem eigenen Prozess, damit Laufzeit und
+Speicher des Servers die Messungen im Client nicht verfälschen
+
+Antworten sind synthetisch (Aufbau wie db-rest v6) oder stammen aus
+Aufzeichnungen: journeys.json / locations.json im Verzeichnis --recordings
+(Antwort-Body einer echten Abfrage, Zeiten werden auf die Anfrage verschoben).
+Die Parameter stopovers, remarks, polylines, tickets, subStops und entrances
+bestimmen wie bei db-rest den Umfang der Antwort (Abfrageprofile)
+
+Verwendung: python benchmarks/fake_api.py [--port 8080] [--latency-ms 50] [--error-rate 0.05]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import zlib
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+TIME_FIELDS = ("departure", "plannedDeparture", "arrival", "plannedArrival")
+
+# Standardwerte von db-rest v6 für die Umfang-Parameter
+DEFAULT_OPTIONS = {"stopovers": False, "remarks": True, "polylines": False, "tickets": False,
+                   "subStops": True, "entrances": True}
+
+# Felder die bei abgeschalteten Optionen in aufgezeichneten Antworten entfallen
+OPTION_FIELDS = {"stopovers": "stopovers", "remarks": "remarks", "polylines": "polyline", "tickets": "tickets"}
+
+
+def journey_options(params: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+    """Umfang-Parameter einer Anfrage (fehlende mit db-rest Standardwert)"""
+    params = params or {}
+    return {name: params[name] == "true" if name in params else default
+            for name, default in DEFAULT_OPTIONS.items()}
+
+
+def _stop(station_id: str, name: str, options: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    options = options or DEFAULT_OPTIONS
+    location = {"type": "location", "id": station_id, "latitude": 53.55, "longitude": 10.0}
+    products = {"nationalExpress": True, "national": True, "regionalExpress": True,
+                "regional": True, "suburban": True, "bus": True}
+    stop = {"type": "stop", "id": station_id, "name": name, "location": location, "products": products}
+    if options["subStops"]:
+        stop["station"] = {"type": "station", "id": f"{station_id}9", "name": name,
+                           "location": location, "products": products}
+    if options["entrances"]:
+        stop["entrances"] = [{"type": "location", "latitude": 53.55 + i / 1000, "longitude": 10.0}
+                             for i in range(3)]
+    return stop
+
+
+def make_journey_payload(index: int, legs_per_journey: int = 3,
+                         start: Optional[datetime] = None,
+                         params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Synthetische /journeys Verbindung (Aufbau wie db-rest v6, Umfang nach params)"""
+    options = journey_options(params)
+    if start is None:
+        start = datetime(2025, 3, 15, 6, 0) + timedelta(minutes=7 * index)
+    legs = []
+    for leg_number in range(legs_per_journey):
+        departure = start + timedelta(hours=2 * leg_number)
+        arrival = departure + timedelta(minutes=105)
+        legs.append({
+            "origin": _stop(f"80{index % 9000:04d}{leg_number}", f"Bahnhof {leg_number}", options),
+            "destination": _stop(f"81{index % 9000:04d}{leg_number}", f"Bahnhof {leg_number + 1}", options),
+            "departure": departure.isoformat() + "+01:00",
+            "plannedDeparture": departure.isoformat() + "+01:00",
+            "departureDelay": None,
+            "arrival": arrival.isoformat() + "+01:00",
+            "plannedArrival": arrival.isoformat() + "+01:00",
+            "arrivalDelay": None,
+            "tripId": f"1|{200000 + index}|{leg_number}|80|{start.strftime('%d%m%Y')}",
+            "line": {"type": "line", "id": f"ice-{500 + leg_number}", "name": f"ICE {500 + leg_number}",
+                     "product": "nationalExpress", "mode": "train", "operator": {"id": "db-fernverkehr-ag",
+                                                                                 "name": "DB Fernverkehr AG"}},
+            "direction": "München Hbf",
+            "departurePlatform": str(leg_number + 5),
+            "arrivalPlatform": str(leg_number + 7),
+        })
+        leg = legs[-1]
+        if options["remarks"]:
+            leg["remarks"] = [{"type": "hint", "code": "FR", "text": "Fahrradmitnahme reservierungspflichtig"},
+                              {"type": "hint", "code": "EH", "text": "Fahrzeuggebundene Einstiegshilfe vorhanden"}]
+        if options["stopovers"]:
+            leg["stopovers"] = [{
+                "stop": _stop(f"82{index % 9000:04d}{leg_number}{stop}", f"Halt {stop}", options),
+                "arrival": (departure + timedelta(minutes=15 * stop)).isoformat() + "+01:00",
+                "departure": (departure + timedelta(minutes=15 * stop + 2)).isoformat() + "+01:00",
+                "arrivalPlatform": "3", "departurePlatform": "3",
+            } for stop in range(1, 7)]
+        if options["polylines"]:
+            leg["polyline"] = {"type": "FeatureCollection", "features": [
+                {"type": "Feature", "properties": {},
+                 "geometry": {"type": "Point", "coordinates": [10.0 + point / 100, 53.55 - point / 100]}}
+                for point in range(40)
+            ]}
+    journey = {
+        "type": "journey",
+        "legs": legs,
+        "refreshToken": "T$A=1@O=Hamburg Hbf@L=8002549@a=128@$A=1@O=Landeck-Zams@L=8100063@" + "x" * 120,
+        "price": {"amount": 79.9, "currency": "EUR", "hint": None},
+    }
+    if options["tickets"]:
+        journey["tickets"] = [{"name": name, "priceObj": {"amount": 7990 + 1000 * i}, "firstClass": i == 2}
+                              for i, name in enumerate(("Sparpreis", "Flexpreis", "Flexpreis 1. Klasse"))]
+    return journey
+
+
+def make_location(name: str, index: int = 0) -> Dict[str, Any]:
+    """Synthetische /locations Station"""
+    station_id = f"{8000000 + zlib.crc32(name.encode('utf-8')) % 100000 + index}"
+    return {
+        "type": "station",
+        "id": station_id,
+        "name": name,
+        "location": {"type": "location", "id": station_id, "latitude": 53.55, "longitude": 10.0},
+    }
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _shift_journey(journey: Dict[str, Any], delta: timedelta,
+                   options: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    """Aufgezeichnete Verbindung zeitlich verschieben (abgeschaltete Zusatzdaten entfernen)"""
+    dropped = {field for name, field in OPTION_FIELDS.items() if options and not options[name]}
+    legs = []
+    for leg in journey.get("legs", []):
+        leg = {key: value for key, value in leg.items() if key not in dropped}
+        for field in TIME_FIELDS:
+            if leg.get(field):
+                leg[field] = (_parse_time(leg[field]) + delta).isoformat()
+        legs.append(leg)
+    return {**{key: value for key, value in journey.items() if key not in dropped}, "legs": legs}
+
+
+class _Faults:
+    """Zufällige Latenz, Fehler und 429 (reproduzierbar über seed)"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float,
+                 rate_limit_rate: float, retry_after: int, seed: int):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, Optional[int]]:
+        """Verzögerung in Sekunden und ggf. Fehler-Statuscode"""
+        with self._lock:
+            delay = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie bei den echten APIs
+    disable_nagle_algorithm = True  # Header und Body einzeln geschrieben - sonst ~40ms Delayed-ACK je Anfrage
+    server: "_FakeHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _fault(self, telegram: bool) -> bool:
+        """Latenz anwenden und ggf. Fehlerantwort senden - True wenn beantwortet"""
+        delay, status = self.server.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            self.server.count("rate_limited")
+            retry_after = self.server.faults.retry_after
+            body = {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                    "parameters": {"retry_after": retry_after}} if telegram else {"message": "Too Many Requests"}
+            self._send_json(429, body, {"Retry-After": str(retry_after)})
+            return True
+        if status is not None:
+            self.server.count("errors")
+            self._send_json(status, {"ok": False, "description": "Service Unavailable"})
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/__stats":
+            self._send_json(200, self.server.snapshot())
+            return
+
+        self.server.count(url.path.rsplit("/", 1)[-1] if url.path.startswith("/bot") else url.path)
+        telegram = url.path.startswith("/bot")
+        if self._fault(telegram):
+            return
+
+        if url.path == "/journeys":
+            self._send_json(200, self.server.journeys_page(params))
+        elif url.path == "/locations":
+            self._send_json(200, self.server.locations(params.get("query", "")))
+        elif telegram and url.path.endswith("/getMe"):
+            self._send_json(200, {"ok": True, "result": {"id": 1, "is_bot": True, "username": "bench_bot"}})
+        else:
+            self._send_json(404, {"message": "not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        method = url.path.rsplit("/", 1)[-1]
+
+        self.server.count(method)
+        if self._fault(telegram=True):
+            return
+
+        if method == "sendMessage":
+            self._send_json(200, {"ok": True, "result": {"message_id": self.server.next_message_id(),
+                                                         "chat": {"id": body.get("chat_id")},
+                                                         "text": body.get("text")}})
+        elif method == "editMessageText":
+            self._send_json(200, {"ok": True, "result": {"message_id": body.get("message_id"),
+                                                         "text": body.get("text")}})
+        else:
+            self._send_json(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, faults: _Faults, journeys_per_page: int, interval_minutes: int,
+                 legs_per_journey: int, recordings: Optional[str]):
+        super().__init__(address, _Handler)
+        self.faults = faults
+        self.journeys_per_page = journeys_per_page
+        self.interval_minutes = interval_minutes
+        self.legs_per_journey = legs_per_journey
+        self.recorded_journeys: Optional[List[Dict[str, Any]]] = None
+        self.recorded_locations: Optional[List[Dict[str, Any]]] = None
+        if recordings:
+            self._load_recordings(recordings)
+        self._counters: Dict[str, int] = {}
+        self._message_id = 0
+        self._lock = threading.Lock()
+
+    def _load_recordings(self, directory: str):
+        journeys_path = os.path.join(directory, "journeys.json")
+        locations_path = os.path.join(directory, "locations.json")
+        if os.path.exists(journeys_path):
+            with open(journeys_path, encoding="utf-8") as f:
+                self.recorded_journeys = json.load(f).get("journeys") or None
+        if os.path.exists(locations_path):
+            with open(locations_path, encoding="utf-8") as f:
+                self.recorded_locations = json.load(f)
+
+    def handle_error(self, request, client_address):
+        # Client hat Keep-Alive Verbindung geschlossen - kein Fehler des Stand-ins
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def count(self, name: str):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def next_message_id(self) -> int:
+        with self._lock:
+            self._message_id += 1
+            return self._message_id
+
+    def journeys_page(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Eine Seite ab departure bzw. laterThan (laterRef kodiert die nächste Abfahrt)"""
+        if params.get("laterThan"):
+            start = datetime.fromisoformat(params["laterThan"].split("@", 1)[1])
+        else:
+            start = datetime.fromisoformat(params.get("departure", "2025-03-15T08:00:00"))
+        start = start.replace(tzinfo=None)
+        results = int(params.get("results") or self.journeys_per_page)
+        options = journey_options(params)
+
+        if self.recorded_journeys:
+            first = _parse_time(self.recorded_journeys[0]["legs"][0]["departure"]).replace(tzinfo=None)
+            journeys = [_shift_journey(journey, start - first, options)
+                        for journey in self.recorded_journeys[:results]]
+            last = _parse_time(journeys[-1]["legs"][0]["departure"]).replace(tzinfo=None)
+        else:
+            step = timedelta(minutes=self.interval_minutes)
+            base = int(start.timestamp() // 60)
+            journeys = [make_journey_payload(base + i, self.legs_per_journey, start + i * step, params)
+                        for i in range(results)]
+            last = start + (results - 1) * step
+
+        return {
+            "earlierRef": f"earlier@{start.isoformat()}",
+            "laterRef": f"later@{(last + timedelta(minutes=1)).isoformat()}",
+            "journeys": journeys,
+            "realtimeDataUpdatedAt": int(time.time()),
+        }
+
+    def locations(self, query: str) -> List[Dict[str, Any]]:
+        if self.recorded_locations is not None:
+            return self.recorded_locations
+        return [make_location(query), make_location(f"{query} Süd", 1)]
+
+
+def _serve(port: int, options: Dict[str, Any], ready):
+    faults = _Faults(options["latency_ms"], options["jitter_ms"], options["error_rate"],
+                     options["rate_limit_rate"], options["retry_after"], options["seed"])
+    server = _FakeHTTPServer(("127.0.0.1", port), faults, options["journeys_per_page"],
+                             options["interval_minutes"], options["legs_per_journey"], options["recordings"])
+    ready.send(server.server_address[1])
+    ready.close()
+    server.serve_forever()
+
+
+class FakeApiServer:
+    """Stand-in Server in eigenem Prozess - url als base_url für DBClient und Telegram verwenden"""
+
+    def __init__(self,
+                 latency_ms: float = 0,
+                 jitter_ms: float = 0,
+                 error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 retry_after: int = 1,
+                 journeys_per_page: int = 10,
+                 interval_minutes: int = 30,
+                 legs_per_journey: int = 3,
+                 recordings: Optional[str] = None,
+                 seed: int = 0,
+                 port: int = 0):
+        self.port = port
+        self.options = {
+            "latency_ms": latency_ms, "jitter_ms": jitter_ms, "error_rate": error_rate,
+            "rate_limit_rate": rate_limit_rate, "retry_after": retry_after,
+            "journeys_per_page": journeys_per_page, "interval_minutes": interval_minutes,
+            "legs_per_journey": legs_per_journey, "recordings": recordings, "seed": seed,
+        }
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "FakeApiServer":
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(target=_serve, args=(self.port, self.options, sender),
+                                                name="fake-api", daemon=True)
+        self._process.start()
+        if not receiver.poll(10):
+            raise RuntimeError("Fake-API Server startet nicht")
+        self.port = receiver.recv()
+        return self
+
+    def stats(self) -> Dict[str, int]:
+        """Anfragen je Endpunkt (inkl. rate_limited/errors)"""
+        import requests
+        return requests.get(f"{self.url}/__stats", timeout=5).json()
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(5)
+            self._process = None
+
+    def __enter__(self) -> "FakeApiServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Stand-in für DB API und Telegram")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--journeys-per-page", type=int, default=10)
+    parser.add_argument("--recordings", help="Verzeichnis mit journeys.json / locations.json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    options = {
+        "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+        "rate_limit_rate": args.rate_limit_rate, "retry_after": args.retry_after,
+        "journeys_per_page": args.journeys_per_page, "interval_minutes": 30, "legs_per_journey": 3,
+        "recordings": args.recordings, "seed": args.seed,
+    }
+    _, sender = multiprocessing.Pipe(duplex=False)
+    print(f"Fake-API auf http://127.0.0.1:{args.port} (Strg+C beendet)")
+    try:
+        _serve(args.port, options, sender)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
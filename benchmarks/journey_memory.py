@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Speicherbedarf geparster Verbindungen
+Vergleicht den bisherigen Journey-Dataclass (Legs + komplette API-Antwort)
+mit dem kompakten Journey (__slots__, Legs komprimiert, raw_data optional)
+
+Verwendung: python benchmarks/journey_memory.py [Anzahl Verbindungen]
+"""
+
+import os
+import sys
+import gc
+import json
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from db_client import DBClient, HAMBURG_HBF_ID, LANDECK_ZAMS_ID
+from rate_limiter import TokenBucketRateLimiter
+
+from fake_api import make_journey_payload
+
+
+@dataclass
+class LegacyJourney:
+    """Journey wie vor der Umstellung (hält Legs und komplette API-Antwort)"""
+    departure_time: datetime
+    arrival_time: datetime
+    duration_minutes: int
+    transfers: int
+    legs: List[Dict[str, Any]]
+    raw_data: Dict[str, Any]
+
+
+def measure(label: str, build) -> int:
+    """Speicher der gehaltenen Verbindungen (API-Antwort selbst ist danach freigegeben)"""
+    gc.collect()
+    tracemalloc.start()
+    journeys = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<36} {len(journeys):>6} Verbindungen  "
+          f"gehalten {current / 1024 / 1024:7.2f} MB  Spitze {peak / 1024 / 1024:7.2f} MB")
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    # Antworten als JSON-Text vorhalten - wie vom Netz, wird pro Verbindung neu dekodiert
+    payloads = [json.dumps(make_journey_payload(i)) for i in range(count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = TokenBucketRateLimiter(db_path=os.path.join(tmp, "rate_limit.sqlite"))
+        compact_client = DBClient(rate_limiter=limiter)
+        raw_client = DBClient(rate_limiter=limiter, keep_raw_data=True)
+
+        def build_legacy():
+            journeys = []
+            for text in payloads:
+                parsed = compact_client._parse_journey(json.loads(text))
+                data = json.loads(text)
+                journeys.append(LegacyJourney(parsed.departure_time, parsed.arrival_time,
+                                              parsed.duration_minutes, parsed.transfers,
+                                              data["legs"], data))
+            return journeys
+
+        def build_with(client):
+            return lambda: [client._parse_journey(json.loads(text)) for text in payloads]
+
+        print(f"Route {HAMBURG_HBF_ID} → {LANDECK_ZAMS_ID}, {count} synthetische Verbindungen\n")
+        legacy = measure("Dataclass (legs + raw_data)", build_legacy)
+        raw = measure("Kompakt, keep_raw_data=True", build_with(raw_client))
+        compact = measure("Kompakt (Standard)", build_with(compact_client))
+
+        per_10k = 10_000 / count
+        print(f"\nPro 10k Verbindungen: vorher {legacy * per_10k / 1024 / 1024:.1f} MB, "
+              f"nachher {compact * per_10k / 1024 / 1024:.1f} MB "
+              f"({100 * (1 - compact / legacy):.0f}% weniger), mit raw_data {raw * per_10k / 1024 / 1024:.1f} MB")
+
+        compact_client.transport.close()
+        raw_client.transport.close()
+        limiter.close()
+
+
+if __name__ == "__main__":
+    main()
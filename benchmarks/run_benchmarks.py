@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Benchmark-Suite (offline)
+Misst DBClient, ConnectionMonitor und Telegram-Benachrichtigungen gegen den
+lokalen Stand-in (fake_api.py) statt gegen die Community API - kein Rate-Budget,
+reproduzierbar, mit einstellbarer Latenz, Fehlerquote und 429-Antworten
+
+Je Benchmark: Durchsatz, p50/p99 Latenz und Speicherspitze einer Operation,
+bei API-Benchmarks zusätzlich die empfangenen Bytes je Operation.
+Mit --json werden die Ergebnisse gespeichert, mit --baseline gegen einen
+früheren Lauf verglichen (Exit-Code 1 bei Regression)
+
+Verwendung: python benchmarks/run_benchmarks.py [--iterations 50] [--latency-ms 20] [--baseline results.json]
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Union
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_api import FakeApiServer, make_journey_payload
+
+# Abfrage ohne Profil-Parameter (Verhalten vor den Abfrageprofilen) als Vergleichsbasis
+UNPROFILED = "ohne Profil"
+
+
+@dataclass
+class BenchmarkResult:
+    """Ergebnis eines Benchmarks"""
+    name: str
+    operations: int
+    failures: int
+    seconds: float
+    ops_per_second: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_mb: float
+    kib_per_op: float = 0.0
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Perzentil (nächster Rang) einer Messreihe"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(name: str, operation: Callable[[int], Any], operations: int,
+                  received_bytes: Callable[[], float] = lambda: 0.0) -> BenchmarkResult:
+    """Operation n-mal ausführen (ohne tracemalloc), danach ein Lauf für die Speicherspitze
+
+    received_bytes: Zähler empfangener Bytes (z.B. api_response_bytes_total) für KiB je Operation
+    """
+    operation(0)  # Aufwärmen: Verbindungen aufbauen, Imports, Caches
+    gc.collect()
+    bytes_before = received_bytes()
+
+    latencies = []
+    failures = 0
+    started = time.perf_counter()
+    for i in range(operations):
+        op_started = time.perf_counter()
+        if not operation(i + 1):
+            failures += 1
+        latencies.append(time.perf_counter() - op_started)
+    seconds = time.perf_counter() - started
+    kib_per_op = (received_bytes() - bytes_before) / 1024 / operations if operations else 0.0
+
+    gc.collect()
+    tracemalloc.start()
+    operation(operations + 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        operations=operations,
+        failures=failures,
+        seconds=seconds,
+        ops_per_second=operations / seconds if seconds else 0.0,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        peak_memory_mb=peak / 1024 / 1024,
+        kib_per_op=kib_per_op,
+    )
+
+
+def configure_environment(tmp: str):
+    """Konfiguration für Config() - Zustand im Temp-Verzeichnis, kein Rate-Limit, kein Cache"""
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "benchmark",
+        "TELEGRAM_CHAT_ID": "1",
+        "STATE_DIR": tmp,
+        "TARGET_MONTH": "2025-03",
+        "TARGET_DAYS": "14-17",
+        "CHECK_START_HOUR": "8",
+        "CHECK_END_HOUR": "20",
+        "RATE_LIMIT_REQUESTS": "1000000",
+        "RATE_LIMIT_WINDOW_SECONDS": "1",
+        "CACHE_ENABLED": "false",
+        "TELEGRAM_OUTBOX_ENABLED": "false",
+    })
+
+
+_monitors = []
+
+
+def build_monitor(server: FakeApiServer):
+    """Monitor wie in main.py, aber gegen den Stand-in"""
+    from config import Config
+    from main import create_monitor
+
+    monitor = create_monitor(Config())
+    monitor.db_client.base_url = server.url
+    monitor.telegram.api_url = f"{server.url}/bot{monitor.telegram.bot_token}"
+    _monitors.append(monitor)
+    return monitor
+
+
+def close_monitors():
+    """Verbindungen der Monitore eines Benchmarks schließen"""
+    while _monitors:
+        _monitors.pop().db_client.transport.close()
+
+
+def build_benchmarks(server: FakeApiServer,
+                     iterations: int) -> Dict[str, Callable[[], Union[BenchmarkResult, List[BenchmarkResult]]]]:
+    """Benchmark-Name → Funktion (Setup erst beim Aufruf)"""
+    from db_client import HAMBURG_HBF_ID, LANDECK_ZAMS_ID
+    from telegram_notifier import TelegramNotifier
+    from query_profiles import QUERY_PROFILES, QueryProfile
+
+    base_date = datetime(2025, 3, 1, 8, 0)
+
+    def parse_journey() -> BenchmarkResult:
+        client = build_monitor(server).db_client
+        payloads = [make_journey_payload(i, params=client.query_profile.params) for i in range(1000)]
+        return run_benchmark("parse_journey", lambda i: client._parse_journey(payloads[i % len(payloads)]),
+                             iterations * 100)
+
+    def search_journeys() -> BenchmarkResult:
+        client = build_monitor(server).db_client
+        return run_benchmark(
+            "search_journeys",
+            lambda i: client.search_journeys(HAMBURG_HBF_ID, LANDECK_ZAMS_ID, base_date + timedelta(days=i % 365)),
+            iterations,
+            received_bytes=lambda: client.metrics.total("api_response_bytes_total")
+        )
+
+    def query_profiles() -> List[BenchmarkResult]:
+        # Je Profil: Bytes und Dauer einer Abfrage, Parse-Zeit einer Verbindung
+        # Vergleichsbasis: Abfrage ohne Parameter (Standardumfang der API, Felder wie standard)
+        unprofiled = QueryProfile(UNPROFILED, {}, QUERY_PROFILES["standard"].fields, "Standardumfang der API")
+        client = build_monitor(server).db_client
+        client.coalesce_requests = False
+        results = []
+        for name, profile in [(UNPROFILED, unprofiled), *QUERY_PROFILES.items()]:
+            client.query_profile = profile
+            results.append(run_benchmark(
+                f"search_journeys [{name}]",
+                lambda i: client.search_journeys(HAMBURG_HBF_ID, LANDECK_ZAMS_ID, base_date + timedelta(days=i % 365)),
+                iterations,
+                received_bytes=lambda: client.metrics.total("api_response_bytes_total")
+            ))
+            payloads = [make_journey_payload(i, params=profile.params) for i in range(1000)]
+            results.append(run_benchmark(
+                f"parse_journey [{name}]",
+                lambda i: client._parse_journey(payloads[i % len(payloads)], profile),
+                iterations * 100
+            ))
+        return results
+
+    def search_journeys_buffered() -> BenchmarkResult:
+        client = build_monitor(server).db_client
+        client.stream_responses = False
+        return run_benchmark(
+            "search_journeys (ohne Stream)",
+            lambda i: client.search_journeys(HAMBURG_HBF_ID, LANDECK_ZAMS_ID, base_date + timedelta(days=i % 365)),
+            iterations
+        )
+
+    def get_month_connections() -> BenchmarkResult:
+        client = build_monitor(server).db_client
+        return run_benchmark(
+            "get_month_connections",
+            lambda i: client.get_month_connections(HAMBURG_HBF_ID, LANDECK_ZAMS_ID, 2025, 1 + i % 12),
+            max(1, iterations // 10)
+        )
+
+    def run_daily_check() -> BenchmarkResult:
+        monitor = build_monitor(server)
+        return run_benchmark("run_daily_check", lambda i: monitor.run_daily_check(), max(1, iterations // 5))
+
+    def render_notifications() -> BenchmarkResult:
+        client = build_monitor(server).db_client
+        notifier = TelegramNotifier("benchmark", "1")
+        connections = {
+            (base_date + timedelta(days=day)).strftime("%Y-%m-%d"):
+                client.search_journeys(HAMBURG_HBF_ID, LANDECK_ZAMS_ID, base_date + timedelta(days=day))
+            for day in range(4)
+        }
+        return run_benchmark("render_status_body",
+                             lambda i: notifier.render_status_body(connections, "Hamburg Hbf", "Landeck-Zams"),
+                             iterations * 100)
+
+    def notify_all_connections() -> BenchmarkResult:
+        monitor = build_monitor(server)
+        client = monitor.db_client
+        notifier = monitor.telegram
+        connections = {
+            (base_date + timedelta(days=day)).strftime("%Y-%m-%d"):
+                client.search_journeys(HAMBURG_HBF_ID, LANDECK_ZAMS_ID, base_date + timedelta(days=day))
+            for day in range(4)
+        }
+        return run_benchmark("notify_all_connections",
+                             lambda i: notifier.notify_all_connections(connections, "Hamburg Hbf", "Landeck-Zams"),
+                             iterations)
+
+    return {
+        "parse_journey": parse_journey,
+        "search_journeys": search_journeys,
+        "search_journeys_buffered": search_journeys_buffered,
+        "query_profiles": query_profiles,
+        "get_month_connections": get_month_connections,
+        "run_daily_check": run_daily_check,
+        "render_status_body": render_notifications,
+        "notify_all_connections": notify_all_connections,
+    }
+
+
+def print_results(results: List[BenchmarkResult]):
+    print(f"\n{'Benchmark':<32} {'Ops':>7} {'Fehler':>7} {'Ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'Spitze MB':>10} {'KiB/Op':>8}")
+    for result in results:
+        kib = f"{result.kib_per_op:>8.1f}" if result.kib_per_op else f"{'-':>8}"
+        print(f"{result.name:<32} {result.operations:>7} {result.failures:>7} {result.ops_per_second:>10.1f} "
+              f"{result.p50_ms:>9.2f} {result.p99_ms:>9.2f} {result.peak_memory_mb:>10.2f} {kib}")
+
+
+def print_profile_savings(results: List[BenchmarkResult]):
+    """Bytes je Abfrage und Parse-Zeit je Verbindung der Abfrageprofile gegenüber einer Abfrage ohne Profil"""
+    by_name = {result.name: result for result in results}
+    base_search = by_name.get(f"search_journeys [{UNPROFILED}]")
+    base_parse = by_name.get(f"parse_journey [{UNPROFILED}]")
+    if base_search is None or base_parse is None:
+        return
+
+    print(f"\nAbfrageprofile gegenüber '{UNPROFILED}' ({base_search.kib_per_op:.1f} KiB je Abfrage, "
+          f"{base_parse.p50_ms * 1000:.1f} µs Parse je Verbindung):")
+    for result in results:
+        if not result.name.startswith("search_journeys [") or result is base_search:
+            continue
+        profile = result.name[len("search_journeys ["):-1]
+        parse = by_name[f"parse_journey [{profile}]"]
+        print(f"  {profile:<10} {result.kib_per_op:>7.1f} KiB ({result.kib_per_op / base_search.kib_per_op - 1:+.0%}), "
+              f"{parse.p50_ms * 1000:>6.1f} µs ({parse.p50_ms / base_parse.p50_ms - 1:+.0%})")
+
+
+def compare_with_baseline(results: List[BenchmarkResult], baseline_path: str, tolerance: float) -> bool:
+    """Vergleiche mit früherem Lauf - False bei Regression über der Toleranz"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {entry["name"]: entry for entry in json.load(f)["results"]}
+
+    ok = True
+    print(f"\nVergleich mit {baseline_path} (Toleranz {tolerance:.0%}):")
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        # Mindestabstand je Metrik - kleine Absolutwerte schwanken sonst prozentual stark
+        checks = (
+            ("p50_ms", result.p50_ms, previous["p50_ms"], 1.0),
+            ("p99_ms", result.p99_ms, previous["p99_ms"], 1.0),
+            ("peak_memory_mb", result.peak_memory_mb, previous["peak_memory_mb"], 0.5),
+        )
+        for metric, current, before, minimum in checks:
+            if before > 0 and current > before * (1 + tolerance) and current - before > minimum:
+                print(f"  ❌ {result.name}: {metric} {before:.2f} → {current:.2f} (+{current / before - 1:.0%})")
+                ok = False
+    if ok:
+        print("  ✅ Keine Regression")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Benchmark-Suite gegen lokalen API Stand-in")
+    parser.add_argument("--iterations", type=int, default=50, help="Basis-Anzahl Operationen je Benchmark")
+    parser.add_argument("--only", action="append", help="Nur diesen Benchmark ausführen (mehrfach möglich)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Server-Latenz je Anfrage")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Zusätzliche zufällige Latenz (0..n)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil 503-Antworten")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Anteil 429-Antworten")
+    parser.add_argument("--journeys-per-page", type=int, default=10)
+    parser.add_argument("--recordings", help="Verzeichnis mit aufgezeichneten journeys.json / locations.json")
+    parser.add_argument("--json", dest="json_path", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--baseline", help="Ergebnisse eines früheren Laufs (--json) zum Vergleich")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Erlaubte Verschlechterung (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    server = FakeApiServer(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        journeys_per_page=args.journeys_per_page,
+        recordings=args.recordings,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp, server:
+        configure_environment(tmp)
+        benchmarks = build_benchmarks(server, args.iterations)
+        unknown = set(args.only or []) - set(benchmarks)
+        if unknown:
+            parser.error(f"Unbekannter Benchmark: {', '.join(sorted(unknown))} (verfügbar: {', '.join(benchmarks)})")
+
+        print(f"Stand-in {server.url}: Latenz {args.latency_ms:.0f}ms (+{args.jitter_ms:.0f}ms), "
+              f"Fehler {args.error_rate:.0%}, 429 {args.rate_limit_rate:.0%}")
+        results = []
+        for name, benchmark in benchmarks.items():
+            if args.only and name not in args.only:
+                continue
+            print(f"  {name} ...", flush=True)
+            try:
+                result = benchmark()
+                results.extend(result if isinstance(result, list) else [result])
+            finally:
+                close_monitors()
+
+        server_stats = server.stats()
+
+    print_results(results)
+    print_profile_savings(results)
+    print(f"\nAnfragen am Stand-in: {', '.join(f'{key}={value}' for key, value in sorted(server_stats.items()))}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "settings": {key: value for key, value in vars(args).items() if key not in ("json_path", "baseline")},
+                "results": [asdict(result) for result in results],
+            }, f, indent=2)
+        print(f"Ergebnisse gespeichert: {args.json_path}")
+
+    if args.baseline and not compare_with_baseline(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+#!/bin/bash
+# Docker Healthcheck für Bahnabfrage
+# Daemon-Modus (--daemon): Status-Server fragen (Antwort aus dem Speicher, keine API-Anfragen)
+# Cron-Modus: kein Status-Server - gesund solange der Cron-Daemon läuft
+
+# [.] verhindert, dass grep seine eigene Kommandozeile findet
+if grep -qsa "main[.]py.--daemon" /proc/[0-9]*/cmdline; then
+    exec curl -fsS "http://localhost:${STATUS_PORT:-8080}/healthz"
+fi
+
+for comm in /proc/[0-9]*/comm; do
+    if [ "$(cat "$comm" 2>/dev/null)" = "cron" ]; then
+        exit 0
+    fi
+done
+
+echo "Weder Daemon noch Cron-Daemon läuft"
+exit 1
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Adaptive Polling
+Abfragehäufigkeit je Überwachung nach Abstand zum Buchungshorizont
+- weit vor der erwarteten Fahrplan-Veröffentlichung: selten (z.B. 1x täglich)
+- rund um die Veröffentlichung: häufig (z.B. alle 10 Minuten)
+- nach bestätigten Verbindungen: wieder seltener (nur noch Änderungen)
+- Veröffentlichung überfällig ohne Fund: weiter häufig (Fahrplan kann jeden Tag erscheinen)
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from watch_registry import Watch
+
+
+class BookingHorizonPolicy:
+    """Berechnet das Abfrageintervall einer Überwachung aus dem erwarteten Veröffentlichungstag"""
+
+    def __init__(self,
+                 horizon_days: int = 180,
+                 near_days: int = 7,
+                 far_days: int = 60,
+                 near_interval_seconds: float = 600,
+                 far_interval_seconds: float = 86400,
+                 confirmed_interval_seconds: float = 21600,
+                 overdue_interval_seconds: float = 1800):
+        if not (0 <= near_days < far_days):
+            raise ValueError("near_days muss kleiner als far_days sein")
+        self.horizon_days = horizon_days
+        self.near_days = near_days
+        self.far_days = far_days
+        self.near_interval_seconds = near_interval_seconds
+        self.far_interval_seconds = far_interval_seconds
+        self.confirmed_interval_seconds = confirmed_interval_seconds
+        self.overdue_interval_seconds = overdue_interval_seconds
+
+    def expected_publication(self, watch: Watch) -> Optional[date]:
+        """Erster Tag an dem der früheste Zieltag buchbar sein sollte (Zieltag - Buchungshorizont)"""
+        try:
+            first_day = date(watch.year, watch.month, min(watch.days))
+        except ValueError:
+            return None
+        horizon_days = int(watch.options.get("booking_horizon_days", self.horizon_days))
+        return first_day - timedelta(days=horizon_days)
+
+    def days_until_publication(self, watch: Watch, now: datetime) -> Optional[float]:
+        """Tage bis zur erwarteten Veröffentlichung (negativ: liegt zurück)"""
+        publication = self.expected_publication(watch)
+        if publication is None:
+            return None
+        return (datetime.combine(publication, datetime.min.time()) - now).total_seconds() / 86400
+
+    def interval_for(self, watch: Watch, now: datetime, confirmed: bool) -> float:
+        """Abfrageintervall in Sekunden"""
+        if confirmed:
+            return self.confirmed_interval_seconds
+
+        days = self.days_until_publication(watch, now)
+        if days is None:
+            return self.far_interval_seconds
+
+        # Veröffentlichung lange überfällig ohne Fund - Schätzung lag daneben, Fahrplan kann jederzeit kommen
+        if days < -self.near_days:
+            return self.overdue_interval_seconds
+
+        if days <= self.near_days:
+            return self.near_interval_seconds
+
+        if days >= self.far_days:
+            return self.far_interval_seconds
+
+        # Dazwischen geometrisch von "near" nach "far"
+        fraction = (days - self.near_days) / (self.far_days - self.near_days)
+        ratio = self.far_interval_seconds / self.near_interval_seconds
+        return self.near_interval_seconds * ratio ** fraction
+
+
+class AdaptivePoller:
+    """Job für den Scheduler: prüft nur fällige Überwachungen und plant jede einzeln neu"""
+
+    def __init__(self, monitor, policy: BookingHorizonPolicy):
+        self.monitor = monitor
+        self.policy = policy
+        self.logger = logging.getLogger(__name__)
+        self._next_due: Dict[str, datetime] = {}
+
+    def due_watches(self, now: datetime) -> List[Watch]:
+        """Überwachungen deren nächster Check erreicht ist (neue sofort)"""
+        return [watch for watch in self.monitor.owned_watches() if self._next_due.get(watch.id, now) <= now]
+
+    def next_run(self, now: datetime) -> datetime:
+        """Frühester fälliger Check aller Überwachungen"""
+        due_times = [self._next_due.get(watch.id, now) for watch in self.monitor.owned_watches()]
+        return min(due_times) if due_times else now + timedelta(seconds=self.policy.far_interval_seconds)
+
+    def run_due(self) -> bool:
+        """Prüfe fällige Überwachungen gemeinsam (ein Batch) und plane sie neu"""
+        due = self.due_watches(datetime.now())
+        if not due:
+            return True
+
+        success = self.monitor.run_daily_check(due)
+
+        now = datetime.now()
+        for watch in due:
+            confirmed = self.monitor.journey_store.has_watch(watch.id)
+            interval = self.policy.interval_for(watch, now, confirmed)
+            self._next_due[watch.id] = now + timedelta(seconds=interval)
+
+            if confirmed:
+                reason = "Verbindungen bestätigt"
+            else:
+                publication = self.policy.expected_publication(watch)
+                reason = f"Veröffentlichung erwartet {publication.strftime('%d.%m.%Y') if publication else '?'}"
+            self.logger.info(f"[{watch.display_name}] nächster Check in {timedelta(seconds=int(interval))} ({reason})")
+
+        return success
+
+
+def create_adaptive_poller(config, monitor) -> AdaptivePoller:
+    """Erstelle adaptiven Poller aus der Konfiguration"""
+    policy = BookingHorizonPolicy(
+        horizon_days=config.booking_horizon_days,
+        near_days=config.poll_near_days,
+        far_days=config.poll_far_days,
+        near_interval_seconds=config.poll_interval_near_seconds,
+        far_interval_seconds=config.poll_interval_far_seconds,
+        confirmed_interval_seconds=config.poll_interval_confirmed_seconds,
+        overdue_interval_seconds=config.poll_interval_overdue_seconds
+    )
+    return AdaptivePoller(monitor, policy)
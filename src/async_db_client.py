@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Async Deutsche Bahn Client
+asyncio-Variante des DBClient für Massenabfragen (z.B. Monats-Scan)
+Requests laufen parallel mit begrenzter Nebenläufigkeit; das gemeinsame
+Token-Bucket Rate Limit des DBClient gilt weiterhin für jeden Request
+"""
+
+import asyncio
+import calendar
+import logging
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from db_client import DBClient, Journey, JourneySweep, Station
+
+
+class AsyncDBClient:
+    """asyncio-Client mit gleicher Schnittstelle wie DBClient (search_journeys, find_station, get_month_connections)"""
+
+    def __init__(self, db_client: DBClient, max_concurrency: int = 8):
+        # Sync-Client liefert Transport (Keep-Alive Pool), Rate Limiter und Parser
+        self.db_client = db_client
+        self.max_concurrency = max_concurrency
+        self.logger = logging.getLogger(__name__)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore pro Event-Loop anlegen (asyncio.run erzeugt bei jedem Check einen neuen Loop)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, func, *args, **kwargs):
+        """Führe blockierenden Client-Aufruf im Thread-Pool aus (begrenzt durch Semaphore)"""
+        async with self._get_semaphore():
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def find_station(self, station_name: str) -> Optional[Station]:
+        """Finde Station anhand des Namens"""
+        return await self._run(self.db_client.find_station, station_name)
+
+    async def search_journeys(self,
+                              from_station_id: str,
+                              to_station_id: str,
+                              departure_date: datetime,
+                              max_results: int = 10) -> List[Journey]:
+        """Suche Zugverbindungen zwischen zwei Stationen"""
+        return await self._run(
+            self.db_client.search_journeys,
+            from_station_id,
+            to_station_id,
+            departure_date,
+            max_results
+        )
+
+    async def search_batch(self,
+                           queries: List[Tuple[str, str, datetime, int]]) -> List[List[Journey]]:
+        """Führe beliebige Abfragen (from, to, departure, max_results) parallel aus - Ergebnis in gleicher Reihenfolge"""
+
+        async def search_one(query: Tuple[str, str, datetime, int]) -> List[Journey]:
+            from_station_id, to_station_id, departure_date, max_results = query
+            try:
+                return await self.search_journeys(from_station_id, to_station_id, departure_date, max_results)
+            except Exception as e:
+                self.logger.error(f"Fehler bei Abfrage für {departure_date.strftime('%Y-%m-%d')}: {str(e)}")
+                return []
+
+        return list(await asyncio.gather(*(search_one(q) for q in queries)))
+
+    async def sweep_journeys(self,
+                             from_station_id: str,
+                             to_station_id: str,
+                             window_start: datetime,
+                             window_end: datetime,
+                             page_size: int = 20,
+                             max_pages: int = 10,
+                             profile: Optional[str] = None) -> JourneySweep:
+        """Alle Verbindungen im Zeitfenster (Seiten nacheinander, da jede den laterRef der vorigen braucht)"""
+        return await self._run(
+            self.db_client.sweep_journeys,
+            from_station_id,
+            to_station_id,
+            window_start,
+            window_end,
+            page_size,
+            max_pages,
+            profile
+        )
+
+    async def sweep_batch(self,
+                          queries: List[Tuple[str, str, datetime, datetime, int]],
+                          max_pages: int = 10) -> List[JourneySweep]:
+        """Zeitfenster-Suchen (from, to, start, end, page_size) parallel - Ergebnis in gleicher Reihenfolge"""
+
+        async def sweep_one(query: Tuple[str, str, datetime, datetime, int]) -> JourneySweep:
+            from_station_id, to_station_id, window_start, window_end, page_size = query
+            try:
+                return await self.sweep_journeys(from_station_id, to_station_id, window_start, window_end,
+                                                 page_size, max_pages)
+            except Exception as e:
+                self.logger.error(f"Fehler bei Abfrage für {window_start.strftime('%Y-%m-%d')}: {str(e)}")
+                return JourneySweep(failed=True)
+
+        return list(await asyncio.gather(*(sweep_one(q) for q in queries)))
+
+    async def search_many(self,
+                          from_station_id: str,
+                          to_station_id: str,
+                          departure_dates: List[datetime],
+                          max_results: int = 10) -> Dict[str, List[Journey]]:
+        """Suche Verbindungen für mehrere Abfahrtszeitpunkte parallel (Key: YYYY-MM-DD)"""
+        queries = [(from_station_id, to_station_id, d, max_results) for d in departure_dates]
+        results = await self.search_batch(queries)
+        return {d.strftime("%Y-%m-%d"): journeys for d, journeys in zip(departure_dates, results)}
+
+    async def get_month_connections(self,
+                                    from_station_id: str,
+                                    to_station_id: str,
+                                    year: int,
+                                    month: int,
+                                    start_hour: int = 8) -> Dict[str, List[Journey]]:
+        """Hole alle verfügbaren Verbindungen für einen bestimmten Monat (Tage parallel)"""
+        max_days = calendar.monthrange(year, month)[1]
+        dates = [datetime(year, month, day, start_hour, 0) for day in range(1, max_days + 1)]
+
+        self.logger.info(f"Suche Verbindungen für {len(dates)} Tage in {year}-{month:02d} "
+                         f"(max. {self.max_concurrency} parallel)")
+
+        results = await self.search_many(from_station_id, to_station_id, dates)
+
+        connections_by_date = {}
+        for date_key in sorted(results):
+            journeys = results[date_key]
+            if journeys:
+                connections_by_date[date_key] = journeys
+                self.logger.info(f"Gefunden: {len(journeys)} Verbindungen für {date_key}")
+            else:
+                self.logger.debug(f"Keine Verbindungen für {date_key}")
+
+        return connections_by_date
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Availability History
+Verlauf aller Checks je Überwachung und Reisetag (SQLite, nur anhängend)
+- Pro Check eine Zeile: Zeitpunkt, Anzahl Verbindungen, Verweis auf einen Snapshot
+- Snapshots sind spaltenweise gespeichert (Fingerprints, Abfahrt, Dauer, Umstiege,
+  Preis - je Spalte ein komprimiertes Array) und werden über ihren Inhalts-Hash
+  geteilt: unveränderte Ergebnisse kosten nur die Check-Zeile
+- Abfragen über (Reihe, Zeitpunkt) indiziert, z.B. "seit wann gibt es Verbindungen"
+
+Verwendung: python src/availability_history.py WATCH_ID YYYY-MM-DD
+"""
+
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from db_client import Journey
+from journey_store import journey_fingerprint
+
+DEFAULT_HISTORY_PATH = os.path.join("data", "history.sqlite")
+
+# Fingerprint-Präfix je Verbindung (8 Byte reichen für die Verbindungen eines Tages)
+KEY_BYTES = 8
+
+# Spalten eines Snapshots: (Name, array-Typcode)
+COLUMNS = (
+    ("departures", "i"),   # Minuten ab Mitternacht des Reisetags
+    ("durations", "i"),    # Minuten
+    ("transfers", "B"),
+    ("prices", "i"),       # Cent, -1 = unbekannt
+)
+
+
+@dataclass
+class HistoryJourney:
+    """Verbindung aus dem Verlauf"""
+    key: str
+    departure: datetime
+    duration_minutes: int
+    transfers: int
+    price: Optional[float]
+    first_seen: Optional[datetime] = None
+
+
+def _encode_snapshot(travel_date: str, journeys: List[Journey]) -> Tuple[str, bytes, Dict[str, bytes]]:
+    """Verbindungen spaltenweise kodieren - liefert (Inhalts-Hash, Fingerprints, Spalten)"""
+    midnight = datetime.fromisoformat(travel_date)
+    rows = {}
+    for journey in journeys:
+        key = bytes.fromhex(journey_fingerprint(journey).key)[:KEY_BYTES]
+        departure = journey.departure_time.replace(tzinfo=None)
+        rows[key] = (
+            int((departure - midnight).total_seconds() // 60),
+            journey.duration_minutes,
+            min(journey.transfers, 255),
+            round(journey.price * 100) if journey.price is not None else -1,
+        )
+
+    ordered = sorted(rows.items(), key=lambda item: (item[1][0], item[0]))
+    keys = b"".join(key for key, _ in ordered)
+    columns = {
+        name: array(typecode, (values[index] for _, values in ordered)).tobytes()
+        for index, (name, typecode) in enumerate(COLUMNS)
+    }
+
+    digest = hashlib.sha1(keys)
+    for name, _ in COLUMNS:
+        digest.update(columns[name])
+    return digest.hexdigest(), keys, columns
+
+
+def _decode_snapshot(travel_date: str, keys_blob: bytes, column_blobs: List[bytes]) -> List[HistoryJourney]:
+    """Snapshot-Zeile zurück in Verbindungen"""
+    midnight = datetime.fromisoformat(travel_date)
+    keys = zlib.decompress(keys_blob)
+    columns = []
+    for (_, typecode), blob in zip(COLUMNS, column_blobs):
+        values = array(typecode)
+        values.frombytes(zlib.decompress(blob))
+        columns.append(values)
+
+    journeys = []
+    for index, (departure, duration, transfers, price) in enumerate(zip(*columns)):
+        journeys.append(HistoryJourney(
+            key=keys[index * KEY_BYTES:(index + 1) * KEY_BYTES].hex(),
+            departure=midnight + timedelta(minutes=departure),
+            duration_minutes=duration,
+            transfers=transfers,
+            price=price / 100 if price >= 0 else None
+        ))
+    return journeys
+
+
+class AvailabilityHistory:
+    """Nur anhängender Verlauf aller Checks mit indizierten Abfragen"""
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_PATH):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._series_ids: Dict[Tuple[str, str], int] = {}
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Tabellen an"""
+        if self.db_path != ":memory:":
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            " id INTEGER PRIMARY KEY,"
+            " watch_id TEXT NOT NULL,"
+            " travel_date TEXT NOT NULL,"
+            " UNIQUE (watch_id, travel_date))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " id INTEGER PRIMARY KEY,"
+            " content_hash TEXT NOT NULL UNIQUE,"
+            " keys BLOB NOT NULL,"
+            + "".join(f" {name} BLOB NOT NULL," for name, _ in COLUMNS)
+            + " journey_count INTEGER NOT NULL)"
+        )
+        # Eine Zeile je Check - Primärschlüssel ist zugleich der Zeitindex je Reihe
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checks ("
+            " series_id INTEGER NOT NULL,"
+            " checked_at INTEGER NOT NULL,"
+            " journey_count INTEGER NOT NULL,"
+            " complete INTEGER NOT NULL,"
+            " snapshot_id INTEGER,"
+            " PRIMARY KEY (series_id, checked_at)) WITHOUT ROWID"
+        )
+        conn.commit()
+        return conn
+
+    def _series_id(self, watch_id: str, travel_date: str, create: bool = False) -> Optional[int]:
+        """ID der Reihe (Überwachung, Reisetag) - Lock muss gehalten werden"""
+        series = (watch_id, travel_date)
+        if series not in self._series_ids:
+            row = self._conn.execute(
+                "SELECT id FROM series WHERE watch_id = ? AND travel_date = ?", series
+            ).fetchone()
+            if row is None:
+                if not create:
+                    return None
+                row = (self._conn.execute(
+                    "INSERT INTO series (watch_id, travel_date) VALUES (?, ?)", series
+                ).lastrowid,)
+            self._series_ids[series] = row[0]
+        return self._series_ids[series]
+
+    def record(self, watch_id: str, travel_date: str, journeys: List[Journey],
+               complete: bool = True, checked_at: Optional[float] = None):
+        """Ergebnis eines Checks anhängen (complete=False: Zeitfenster nicht vollständig abgefragt)"""
+        checked_at = int(checked_at if checked_at is not None else time.time())
+        snapshot = _encode_snapshot(travel_date, journeys) if journeys else None
+
+        with self._lock:
+            try:
+                series_id = self._series_id(watch_id, travel_date, create=True)
+                snapshot_id = None
+                journey_count = 0
+                if snapshot is not None:
+                    content_hash, keys, columns = snapshot
+                    journey_count = len(keys) // KEY_BYTES
+                    row = self._conn.execute(
+                        "SELECT id FROM snapshots WHERE content_hash = ?", (content_hash,)
+                    ).fetchone()
+                    if row is None:
+                        snapshot_id = self._conn.execute(
+                            "INSERT INTO snapshots (content_hash, keys, "
+                            + ", ".join(name for name, _ in COLUMNS)
+                            + ", journey_count) VALUES (?, ?, " + ", ".join("?" for _ in COLUMNS) + ", ?)",
+                            (content_hash, zlib.compress(keys),
+                             *(zlib.compress(columns[name]) for name, _ in COLUMNS), journey_count)
+                        ).lastrowid
+                    else:
+                        snapshot_id = row[0]
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checks (series_id, checked_at, journey_count, complete, snapshot_id)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (series_id, checked_at, journey_count, int(complete), snapshot_id)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                self._series_ids.clear()
+                self.logger.error(f"Verlauf konnte nicht gespeichert werden: {str(e)}")
+
+    def travel_dates(self, watch_id: str) -> List[str]:
+        """Alle Reisetage einer Überwachung mit Verlauf"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT travel_date FROM series WHERE watch_id = ? ORDER BY travel_date", (watch_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count_series(self, watch_id: str, travel_date: str,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     changes_only: bool = False) -> List[Tuple[datetime, int]]:
+        """Anzahl Verbindungen je Check (changes_only: nur vollständige Checks mit geänderter Anzahl)"""
+        with self._lock:
+            series_id = self._series_id(watch_id, travel_date)
+            if series_id is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT checked_at, journey_count, complete FROM checks"
+                " WHERE series_id = ? AND checked_at >= ? AND checked_at <= ? ORDER BY checked_at",
+                (series_id,
+                 int(since.timestamp()) if since else 0,
+                 int(until.timestamp()) if until else sys.maxsize)
+            ).fetchall()
+
+        series = []
+        previous = None
+        for checked_at, journey_count, complete in rows:
+            # Unvollständige Suchen (Seite fehlgeschlagen, max. Seiten) sind keine echte Änderung
+            if changes_only and (not complete or journey_count == previous):
+                continue
+            previous = journey_count
+            series.append((datetime.fromtimestamp(checked_at), journey_count))
+        return series
+
+    def first_available(self, watch_id: str, travel_date: str) -> Optional[datetime]:
+        """Erster Check, bei dem es für den Reisetag Verbindungen gab"""
+        with self._lock:
+            series_id = self._series_id(watch_id, travel_date)
+            if series_id is None:
+                return None
+            row = self._conn.execute(
+                "SELECT MIN(checked_at) FROM checks WHERE series_id = ? AND journey_count > 0", (series_id,)
+            ).fetchone()
+        return datetime.fromtimestamp(row[0]) if row and row[0] is not None else None
+
+    def journeys_at(self, watch_id: str, travel_date: str,
+                    at: Optional[datetime] = None) -> List[HistoryJourney]:
+        """Verbindungen des letzten Checks bis zum Zeitpunkt at - mit erstem Auftreten je Verbindung"""
+        with self._lock:
+            series_id = self._series_id(watch_id, travel_date)
+            if series_id is None:
+                return []
+            row = self._conn.execute(
+                "SELECT checked_at, snapshot_id FROM checks WHERE series_id = ? AND checked_at <= ?"
+                " ORDER BY checked_at DESC LIMIT 1",
+                (series_id, int(at.timestamp()) if at else sys.maxsize)
+            ).fetchone()
+            if row is None or row[1] is None:
+                return []
+            journeys = self._load_snapshot(travel_date, row[1])
+
+        first_seen = self.journey_first_seen(watch_id, travel_date, until=datetime.fromtimestamp(row[0]))
+        for journey in journeys:
+            journey.first_seen = first_seen.get(journey.key)
+        return journeys
+
+    def journey_first_seen(self, watch_id: str, travel_date: str,
+                           until: Optional[datetime] = None) -> Dict[str, datetime]:
+        """Erstes Auftreten jeder Verbindung (Fingerprint → Zeitpunkt)
+
+        Dekodiert nur die Fingerprint-Spalte der verschiedenen Snapshots, nicht jeden Check
+        """
+        with self._lock:
+            series_id = self._series_id(watch_id, travel_date)
+            if series_id is None:
+                return {}
+            rows = self._conn.execute(
+                "SELECT MIN(c.checked_at) AS first_at, s.keys FROM checks c JOIN snapshots s ON s.id = c.snapshot_id"
+                " WHERE c.series_id = ? AND c.checked_at <= ? GROUP BY c.snapshot_id ORDER BY first_at",
+                (series_id, int(until.timestamp()) if until else sys.maxsize)
+            ).fetchall()
+
+        first_seen: Dict[str, datetime] = {}
+        for first_at, keys_blob in rows:
+            keys = zlib.decompress(keys_blob)
+            for offset in range(0, len(keys), KEY_BYTES):
+                first_seen.setdefault(keys[offset:offset + KEY_BYTES].hex(), datetime.fromtimestamp(first_at))
+        return first_seen
+
+    def _load_snapshot(self, travel_date: str, snapshot_id: int) -> List[HistoryJourney]:
+        """Snapshot laden und dekodieren (Lock muss gehalten werden)"""
+        row = self._conn.execute(
+            "SELECT keys, " + ", ".join(name for name, _ in COLUMNS) + " FROM snapshots WHERE id = ?",
+            (snapshot_id,)
+        ).fetchone()
+        return _decode_snapshot(travel_date, row[0], list(row[1:])) if row else []
+
+    def close(self):
+        """Schließe SQLite-Verbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_availability_history(config) -> Optional[AvailabilityHistory]:
+    """Erstelle Verlauf aus der Konfiguration (None falls deaktiviert)"""
+    if not config.history_enabled:
+        return None
+    return AvailabilityHistory(db_path=config.history_db_path)
+
+
+if __name__ == "__main__":
+    # Verlauf eines Reisetags anzeigen
+    from config import Config
+
+    if len(sys.argv) != 3:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    watch_id, travel_date = sys.argv[1], sys.argv[2]
+    history = AvailabilityHistory(Config().history_db_path)
+
+    first = history.first_available(watch_id, travel_date)
+    print(f"Erste Verbindungen: {first.strftime('%d.%m.%Y %H:%M') if first else '-'}")
+    for checked_at, count in history.count_series(watch_id, travel_date, changes_only=True):
+        print(f"  {checked_at.strftime('%d.%m.%Y %H:%M')}: {count} Verbindungen")
+    for journey in history.journeys_at(watch_id, travel_date):
+        price = f", {journey.price:.2f} €" if journey.price is not None else ""
+        print(f"  {journey.departure.strftime('%H:%M')} ({journey.duration_minutes} min, "
+              f"{journey.transfers} Umstiege{price}) seit {journey.first_seen.strftime('%d.%m.%Y %H:%M')}")
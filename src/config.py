@@ -8,6 +8,12 @@ import logging
 from typing import Optional
 from dotenv import load_dotenv
 
+from scheduler import CronExpression
+from http_transport import DB_API_BASE_URL
+from watch_registry import parse_days
+from query_profiles import DEFAULT_QUERY_PROFILE, QUERY_PROFILES
+from journey_filter import JourneyFilter
+
 class Config:
     """Zentrale Konfigurationsklasse"""
     
@@ -33,19 +39,130 @@ class Config:
         self.destination_station = os.getenv("DESTINATION_STATION", "Landeck-Zams")
         self.target_month = os.getenv("TARGET_MONTH", "2025-03")
         self.target_day = int(os.getenv("TARGET_DAY", "15"))  # Einzelner Tag für die Suche
+        # Mehrere Tage / Zeitraum im Zielmonat (z.B. "14-17" oder "14,15,20") - überschreibt TARGET_DAY
+        self.target_days = parse_days(os.getenv("TARGET_DAYS") or self.target_day)
+        
+        # Mehrere Überwachungen aus Datei (JSON/YAML) - ersetzt die Einzel-Route oben
+        self.watches_file = os.getenv("WATCHES_FILE")
         
         # API Konfiguration
+        # Basis-URLs (kommagetrennt, z.B. Spiegel oder eigene hafas-rest Instanz) - Auswahl nach Latenz, Failover bei Fehlern
+        self.api_base_urls = [url.strip().rstrip("/") for url in
+                              os.getenv("API_BASE_URLS", DB_API_BASE_URL).split(",") if url.strip()]
+        self.api_circuit_failure_threshold = int(os.getenv("API_CIRCUIT_FAILURE_THRESHOLD", "3"))
+        self.api_circuit_open_seconds = int(os.getenv("API_CIRCUIT_OPEN_SECONDS", "60"))
+        # Zweite Anfrage an einen anderen Endpunkt, wenn die erste länger als ihre p95-Latenz braucht
+        self.api_hedge_requests = os.getenv("API_HEDGE_REQUESTS", "false").lower() == "true"
+        # Gleiche /journeys Abfragen (mehrere Überwachungen auf derselben Route) teilen sich einen Request
+        self.api_coalesce_requests = os.getenv("API_COALESCE_REQUESTS", "false").lower() == "true"
+        self.api_coalesce_window_seconds = float(os.getenv("API_COALESCE_WINDOW_SECONDS", "1"))
         self.api_timeout_seconds = int(os.getenv("API_TIMEOUT_SECONDS", "30"))
         self.max_results_per_query = int(os.getenv("MAX_RESULTS_PER_QUERY", "20"))
+        # Vollständige API-Antwort pro Verbindung im Speicher halten (nur zum Debuggen)
+        self.journey_keep_raw_data = os.getenv("JOURNEY_KEEP_RAW_DATA", "false").lower() == "true"
+        # /journeys Antworten beim Empfang Verbindung für Verbindung dekodieren (geringerer Speicherbedarf)
+        self.stream_responses = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+        # Umfang der /journeys Antworten: probe (nur Zeiten, wenige Ergebnisse), standard (ohne Hinweise/Zwischenhalte), full
+        self.query_profile = os.getenv("QUERY_PROFILE", DEFAULT_QUERY_PROFILE)
+        # Filterregeln für gemeldete Verbindungen, z.B. "max_transfers=2; arrive_before=20:00; only_lines=ICE,RJ"
+        self.journey_filters = os.getenv("JOURNEY_FILTERS", "")
+        
+        # HTTP Transport (Keep-Alive Connection-Pools)
+        self.http_pool_connections = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+        self.http_pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+        self.telegram_timeout_seconds = int(os.getenv("TELEGRAM_TIMEOUT_SECONDS", "15"))
+        
+        # Persistenter Zustand (Rate Limit, Caches, ...)
+        self.state_dir = os.getenv("STATE_DIR", "data")
+        
+        # Rate Limiting (100 requests/minute - Produktion: 25% Sicherheitsmarge)
+        # Gemeinsames Budget aller Prozesse auf dem Host über SQLite-Datei
+        self.rate_limit_requests = int(os.getenv("RATE_LIMIT_REQUESTS", "75"))
+        self.rate_limit_window_seconds = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+        self.rate_limit_max_wait_seconds = int(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "60"))
+        self.rate_limit_db_path = os.getenv(
+            "RATE_LIMIT_DB_PATH", os.path.join(self.state_dir, "rate_limit.sqlite")
+        )
+        
+        # Persistenter Response-Cache (SQLite)
+        self.cache_enabled = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+        self.cache_db_path = os.getenv("CACHE_DB_PATH", os.path.join(self.state_dir, "journey_cache.sqlite"))
+        self.cache_journeys_ttl_seconds = int(os.getenv("CACHE_JOURNEYS_TTL_SECONDS", "120"))
+        self.cache_locations_ttl_seconds = int(os.getenv("CACHE_LOCATIONS_TTL_SECONDS", "604800"))
+        self.cache_stale_while_revalidate_seconds = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE_SECONDS", "60"))
+        self.cache_stale_if_error_seconds = int(os.getenv("CACHE_STALE_IF_ERROR_SECONDS", "21600"))
+        self.cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+        
+        # Telegram Outbox: Versand im Hintergrund (persistent, Backoff, Flood-Control)
+        self.telegram_outbox_enabled = os.getenv("TELEGRAM_OUTBOX_ENABLED", "true").lower() == "true"
+        self.telegram_outbox_path = os.getenv(
+            "TELEGRAM_OUTBOX_PATH", os.path.join(self.state_dir, "telegram_outbox.sqlite")
+        )
+        # Status-Nachrichten je Überwachung (message_id + Inhalts-Hash für editMessageText)
+        self.telegram_messages_path = os.getenv(
+            "TELEGRAM_MESSAGES_PATH", os.path.join(self.state_dir, "telegram_messages.sqlite")
+        )
+        self.telegram_global_rate_per_second = int(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SECOND", "25"))
+        self.telegram_chat_interval_seconds = float(os.getenv("TELEGRAM_CHAT_INTERVAL_SECONDS", "1"))
+        self.telegram_max_attempts = int(os.getenv("TELEGRAM_MAX_ATTEMPTS", "10"))
+        # --run: so lange vor Prozessende auf Zustellung warten (Rest folgt beim nächsten Lauf)
+        self.telegram_flush_timeout_seconds = int(os.getenv("TELEGRAM_FLUSH_TIMEOUT_SECONDS", "60"))
+        
+        # Fingerprints gemeldeter Verbindungen (nur Änderungen werden gemeldet)
+        self.journey_store_path = os.getenv("JOURNEY_STORE_PATH", os.path.join(self.state_dir, "journeys.sqlite"))
+        
+        # Verlauf aller Checks (Verfügbarkeit je Reisetag über die Zeit)
+        self.history_enabled = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+        self.history_db_path = os.getenv("HISTORY_DB_PATH", os.path.join(self.state_dir, "history.sqlite"))
+        
+        # Lokaler Stationsindex (Name → ID)
+        self.station_index_path = os.getenv("STATION_INDEX_PATH", os.path.join(self.state_dir, "stations.sqlite"))
+        
+        # Metriken (Prometheus-Format): in SQLite über Cron-Läufe aufsummiert, optional als Textdatei
+        self.metrics_enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.metrics_db_path = os.getenv("METRICS_DB_PATH", os.path.join(self.state_dir, "metrics.sqlite"))
+        self.metrics_textfile_path = os.getenv("METRICS_TEXTFILE_PATH", os.path.join(self.state_dir, "metrics.prom"))
+        
+        # Parallele API-Requests (AsyncDBClient, sollte <= HTTP_POOL_MAXSIZE sein)
+        self.async_max_concurrency = int(os.getenv("ASYNC_MAX_CONCURRENCY", "8"))
         
         # Logging
         self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
         self.log_to_file = os.getenv("LOG_TO_FILE", "false").lower() == "true"
         self.log_file_path = os.getenv("LOG_FILE_PATH", "bahnabfrage.log")
         
-        # Timing
+        # Timing: Abfahrtsfenster je Tag (Folgeseiten über laterRef bis CHECK_END_HOUR)
         self.check_start_hour = int(os.getenv("CHECK_START_HOUR", "8"))
         self.check_end_hour = int(os.getenv("CHECK_END_HOUR", "20"))
+        self.sweep_max_pages = int(os.getenv("SWEEP_MAX_PAGES", "5"))
+        
+        # Daemon-Modus: interner Zeitplan (Cron-Ausdruck oder Intervall, Intervall hat Vorrang)
+        self.schedule_cron = os.getenv("SCHEDULE_CRON", "0 0,7,10,13,15,18,21 * * *")
+        self.schedule_interval_seconds = int(os.getenv("SCHEDULE_INTERVAL_SECONDS", "0"))
+        self.schedule_jitter_seconds = int(os.getenv("SCHEDULE_JITTER_SECONDS", "0"))
+        
+        # Status-Server im Daemon-Modus (/healthz, /readyz, /status) - Port 0 deaktiviert
+        self.status_host = os.getenv("STATUS_HOST", "0.0.0.0")
+        self.status_port = int(os.getenv("STATUS_PORT", "8080"))
+        self.status_max_error_streak = int(os.getenv("STATUS_MAX_ERROR_STREAK", "3"))
+        self.status_max_check_seconds = int(os.getenv("STATUS_MAX_CHECK_SECONDS", "1800"))
+        
+        # Mehrere Container teilen sich die Überwachungen (Shards mit Leases) - 0 = alle in diesem Container
+        self.shard_count = int(os.getenv("SHARD_COUNT", "0"))
+        # Gemeinsame Datei aller Container (geteiltes Volume)
+        self.shard_lease_db_path = os.getenv("SHARD_LEASE_DB_PATH", os.path.join(self.state_dir, "leases.sqlite"))
+        self.shard_lease_seconds = int(os.getenv("SHARD_LEASE_SECONDS", "90"))
+        self.shard_worker_id = os.getenv("SHARD_WORKER_ID") or None
+        
+        # Adaptives Polling nach Buchungshorizont (Daemon-Modus, ersetzt Cron/Intervall)
+        self.schedule_adaptive = os.getenv("SCHEDULE_ADAPTIVE", "false").lower() == "true"
+        self.booking_horizon_days = int(os.getenv("BOOKING_HORIZON_DAYS", "180"))
+        self.poll_near_days = int(os.getenv("POLL_NEAR_DAYS", "7"))
+        self.poll_far_days = int(os.getenv("POLL_FAR_DAYS", "60"))
+        self.poll_interval_near_seconds = int(os.getenv("POLL_INTERVAL_NEAR_SECONDS", "600"))
+        self.poll_interval_far_seconds = int(os.getenv("POLL_INTERVAL_FAR_SECONDS", "86400"))
+        self.poll_interval_confirmed_seconds = int(os.getenv("POLL_INTERVAL_CONFIRMED_SECONDS", "21600"))
+        self.poll_interval_overdue_seconds = int(os.getenv("POLL_INTERVAL_OVERDUE_SECONDS", "1800"))
         
         # Test Modus (verwendet jetzt auch target_day)
         self.test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
@@ -72,10 +189,73 @@ class Config:
         if not (0 <= self.check_end_hour <= 23):
             errors.append("CHECK_END_HOUR muss zwischen 0 und 23 liegen")
         
+        if self.check_end_hour < self.check_start_hour:
+            errors.append("CHECK_END_HOUR darf nicht vor CHECK_START_HOUR liegen")
+        
+        if self.sweep_max_pages < 1:
+            errors.append("SWEEP_MAX_PAGES muss mindestens 1 sein")
+        
+        # API Endpunkte
+        if not self.api_base_urls or any(not url.startswith(("http://", "https://")) for url in self.api_base_urls):
+            errors.append("API_BASE_URLS muss mindestens eine http(s)-URL enthalten")
+        
+        if self.api_circuit_failure_threshold < 1 or self.api_circuit_open_seconds < 1:
+            errors.append("API_CIRCUIT_FAILURE_THRESHOLD und API_CIRCUIT_OPEN_SECONDS müssen mindestens 1 sein")
+        
+        if self.query_profile not in QUERY_PROFILES:
+            errors.append(f"QUERY_PROFILE muss einer von {', '.join(QUERY_PROFILES)} sein")
+        else:
+            try:
+                if JourneyFilter(self.journey_filters).needs_legs and \
+                        not QUERY_PROFILES[self.query_profile].populates("legs"):
+                    errors.append(f"JOURNEY_FILTERS braucht Legs - nicht im Abfrageprofil '{self.query_profile}'")
+            except ValueError as e:
+                errors.append(f"JOURNEY_FILTERS ungültig: {str(e)}")
+        
+        # HTTP Pool Validierung
+        if self.http_pool_connections < 1 or self.http_pool_maxsize < 1:
+            errors.append("HTTP_POOL_CONNECTIONS und HTTP_POOL_MAXSIZE müssen mindestens 1 sein")
+        
+        # Rate Limit Validierung
+        if self.rate_limit_requests < 1 or self.rate_limit_window_seconds < 1:
+            errors.append("RATE_LIMIT_REQUESTS und RATE_LIMIT_WINDOW_SECONDS müssen mindestens 1 sein")
+        
+        if self.telegram_global_rate_per_second < 1 or self.telegram_max_attempts < 1:
+            errors.append("TELEGRAM_GLOBAL_RATE_PER_SECOND und TELEGRAM_MAX_ATTEMPTS müssen mindestens 1 sein")
+        
+        if self.async_max_concurrency < 1:
+            errors.append("ASYNC_MAX_CONCURRENCY muss mindestens 1 sein")
+        
+        # Zeitplan Validierung
+        if self.schedule_interval_seconds < 0 or self.schedule_jitter_seconds < 0:
+            errors.append("SCHEDULE_INTERVAL_SECONDS und SCHEDULE_JITTER_SECONDS dürfen nicht negativ sein")
+        
+        if not self.schedule_interval_seconds:
+            try:
+                CronExpression(self.schedule_cron)
+            except ValueError as e:
+                errors.append(f"SCHEDULE_CRON ungültig: {str(e)}")
+        
+        if not (0 <= self.status_port <= 65535):
+            errors.append("STATUS_PORT muss zwischen 0 und 65535 liegen")
+        
+        if self.shard_count < 0 or (self.shard_count and self.shard_lease_seconds < 10):
+            errors.append("SHARD_COUNT darf nicht negativ sein, SHARD_LEASE_SECONDS muss mindestens 10 sein")
+        
+        if self.schedule_adaptive:
+            if not (0 <= self.poll_near_days < self.poll_far_days):
+                errors.append("POLL_NEAR_DAYS muss kleiner als POLL_FAR_DAYS sein")
+            if min(self.poll_interval_near_seconds, self.poll_interval_far_seconds,
+                   self.poll_interval_confirmed_seconds, self.poll_interval_overdue_seconds) < 60:
+                errors.append("POLL_INTERVAL_*_SECONDS müssen mindestens 60 sein")
+        
         # Target Day Validierung
         if not (1 <= self.target_day <= 31):
             errors.append("TARGET_DAY muss zwischen 1 und 31 liegen")
         
+        if not self.target_days or any(not (1 <= day <= 31) for day in self.target_days):
+            errors.append("TARGET_DAYS darf nur Tage zwischen 1 und 31 enthalten")
+        
         if errors:
             for error in errors:
                 print(f"Konfigurationsfehler: {error}")
@@ -126,12 +306,32 @@ class Config:
         month_name = self.get_formatted_month_name()
         return f"{self.target_day}. {month_name} {year}"
     
+    def get_formatted_days_description(self) -> str:
+        """Hole formatierte Beschreibung aller Zieltage (z.B. "14.–17. März 2025")"""
+        year, month = self.get_target_year_month()
+        month_name = self.get_formatted_month_name()
+        days = self.target_days
+        
+        if len(days) == 1:
+            return f"{days[0]}. {month_name} {year}"
+        
+        # Zusammenhängender Bereich kompakt darstellen
+        if days == list(range(days[0], days[-1] + 1)):
+            return f"{days[0]}.–{days[-1]}. {month_name} {year}"
+        
+        return f"{', '.join(f'{day}.' for day in days)} {month_name} {year}"
+    
     def print_config_summary(self):
         """Drucke Konfigurations-Zusammenfassung"""
         print("🔧 Konfiguration geladen:")
+        if self.watches_file:
+            print(f"   Überwachungen: {self.watches_file}")
         print(f"   Route: {self.departure_station} → {self.destination_station}")
         print(f"   Zeitraum: {self.target_month}")
-        print(f"   🎯 Zieltag: {self.get_formatted_date_description()}")
+        if len(self.target_days) > 1:
+            print(f"   🎯 Zieltage: {self.get_formatted_days_description()}")
+        else:
+            print(f"   🎯 Zieltag: {self.get_formatted_date_description()}")
         print(f"   Suchzeiten: {self.check_start_hour:02d}:00 - {self.check_end_hour:02d}:00 Uhr")
         print(f"   Test-Modus: {'✅ Aktiviert' if self.test_mode else '❌ Deaktiviert'}")
         
@@ -166,14 +366,94 @@ DEPARTURE_STATION=Hamburg Hbf
 DESTINATION_STATION=Landeck-Zams
 TARGET_MONTH=2025-03
 TARGET_DAY=15
+# Optional mehrere Tage (überschreibt TARGET_DAY), z.B. 14-17 oder 14,15,20
+# TARGET_DAYS=14-17
+
+# Mehrere Routen/Zeiträume (JSON/YAML) - ersetzt die Einzel-Route oben
+# WATCHES_FILE=config/watches.json
 
 # API Einstellungen
+# Mehrere Basis-URLs kommagetrennt (Spiegel, eigene hafas-rest Instanz)
+API_BASE_URLS=https://v6.db.transport.rest
+API_CIRCUIT_FAILURE_THRESHOLD=3
+API_CIRCUIT_OPEN_SECONDS=60
+API_HEDGE_REQUESTS=false
+API_COALESCE_REQUESTS=false
+API_COALESCE_WINDOW_SECONDS=1
 API_TIMEOUT_SECONDS=30
 MAX_RESULTS_PER_QUERY=20
+# Vollständige API-Antworten je Verbindung behalten (nur Debugging, kostet Speicher)
+JOURNEY_KEEP_RAW_DATA=false
+STREAM_RESPONSES=true
+QUERY_PROFILE=standard
+
+# Filterregeln für gemeldete Verbindungen (leer = alle melden)
+# z.B. max_transfers=2; arrive_before=20:00; min_transfer_minutes=8; exclude_products=bus; only_lines=ICE,RJ
+JOURNEY_FILTERS=
+TELEGRAM_TIMEOUT_SECONDS=15
+
+# HTTP Connection-Pools
+HTTP_POOL_CONNECTIONS=4
+HTTP_POOL_MAXSIZE=10
+
+# Rate Limit (gemeinsam für alle Prozesse im Container)
+STATE_DIR=data
+RATE_LIMIT_REQUESTS=75
+RATE_LIMIT_WINDOW_SECONDS=60
+RATE_LIMIT_MAX_WAIT_SECONDS=60
+ASYNC_MAX_CONCURRENCY=8
+
+# Response-Cache (SQLite, TTL in Sekunden)
+CACHE_ENABLED=true
+CACHE_JOURNEYS_TTL_SECONDS=120
+CACHE_LOCATIONS_TTL_SECONDS=604800
+CACHE_STALE_WHILE_REVALIDATE_SECONDS=60
+CACHE_STALE_IF_ERROR_SECONDS=21600
+CACHE_MAX_ENTRIES=5000
+
+# Telegram Outbox (Versand im Hintergrund mit Backoff und Flood-Control)
+TELEGRAM_OUTBOX_ENABLED=true
+TELEGRAM_GLOBAL_RATE_PER_SECOND=25
+TELEGRAM_CHAT_INTERVAL_SECONDS=1
+TELEGRAM_MAX_ATTEMPTS=10
+TELEGRAM_FLUSH_TIMEOUT_SECONDS=60
+
+# Metriken (SQLite + Prometheus-Textdatei, leer = keine Textdatei)
+METRICS_ENABLED=true
+METRICS_TEXTFILE_PATH=data/metrics.prom
+
+# Verlauf aller Checks (Abfrage: python src/availability_history.py WATCH_ID YYYY-MM-DD)
+HISTORY_ENABLED=true
 
 # Zeitsteuerung
 CHECK_START_HOUR=8
 CHECK_END_HOUR=20
+SWEEP_MAX_PAGES=5
+
+# Daemon-Modus (python src/main.py --daemon)
+SCHEDULE_CRON=0 0,7,10,13,15,18,21 * * *
+SCHEDULE_INTERVAL_SECONDS=0
+SCHEDULE_JITTER_SECONDS=0
+
+# Status-Server im Daemon-Modus (/healthz, /readyz, /status), 0 = aus
+STATUS_PORT=8080
+STATUS_MAX_ERROR_STREAK=3
+STATUS_MAX_CHECK_SECONDS=1800
+
+# Mehrere Container teilen sich die Überwachungen (0 = aus, Lease-Datei auf geteiltem Volume)
+SHARD_COUNT=0
+SHARD_LEASE_DB_PATH=data/leases.sqlite
+SHARD_LEASE_SECONDS=90
+
+# Adaptives Polling nach Buchungshorizont (ersetzt SCHEDULE_CRON im Daemon-Modus)
+SCHEDULE_ADAPTIVE=false
+BOOKING_HORIZON_DAYS=180
+POLL_NEAR_DAYS=7
+POLL_FAR_DAYS=60
+POLL_INTERVAL_NEAR_SECONDS=600
+POLL_INTERVAL_FAR_SECONDS=86400
+POLL_INTERVAL_CONFIRMED_SECONDS=21600
+POLL_INTERVAL_OVERDUE_SECONDS=1800
 
 # Logging
 LOG_LEVEL=INFO
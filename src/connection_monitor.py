@@ -1,56 +1,155 @@
 #!/usr/bin/env python3
 """
 Connection Monitor
-Überwacht neue Zugverbindungen Hamburg → Landeck-Zams für März 2025
+Überwacht neue Zugverbindungen für alle konfigurierten Routen und Zieltage
 """
 
+import json
+import time
+import asyncio
 import logging
+import threading
+from dataclasses import replace
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 
-from db_client import DBClient, Journey, HAMBURG_HBF_ID, LANDECK_ZAMS_ID
+from db_client import DBClient, Journey, JourneySweep
+from async_db_client import AsyncDBClient
 from telegram_notifier import TelegramNotifier
+from watch_registry import Watch, WatchRegistry
+from journey_store import JourneyStore
+from availability_history import AvailabilityHistory
+from shard_leases import ShardLeaseManager, shard_of
+from journey_filter import JourneyFilter
+from metrics import Metrics
 
-# ConnectionSignature entfernt - keine Duplikatserkennung mehr nötig
+# Duplikatserkennung über persistente Fingerprints: siehe journey_store.py
 
 class ConnectionMonitor:
-    """Hauptlogik für die Verbindungsüberwachung"""
+    """Hauptlogik für die Verbindungsüberwachung (eine oder viele Überwachungen)"""
     
-    def __init__(self, db_client: DBClient, telegram_notifier: TelegramNotifier, config):
+    def __init__(self, db_client: DBClient, telegram_notifier: TelegramNotifier, config,
+                 async_client: Optional[AsyncDBClient] = None,
+                 registry: Optional[WatchRegistry] = None,
+                 journey_store: Optional[JourneyStore] = None,
+                 metrics: Optional[Metrics] = None,
+                 history: Optional[AvailabilityHistory] = None,
+                 shards: Optional[ShardLeaseManager] = None):
         self.db_client = db_client
         self.telegram = telegram_notifier
         self.config = config
         self.logger = logging.getLogger(__name__)
         
+        # Parallele Abfragen (teilt Transport und Rate Limit mit db_client)
+        if async_client is None:
+            async_client = AsyncDBClient(db_client, max_concurrency=getattr(config, "async_max_concurrency", 8))
+        self.async_client = async_client
+        
+        # Alle Überwachungen teilen sich DB Client, Rate-Budget und Notifier
+        self.config_watch = WatchRegistry.from_config(config).get("default")
+        self.registry = registry if registry is not None else WatchRegistry([self.config_watch])
+        
         # Statistiken für diese Session (vereinfacht)
         self.session_stats = {
             "start_time": datetime.now(),
             "total_api_calls": 0,
+            "watches_checked": 0,
             "dates_checked": 0,
             "connections_found": 0,
             "errors": []
         }
         
-        # Für Zukunfts-Monitoring: Tracke ob schon mal Verbindungen gefunden wurden
-        self.previous_connections_found = False
+        # Fingerprints gemeldeter Verbindungen (persistent über Cron-Läufe hinweg)
+        # Tage ohne Ergebnis werden nicht verglichen - leere Antworten sind kein Beweis für Wegfall
+        self.journey_store = journey_store if journey_store is not None else JourneyStore(":memory:")
+        
+        # Verlauf aller Checks (optional) - auch leere Ergebnisse, anders als journey_store
+        self.history = history
+        
+        # Mehrere Container: nur Überwachungen der Shards, auf die dieser Container eine Lease hält
+        self.shards = shards
+        if shards is not None:
+            shards.add_change_listener(self.on_shards_changed)
+        
+        # Verworfene Meldungen (Outbox: 4xx, max. Versuche) nehmen den gespeicherten Stand zurück
+        self._notify_lock = threading.Lock()
+        outbox = getattr(telegram_notifier, "outbox", None)
+        if outbox is not None:
+            outbox.add_drop_listener(self._on_message_dropped)
+        
+        # Telegram-Verbindung nur einmal pro Prozess prüfen (Daemon-Modus)
+        self.telegram_verified = False
+        
+        # Max. Seiten (API-Abfragen) pro Tag beim Abdecken des Abfahrtsfensters
+        self.sweep_max_pages = getattr(config, "sweep_max_pages", 5)
+        
+        # Dauer und Ergebnis je Check (gemeinsam mit den Metriken von DB Client und Telegram)
+        self.metrics = metrics if metrics is not None else Metrics()
+        
+        # Filterregeln je Überwachung (JOURNEY_FILTERS oder "filters" in der Watch-Datei), einmal übersetzt
+        # Ungültige Regeln fallen schon beim Start auf
+        self._filters: Dict[str, JourneyFilter] = {}
+        for watch in self.registry:
+            self.filter_for(watch)
+        
+        # Zustand der Checks im Speicher (für /healthz, /readyz und /status)
+        self.check_started_at: Optional[float] = None
+        self.last_check: Dict[str, Any] = {}
+        self.last_success_at: Optional[float] = None
+        self.error_streak = 0  # Checks in Folge mit Fehlern
+        
+        # Aufgelöste Station-IDs je Route (lazy)
+        self._route_ids: Dict[Tuple[str, str], Tuple[str, str]] = {}
     
-    # Duplikats-Erkennungs-Methoden entfernt - zeige immer alle Verbindungen
+    def get_route_ids(self, watch: Optional[Watch] = None) -> Tuple[str, str]:
+        """Löse Abfahrts-/Zielbahnhof in Station-IDs auf (lokaler Index, sonst API)"""
+        watch = watch or self.config_watch
+        route = (watch.departure_station, watch.destination_station)
+        
+        if route not in self._route_ids:
+            departure = self.db_client.find_station(watch.departure_station)
+            destination = self.db_client.find_station(watch.destination_station)
+            
+            if not departure:
+                raise ValueError(f"Abfahrtsbahnhof nicht gefunden: {watch.departure_station}")
+            if not destination:
+                raise ValueError(f"Zielbahnhof nicht gefunden: {watch.destination_station}")
+            
+            self.logger.info(f"Route: {departure.name} ({departure.id}) → {destination.name} ({destination.id})")
+            self._route_ids[route] = (departure.id, destination.id)
+        
+        return self._route_ids[route]
+    
+    def _notifier_for(self, watch: Watch) -> TelegramNotifier:
+        """Notifier für den Chat der Überwachung (gleicher Transport)"""
+        if watch.chat_id:
+            return self.telegram.for_chat(watch.chat_id)
+        return self.telegram
     
-    def check_single_date(self, target_date: datetime) -> List[Journey]:
+    def check_single_date(self, target_date: datetime, watch: Optional[Watch] = None) -> List[Journey]:
         """Prüfe Verbindungen für ein bestimmtes Datum"""
+        return self._check_date(target_date, watch or self.config_watch)[0]
+    
+    def _check_date(self, target_date: datetime, watch: Watch) -> Tuple[List[Journey], bool]:
+        """Verbindungen eines Datums und ob das Abfahrtsfenster vollständig abgedeckt wurde"""
         date_str = target_date.strftime("%Y-%m-%d")
         self.logger.info(f"Prüfe Verbindungen für {date_str}")
         
         try:
-            # API-Aufruf
-            journeys = self.db_client.search_journeys(
-                HAMBURG_HBF_ID, 
-                LANDECK_ZAMS_ID, 
+            # API-Aufrufe: ganzes Abfahrtsfenster ab target_date
+            from_station_id, to_station_id = self.get_route_ids(watch)
+            sweep = self.db_client.sweep_journeys(
+                from_station_id, 
+                to_station_id, 
                 target_date,
-                max_results=20
+                self._window_end(target_date, watch),
+                page_size=watch.max_results,
+                max_pages=self.sweep_max_pages
             )
+            self._record_history(watch, date_str, sweep)
+            journeys = self._filter_journeys(watch, date_str, sweep.journeys)
             
-            self.session_stats["total_api_calls"] += 1
+            self.session_stats["total_api_calls"] += sweep.pages
             self.session_stats["dates_checked"] += 1
             self.session_stats["connections_found"] += len(journeys)
             
@@ -59,56 +158,195 @@ class ConnectionMonitor:
             else:
                 self.logger.debug(f"Keine Verbindungen für {date_str} (bei Zukunfts-Monitoring normal)")
             
-            return journeys
+            return journeys, sweep.complete
             
         except Exception as e:
             error_msg = f"Fehler bei Abfrage für {date_str}: {str(e)}"
             self.logger.error(error_msg)
             self.session_stats["errors"].append(error_msg)
-            return []
+            return [], False
+    
+    def filter_for(self, watch: Watch) -> JourneyFilter:
+        """Übersetzte Filterregeln einer Überwachung"""
+        journey_filter = self._filters.get(watch.id)
+        if journey_filter is None:
+            spec = watch.options.get("filters", getattr(self.config, "journey_filters", None))
+            try:
+                journey_filter = JourneyFilter(spec, metrics=self.metrics)
+            except ValueError as e:
+                raise ValueError(f"Überwachung {watch.display_name}: {str(e)}")
+            if journey_filter.needs_legs and not self.db_client.query_profile.populates("legs"):
+                raise ValueError(f"Überwachung {watch.display_name}: Filterregeln brauchen Legs - "
+                                 f"nicht im Abfrageprofil '{self.db_client.query_profile.name}'")
+            self._filters[watch.id] = journey_filter
+        return journey_filter
+    
+    def _filter_journeys(self, watch: Watch, date_str: str, journeys: List[Journey]) -> List[Journey]:
+        """Nur Verbindungen die die Filterregeln der Überwachung erfüllen"""
+        journey_filter = self.filter_for(watch)
+        if not journey_filter or not journeys:
+            return journeys
+        passed = journey_filter.apply(journeys)
+        if len(passed) < len(journeys):
+            self.logger.debug(f"Filter ({watch.display_name}, {date_str}): "
+                              f"{len(journeys) - len(passed)} von {len(journeys)} Verbindungen verworfen")
+        return passed
+    
+    def get_filter_stats(self) -> Dict[str, Any]:
+        """Verworfene Verbindungen je Regel über alle Überwachungen"""
+        rejections: Dict[str, int] = {}
+        checked = passed = 0
+        for journey_filter in self._filters.values():
+            stats = journey_filter.get_stats()
+            checked += stats["checked"]
+            passed += stats["passed"]
+            for label, count in stats["rejections"].items():
+                rejections[label] = rejections.get(label, 0) + count
+        return {"checked": checked, "passed": passed, "rejections": rejections}
+    
+    def _record_history(self, watch: Watch, date_str: str, sweep: JourneySweep):
+        """Ergebnis einer Zeitfenster-Suche im Verlauf ablegen (fehlgeschlagene Suchen ohne Ergebnis nicht)"""
+        if self.history is None or not sweep.pages or (sweep.failed and not sweep.journeys):
+            return
+        try:
+            self.history.record(watch.id, date_str, sweep.journeys, complete=sweep.complete)
+        except Exception as e:
+            self.logger.warning(f"Verlauf für {date_str} ({watch.display_name}) nicht gespeichert: {str(e)}")
+    
+    @staticmethod
+    def _window_end(window_start: datetime, watch: Watch) -> datetime:
+        """Ende des Abfahrtsfensters (end_hour der Überwachung, mindestens eine Stunde nach Start)"""
+        window_end = window_start.replace(hour=watch.end_hour, minute=0)
+        if window_end <= window_start:
+            window_end = min(window_start + timedelta(hours=1), window_start.replace(hour=23, minute=59))
+        return window_end
+    
+    def _notify_watch(self, watch: Watch, connections_by_date: Dict[str, List[Journey]],
+                      incomplete_dates: Optional[Set[str]] = None):
+        """Benachrichtige über Funde einer Überwachung - nach dem ersten Fund nur noch Änderungen
+        
+        Für Tage in incomplete_dates (Suche nicht bis zum Fensterende) werden fehlende
+        Verbindungen nicht als entfallen gemeldet und der gespeicherte Stand nur ergänzt
+        """
+        if not connections_by_date:
+            return
+        incomplete_dates = incomplete_dates or set()
+        
+        # Senden und Speichern gemeinsam - ein sofort verworfener Versand nimmt den Stand erst danach zurück
+        with self._notify_lock:
+            notifier = self._notifier_for(watch)
+            first_time = not self.journey_store.has_watch(watch.id)
+            # Kennung der Meldung - wird sie in der Outbox verworfen, gilt ihr Stand als nicht gemeldet
+            tag = json.dumps([watch.id, sorted(connections_by_date)])
+            # Status-Nachricht der Überwachung - wird bei Änderungen bearbeitet statt neu gesendet
+            status_ref = f"status:{watch.id}"
+            
+            if first_time:
+                if len(connections_by_date) == 1 and len(watch.days) == 1:
+                    # ERSTE MAL - Spezielle "NEUE VERBINDUNGEN VERFÜGBAR" Nachricht
+                    date_str, journeys = next(iter(connections_by_date.items()))
+                    sent = notifier.notify_connections_now_available(
+                        journeys,
+                        date_str,
+                        watch.departure_station,
+                        watch.destination_station,
+                        watch.get_formatted_days_description(),
+                        status_ref=status_ref,
+                        tag=tag
+                    )
+                else:
+                    # Mehrere Tage - eine gemeinsame Nachricht
+                    sent = notifier.notify_all_connections(
+                        connections_by_date,
+                        watch.departure_station,
+                        watch.destination_station,
+                        first_time=True,
+                        status_ref=status_ref,
+                        tag=tag
+                    )
+                if sent:
+                    self.logger.info(f"🎉 ERSTMALIG Verbindungen gefunden ({watch.display_name}) - Spezielle Benachrichtigung gesendet")
+            else:
+                # Wiederholter Fund - nur Unterschiede zum gespeicherten Stand
+                diffs = {
+                    date_str: self.journey_store.diff(watch.id, date_str, journeys)
+                    for date_str, journeys in connections_by_date.items()
+                }
+                for date_str in incomplete_dates & diffs.keys():
+                    diffs[date_str].removed = []
+                changed = {date_str: diff for date_str, diff in diffs.items() if diff.has_changes}
+            
+                if not changed:
+                    self.logger.info(f"Keine Änderungen für {watch.display_name} - keine Telegram-Nachricht")
+                    sent = True
+                else:
+                    added = sum(len(diff.added) for diff in changed.values())
+                    removed = sum(len(diff.removed) for diff in changed.values())
+                    modified = sum(len(diff.changed) for diff in changed.values())
+                    self.logger.info(f"Änderungen für {watch.display_name}: {added} neu, {modified} geändert, {removed} entfallen")
+                
+                    if notifier.message_store is None:
+                        sent = notifier.notify_connection_changes(
+                            changed,
+                            watch.departure_station,
+                            watch.destination_station,
+                            tag=tag
+                        )
+                    else:
+                        # Neue oder entfallene Verbindungen: eigene Nachricht (mit Ton) - nur geänderte Zeiten
+                        # aktualisieren still die Status-Nachricht
+                        sent = True
+                        if added or removed:
+                            sent = notifier.notify_connection_changes(
+                                changed,
+                                watch.departure_station,
+                                watch.destination_station,
+                                tag=tag
+                            )
+                        sent = notifier.update_status(
+                            status_ref,
+                            connections_by_date,
+                            watch.departure_station,
+                            watch.destination_station,
+                            tag=tag
+                        ) and sent
+            
+            # Stand speichern wenn die Nachricht raus bzw. in der Outbox ist - verwirft die Outbox sie später
+            # endgültig, nimmt _on_message_dropped den Stand der Tage zurück (Meldung mindestens einmal)
+            if sent:
+                for date_str, journeys in connections_by_date.items():
+                    self.journey_store.update(watch.id, date_str, journeys, partial=date_str in incomplete_dates)
     
-    # filter_new_connections entfernt - verwende immer alle gefundenen Verbindungen
+    def _on_message_dropped(self, chat_id: str, tag: str):
+        """Outbox hat eine Meldung verworfen - Stand ihrer Tage löschen, damit der nächste Check sie erneut meldet"""
+        try:
+            watch_id, dates = json.loads(tag)
+        except (ValueError, TypeError):
+            return
+        self.logger.warning(f"Meldung für Überwachung {watch_id} nicht zugestellt - "
+                            f"{', '.join(dates)} werden beim nächsten Check erneut gemeldet")
+        with self._notify_lock:
+            self.journey_store.forget(watch_id, dates)
     
-    def check_target_day_connections(self, target_day: int, start_hour: int = 8) -> List[Journey]:
-        """Prüfe Verbindungen für einen einzelnen Tag im konfigurierten Monat"""
-        date_description = self.config.get_formatted_date_description()
+    def check_target_day_connections(self, target_day: int, start_hour: int = 8,
+                                     watch: Optional[Watch] = None) -> List[Journey]:
+        """Prüfe Verbindungen für einen einzelnen Tag im Zielmonat"""
+        watch = watch or self.config_watch
+        day_watch = replace(watch, days=[target_day])
+        date_description = day_watch.get_formatted_days_description()
         self.logger.info(f"Starte Verbindungssuche für {date_description}")
         
         try:
-            # Hole Jahr und Monat aus Konfiguration
-            year, month = self.config.get_target_year_month()
-            
-            # Erstelle Zieldatum aus Konfiguration
-            target_date = datetime(year, month, target_day, start_hour, 0)
+            # Erstelle Zieldatum aus Überwachung
+            target_date = datetime(watch.year, watch.month, target_day, start_hour, 0)
             
             # Prüfe Verbindungen für diesen Tag
-            journeys = self.check_single_date(target_date)
+            journeys, complete = self._check_date(target_date, watch)
             
             if journeys:
                 date_str = target_date.strftime("%Y-%m-%d")
                 self.logger.info(f"📅 {len(journeys)} Verbindungen gefunden für {date_str}")
-                
-                # Prüfe ob das ERSTMALIG gefundene Verbindungen sind
-                if not self.previous_connections_found:
-                    # ERSTE MAL - Spezielle "NEUE VERBINDUNGEN VERFÜGBAR" Nachricht
-                    self.telegram.notify_connections_now_available(
-                        journeys,
-                        date_str,
-                        self.config.departure_station,
-                        self.config.destination_station,
-                        date_description
-                    )
-                    self.previous_connections_found = True
-                    self.logger.info("🎉 ERSTMALIG Verbindungen gefunden - Spezielle Benachrichtigung gesendet")
-                else:
-                    # Wiederholter Fund - normale Nachricht
-                    self.telegram.notify_single_day_connections(
-                        journeys,
-                        date_str,
-                        self.config.departure_station,
-                        self.config.destination_station,
-                        date_description
-                    )
+                self._notify_watch(day_watch, {date_str: journeys}, set() if complete else {date_str})
             else:
                 self.logger.info(f"Keine Verbindungen für {date_description}")
             
@@ -126,30 +364,190 @@ class ConnectionMonitor:
             self.session_stats["errors"].append(error_msg)
             return []
     
-    def run_daily_check(self) -> bool:
-        """Führe tägliche Überprüfung durch (7x täglich)"""
+    def check_target_days_connections(self, target_days: List[int], start_hour: int = 8,
+                                      watch: Optional[Watch] = None) -> Dict[str, List[Journey]]:
+        """Prüfe Verbindungen für mehrere Tage im Zielmonat (parallel, eine Benachrichtigung)"""
+        watch = watch or self.config_watch
+        
+        # Einzelner Tag: bisheriges Verhalten und Nachrichtenformat
+        if len(target_days) == 1:
+            journeys = self.check_target_day_connections(target_days[0], start_hour, watch)
+            if not journeys:
+                return {}
+            return {datetime(watch.year, watch.month, target_days[0]).strftime("%Y-%m-%d"): journeys}
+        
+        days_watch = replace(watch, days=list(target_days), start_hour=start_hour)
+        results = self.check_watches([days_watch])
+        return results.get(days_watch.id, {})
+    
+    def _build_queries(self, watch: Watch) -> List[Tuple[str, str, datetime, datetime, int]]:
+        """Erzeuge Abfragen (from, to, Fensterstart, Fensterende, Seitengröße) für alle gültigen Tage einer Überwachung"""
+        from_station_id, to_station_id = self.get_route_ids(watch)
+        
+        queries = []
+        for day in watch.days:
+            try:
+                target_date = datetime(watch.year, watch.month, day, watch.start_hour, 0)
+            except ValueError as e:
+                # Tag existiert nicht (z.B. 31. April)
+                error_msg = f"Ungültiger Tag ({watch.display_name}): {day}.{watch.month:02d}.{watch.year} - {str(e)}"
+                self.logger.error(error_msg)
+                self.session_stats["errors"].append(error_msg)
+                continue
+            queries.append((from_station_id, to_station_id, target_date,
+                            self._window_end(target_date, watch), watch.max_results))
+        return queries
+    
+    def owned_watches(self, watches: Optional[List[Watch]] = None) -> List[Watch]:
+        """Überwachungen, die dieser Container prüft (alle ohne Sharding)"""
+        watches = list(watches if watches is not None else self.registry)
+        return self.shards.filter(watches) if self.shards is not None else watches
+    
+    def on_shards_changed(self, gained: Set[int], lost: Set[int]):
+        """Geladenen Stand der Überwachungen gewonnener und abgegebener Shards verwerfen
+        
+        Abgegebene prüft ein anderer Container; bei (wieder) gewonnenen kann dieser den Stand
+        in SQLite inzwischen geändert haben - er wird beim nächsten Vergleich neu gelesen
+        """
+        changed = gained | lost
+        self.journey_store.evict(watch.id for watch in self.registry
+                                 if shard_of(watch.id, self.shards.shard_count) in changed)
+    
+    def check_watches(self, watches: Optional[List[Watch]] = None) -> Dict[str, Dict[str, List[Journey]]]:
+        """Prüfe alle Überwachungen: alle Abfragen parallel, danach eine Nachricht pro Überwachung"""
+        results_by_watch = {}
+        for watch, connections_by_date, incomplete_dates in self.collect_watches(watches):
+            try:
+                if connections_by_date:
+                    self._notify_watch(watch, connections_by_date, incomplete_dates)
+                else:
+                    self.logger.info(f"Keine Verbindungen für {watch.get_formatted_days_description()} ({watch.route_label})")
+            except Exception as e:
+                error_msg = f"Fehler bei Benachrichtigung für {watch.display_name}: {str(e)}"
+                self.logger.error(error_msg)
+                self.session_stats["errors"].append(error_msg)
+            
+            results_by_watch[watch.id] = connections_by_date
+        
+        return results_by_watch
+    
+    def collect_watches(self, watches: Optional[List[Watch]] = None
+                        ) -> List[Tuple[Watch, Dict[str, List[Journey]], Set[str]]]:
+        """Suche für alle Überwachungen ohne Benachrichtigung - je Überwachung (Watch,
+        Verbindungen je Tag, Tage mit unvollständiger Suche)"""
+        watches = self.owned_watches(watches)
+        
+        # Abfragen aller Überwachungen sammeln
+        planned: List[Tuple[Watch, List[Tuple[str, str, datetime, datetime, int]]]] = []
+        for watch in watches:
+            try:
+                planned.append((watch, self._build_queries(watch)))
+            except Exception as e:
+                error_msg = f"Fehler bei Überwachung {watch.display_name}: {str(e)}"
+                self.logger.error(error_msg)
+                self.session_stats["errors"].append(error_msg)
+        
+        all_queries = [query for _, queries in planned for query in queries]
+        self.logger.info(f"Starte Verbindungssuche: {len(planned)} Überwachungen, {len(all_queries)} Abfragen")
+        
+        # Alle Abfragen gemeinsam über den Worker-Pool (gemeinsames Rate Limit)
+        # Tage laufen parallel, die Seiten eines Tages nacheinander
+        all_sweeps = asyncio.run(
+            self.async_client.sweep_batch(all_queries, max_pages=self.sweep_max_pages)
+        ) if all_queries else []
+        all_results = [sweep.journeys for sweep in all_sweeps]
+        
+        self.session_stats["total_api_calls"] += sum(sweep.pages for sweep in all_sweeps)
+        self.session_stats["dates_checked"] += len(all_queries)
+        
+        collected = []
+        position = 0
+        for watch, queries in planned:
+            watch_results = all_results[position:position + len(queries)]
+            watch_sweeps = all_sweeps[position:position + len(queries)]
+            position += len(queries)
+            self.session_stats["watches_checked"] += 1
+            
+            connections_by_date = {}
+            incomplete_dates = set()
+            for query, journeys, sweep in zip(queries, watch_results, watch_sweeps):
+                date_str = query[2].strftime("%Y-%m-%d")
+                if not sweep.complete:
+                    incomplete_dates.add(date_str)
+                self._record_history(watch, date_str, sweep)
+                journeys = self._filter_journeys(watch, date_str, journeys)
+                self.session_stats["connections_found"] += len(journeys)
+                if journeys:
+                    connections_by_date[date_str] = journeys
+                    self.logger.info(f"📅 {len(journeys)} Verbindungen gefunden für {date_str} ({watch.display_name})")
+                else:
+                    self.logger.debug(f"Keine Verbindungen für {date_str} ({watch.display_name})")
+            
+            collected.append((watch, connections_by_date, incomplete_dates))
+        
+        return collected
+    
+    def run_daily_check(self, watches: Optional[List[Watch]] = None) -> bool:
+        """Führe tägliche Überprüfung durch (7x täglich, oder nur fällige Überwachungen beim adaptiven Polling)"""
+        started = time.perf_counter()
+        self.check_started_at = time.time()
+        errors_before = len(self.session_stats["errors"])
+        try:
+            success = self._run_daily_check(watches)
+        finally:
+            started_at, self.check_started_at = self.check_started_at, None
+        
+        errors = len(self.session_stats["errors"]) - errors_before
+        self.error_streak = 0 if success and not errors else self.error_streak + 1
+        if success:
+            self.last_success_at = time.time()
+        self.last_check = {
+            "started_at": started_at,
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "success": success,
+            "errors": errors,
+        }
+        
+        self.metrics.observe("check_seconds", time.perf_counter() - started)
+        self.metrics.inc("checks_total", result="success" if success else "failure")
+        self.metrics.set_gauge("last_check_timestamp_seconds", time.time())
+        self.metrics.flush()
+        return success
+    
+    def _run_daily_check(self, watches: Optional[List[Watch]] = None) -> bool:
         self.logger.info("🔍 Starte täglichen Check für zukünftige Verbindungen")
         
+        # Nur Fehler dieses Checks melden (Daemon behält die Session über viele Checks)
+        errors_before = len(self.session_stats["errors"])
+        
         try:
             # Teste Telegram-Verbindung (nur bei Fehlern loggen)
-            if not self.telegram.test_connection():
-                self.logger.error("Telegram-Verbindung fehlgeschlagen")
-                return False
+            if not self.telegram_verified:
+                if not self.telegram.test_connection():
+                    self.logger.error("Telegram-Verbindung fehlgeschlagen")
+                    return False
+                self.telegram_verified = True
             
-            # Prüfe konfigurierten Zieltag
-            connections = self.check_target_day_connections(self.config.target_day)
+            # Prüfe alle Überwachungen
+            results_by_watch = self.check_watches(watches)
+            total_connections = sum(
+                len(journeys)
+                for connections_by_date in results_by_watch.values()
+                for journeys in connections_by_date.values()
+            )
             
-            if len(connections) > 0:
-                self.logger.info(f"🎉 {len(connections)} Verbindungen gefunden für zukünftiges Datum!")
+            if total_connections > 0:
+                self.logger.info(f"🎉 {total_connections} Verbindungen gefunden für zukünftiges Datum!")
                 # Nur bei gefundenen Verbindungen wird eine Telegram-Nachricht gesendet
             else:
-                self.logger.info(f"Keine Verbindungen für {self.config.get_formatted_date_description()} - keine Telegram-Nachricht")
+                self.logger.info(f"Keine Verbindungen in {len(results_by_watch)} Überwachung(en) - keine Telegram-Nachricht")
                 # KEINE Telegram-Nachricht bei fehlenden Verbindungen (außer bei Fehlern)
             
             # Fehler-Report falls Fehler aufgetreten
-            if self.session_stats["errors"]:
-                error_summary = f"{len(self.session_stats['errors'])} Fehler aufgetreten"
-                first_error = self.session_stats["errors"][0] if self.session_stats["errors"] else ""
+            check_errors = self.session_stats["errors"][errors_before:]
+            if check_errors:
+                error_summary = f"{len(check_errors)} Fehler aufgetreten"
+                first_error = check_errors[0]
                 self.telegram.notify_error(error_summary, first_error)
             
             return True
@@ -166,23 +564,30 @@ class ConnectionMonitor:
         return {
             "runtime_seconds": int(runtime.total_seconds()),
             "runtime_formatted": str(runtime).split('.')[0],  # HH:MM:SS
+            "rate_limit": self.db_client.rate_limiter.get_stats(),
+            "endpoints": self.db_client.endpoints.get_stats(),
+            "cache": self.db_client.cache.get_stats() if self.db_client.cache else None,
+            "telegram": self.telegram.outbox.get_stats() if getattr(self.telegram, "outbox", None) else None,
+            "filters": self.get_filter_stats(),
             **self.session_stats
         }
     
     def run_test_mode(self) -> bool:
-        """Führe Test-Modus durch (verwendet konfigurierten Zieltag)"""
+        """Führe Test-Modus durch (verwendet konfigurierte Überwachungen)"""
         self.logger.info("🧪 Starte Test-Modus")
         
         try:
-            # Teste konfigurierten Zieltag
-            test_connections = self.check_target_day_connections(
-                self.config.target_day,
-                start_hour=10
+            # Teste alle Überwachungen (Abfahrt ab 10 Uhr) - nur suchen und loggen, keine Nachrichten
+            test_watches = [replace(watch, start_hour=10) for watch in self.registry]
+            total_connections = sum(
+                len(journeys)
+                for _, connections_by_date, _ in self.collect_watches(test_watches)
+                for journeys in connections_by_date.values()
             )
             
             # Test-Zusammenfassung
             summary = self.get_session_summary()
-            self.logger.info(f"Test abgeschlossen: {len(test_connections)} Verbindungen gefunden, {summary['total_api_calls']} API calls")
+            self.logger.info(f"Test abgeschlossen: {total_connections} Verbindungen gefunden, {summary['total_api_calls']} API calls")
             
             return True
             
@@ -5,11 +5,27 @@ Verwendet die Community API v6.db.transport.rest für Fahrplanabfragen
 Produktionsversion - optimiert für Hamburg → Landeck-Zams Überwachung
 """
 
+import json
+import time
+import zlib
 import requests
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Iterator, TYPE_CHECKING
+from dataclasses import dataclass, field
+
+from http_transport import HttpTransport
+from endpoint_pool import ApiEndpoint, EndpointPool, EndpointsUnavailable
+from rate_limiter import TokenBucketRateLimiter, RateLimitTimeout
+from journey_cache import JourneyCache
+from json_stream import iter_array_items
+from query_profiles import DEFAULT_QUERY_PROFILE, QueryProfile, get_query_profile
+from metrics import Metrics
+
+if TYPE_CHECKING:
+    from station_index import StationIndex
 
 @dataclass
 class Station:
@@ -19,51 +35,383 @@ class Station:
     latitude: Optional[float] = None
     longitude: Optional[float] = None
 
-@dataclass  
+def leg_line_name(leg: Dict[str, Any]) -> str:
+    """Liniennamen eines Legs (Fußwege ohne Linie)"""
+    line = leg.get("line") or {}
+    return line.get("name") or ("Fußweg" if leg.get("walking") else "")
+
+def leg_trip_id(leg: Dict[str, Any]) -> str:
+    """Trip-ID eines Legs, ersatzweise Linie + geplante Abfahrt"""
+    return leg.get("tripId") or f"{leg_line_name(leg)}@{leg.get('plannedDeparture') or leg.get('departure')}"
+
 class Journey:
-    """Repräsentiert eine Zugverbindung"""
-    departure_time: datetime
-    arrival_time: datetime
-    duration_minutes: int
-    transfers: int
-    legs: List[Dict[str, Any]]
-    raw_data: Dict[str, Any]
+    """Repräsentiert eine Zugverbindung (kompakt: Skalare + Trip-IDs, Legs werden erst bei Zugriff entpackt)"""
+    
+    __slots__ = (
+        "departure_time", "arrival_time", "duration_minutes", "transfers",
+        "trip_ids", "line_names", "price", "_legs_blob", "raw_data",
+    )
+    
+    def __init__(self,
+                 departure_time: datetime,
+                 arrival_time: datetime,
+                 duration_minutes: int,
+                 transfers: int,
+                 legs: Optional[List[Dict[str, Any]]] = None,
+                 raw_data: Optional[Dict[str, Any]] = None,
+                 trip_ids: Optional[Tuple[str, ...]] = None,
+                 line_names: Optional[Tuple[str, ...]] = None,
+                 price: Optional[float] = None):
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.duration_minutes = duration_minutes
+        self.transfers = transfers
+        
+        legs = legs or []
+        rides = [leg for leg in legs if not leg.get("walking")]
+        self.trip_ids = trip_ids if trip_ids is not None else tuple(leg_trip_id(leg) for leg in rides)
+        self.line_names = line_names if line_names is not None else tuple(leg_line_name(leg) for leg in rides)
+        # Preis in Euro (nur wenn die API einen liefert)
+        self.price = price
+        
+        # Vollständige API-Daten nur auf Wunsch (DBClient keep_raw_data) - enthalten die Legs bereits
+        self.raw_data = raw_data
+        
+        # Sonst Legs als komprimiertes JSON statt verschachtelter Dicts
+        if legs and raw_data is None:
+            self._legs_blob = zlib.compress(json.dumps(legs, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        else:
+            self._legs_blob = b""
+    
+    @property
+    def legs(self) -> List[Dict[str, Any]]:
+        """Legs bei Bedarf dekodieren"""
+        if self.raw_data is not None:
+            return self.raw_data.get("legs", [])
+        return json.loads(zlib.decompress(self._legs_blob)) if self._legs_blob else []
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Journey):
+            return NotImplemented
+        return (self.departure_time, self.arrival_time, self.trip_ids) == \
+               (other.departure_time, other.arrival_time, other.trip_ids)
+    
+    def __hash__(self) -> int:
+        return hash((self.departure_time, self.arrival_time, self.trip_ids))
+    
+    def __repr__(self) -> str:
+        return (f"Journey(departure_time={self.departure_time!r}, arrival_time={self.arrival_time!r}, "
+                f"duration_minutes={self.duration_minutes}, transfers={self.transfers}, "
+                f"line_names={self.line_names!r})")
+
+@dataclass
+class JourneySweep:
+    """Ergebnis einer Zeitfenster-Suche über mehrere Seiten"""
+    journeys: List[Journey] = field(default_factory=list)
+    pages: int = 0           # API-Abfragen (Seiten)
+    complete: bool = False   # Fenster bis zum Ende abgedeckt
+    failed: bool = False     # Eine Seite konnte nicht (vollständig) abgerufen werden
+
+# Chunk-Größe beim Streaming großer Antworten
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Threads für Hedged Requests (je Anfrage bis zu zwei gleichzeitig)
+HEDGE_MAX_WORKERS = 32
+
+# Raster für Abfahrtszeiten beim Zusammenführen gleicher /journeys Anfragen (abgerundet)
+COALESCE_SLOT_SECONDS = 60
+
+class _Flight:
+    """Laufende /journeys Abfrage - weitere Aufrufer mit gleichen Parametern warten auf ihr Ergebnis"""
+    __slots__ = ("done", "journeys", "metadata", "error", "finished_at")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.journeys: List["Journey"] = []
+        self.metadata: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+        self.finished_at: Optional[float] = None
+
+def _close_response(future: Future):
+    """Antwort einer unterlegenen Hedged-Anfrage verwerfen (Verbindung zurück in den Pool)"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
 
 class DBClient:
     """Client für Deutsche Bahn Community API"""
     
-    def __init__(self, timeout: int = 30):
-        self.base_url = "https://v6.db.transport.rest"
+    def __init__(self,
+                 timeout: int = 30,
+                 transport: Optional[HttpTransport] = None,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 rate_limit_max_wait: float = 60,
+                 cache: Optional[JourneyCache] = None,
+                 station_index: Optional["StationIndex"] = None,
+                 keep_raw_data: bool = False,
+                 stream_responses: bool = True,
+                 metrics: Optional[Metrics] = None,
+                 endpoints: Optional[EndpointPool] = None,
+                 hedge_requests: bool = False,
+                 coalesce_requests: bool = False,
+                 coalesce_window_seconds: float = 1.0,
+                 query_profile: str = DEFAULT_QUERY_PROFILE):
         self.timeout = timeout
         self.logger = logging.getLogger(__name__)
         
+        # Basis-URLs mit Circuit Breaker und Latenz-Auswahl (Standard: nur v6.db.transport.rest)
+        self.endpoints = endpoints if endpoints is not None else EndpointPool()
+        
+        # Zweite Anfrage an den nächsten Endpunkt, wenn die erste länger als ihre p95-Latenz braucht
+        self.hedge_requests = hedge_requests
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_executor_lock = threading.Lock()
+        
+        # Single-Flight: gleiche /journeys Abfragen (mehrere Überwachungen/Chats) teilen sich einen Request
+        # und dessen Ergebnis noch coalesce_window_seconds nach Abschluss - liest Seiten vollständig
+        # (kein Streaming-Abbruch am Fensterende), daher nur bei vielen gleichen Routen sinnvoll
+        self.coalesce_requests = coalesce_requests
+        self.coalesce_window_seconds = coalesce_window_seconds
+        self._flights: Dict[Tuple[Tuple[str, Any], ...], _Flight] = {}
+        self._flights_lock = threading.Lock()
+        
+        # Gemeinsamer Transport mit Keep-Alive Pool (eigener falls keiner übergeben)
+        if transport is None:
+            transport = HttpTransport(default_timeout=timeout)
+            for api in self.endpoints.endpoints:
+                transport.register_host(api.base_url, timeout=timeout)
+        self.transport = transport
+        
         # Rate Limiting (100 requests/minute - Produktion: 25% Sicherheitsmarge)
-        self.rate_limit_requests = 75  # 25% unter Maximum
-        self.rate_limit_window = 60
-        self.request_times = []
+        # Token-Bucket in SQLite - geteilt mit allen anderen Prozessen auf dem Host
+        if rate_limiter is None:
+            rate_limiter = TokenBucketRateLimiter(requests_per_window=75, window_seconds=60)
+        self.rate_limiter = rate_limiter
+        self.rate_limit_max_wait = rate_limit_max_wait
+        
+        # Persistenter Response-Cache (optional)
+        self.cache = cache
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        
+        # Lokaler Stationsindex (Name → ID ohne API-Aufruf)
+        self.station_index = station_index
+        
+        # Vollständige API-Antwort pro Journey behalten (nur zum Debuggen, kostet Speicher)
+        self.keep_raw_data = keep_raw_data
+        
+        # Umfang der /journeys Antworten und befüllte Journey-Felder (probe, standard, full)
+        self.query_profile = get_query_profile(query_profile)
+        
+        # /journeys Antworten inkrementell dekodieren statt response.json() auf den ganzen Body
+        self.stream_responses = stream_responses
+        
+        # Latenz, Status und Bytes je Endpunkt (ohne Persistenz falls keine Metriken übergeben)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.last_request_seconds: Optional[float] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Basis-URL des ersten konfigurierten Endpunkts"""
+        return self.endpoints.primary.base_url
     
-    def _check_rate_limit(self) -> bool:
-        """Prüfe Rate Limit vor Request"""
-        now = datetime.now()
-        # Entferne alte Requests (älter als 1 Minute)
-        self.request_times = [t for t in self.request_times if (now - t).seconds < self.rate_limit_window]
+    @base_url.setter
+    def base_url(self, value: str):
+        # Nur noch dieser Endpunkt (z.B. lokaler Stand-in in den Benchmarks)
+        self.endpoints = EndpointPool([value], self.endpoints.failure_threshold, self.endpoints.open_seconds)
+    
+    def _send(self, endpoint: str, params: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """GET über den geeignetsten Endpunkt - Failover auf den nächsten bei Timeout, Verbindungsfehler oder 5xx
         
-        if len(self.request_times) >= self.rate_limit_requests:
-            self.logger.warning("Rate Limit erreicht - warte...")
-            return False
+        Sind alle Endpunkte gesperrt (Circuit Breaker offen), wird sofort EndpointsUnavailable
+        ausgelöst statt auf den Timeout zu warten. Liefert sonst die letzte Antwort (ggf. 5xx)
+        oder löst den letzten Verbindungsfehler aus
+        """
+        candidates = self.endpoints.select()
+        if not candidates:
+            self.metrics.inc("api_circuit_rejections_total")
+            raise EndpointsUnavailable("Alle API-Endpunkte gesperrt (Circuit Breaker offen)")
         
-        self.request_times.append(now)
-        return True
+        response = None
+        last_error = None
+        while candidates:
+            api = candidates.pop(0)
+            try:
+                if self.hedge_requests and candidates and api.p95() is not None:
+                    response, hedged = self._send_hedged(api, candidates[0], endpoint, params, stream)
+                    if hedged:
+                        candidates.pop(0)
+                else:
+                    response = self._send_once(api, endpoint, params, stream)
+            except requests.exceptions.RequestException as e:
+                response, last_error = None, e
+            
+            if response is not None and response.status_code < 500:
+                return response
+            
+            if candidates:
+                self.metrics.inc("api_failovers_total")
+                self.logger.warning(f"API-Endpunkt {api.base_url} fehlgeschlagen "
+                                    f"({response.status_code if response is not None else last_error}) - "
+                                    f"versuche {candidates[0].base_url}")
+                if response is not None:
+                    response.close()
+        
+        if response is not None:
+            return response
+        raise last_error
+    
+    def _send_once(self, api: ApiEndpoint, endpoint: str, params: Dict[str, Any],
+                   stream: bool = False) -> requests.Response:
+        """Einzelner Request an einen Endpunkt - Ergebnis fließt in dessen Health-Status ein"""
+        url = f"{api.base_url}{endpoint}"
+        self.logger.debug(f"API Request{' (Stream)' if stream else ''}: {url} mit params: {params}")
+        started = time.perf_counter()
+        try:
+            response = self.transport.get(url, params=params, timeout=self.timeout, stream=stream)
+        except requests.exceptions.RequestException:
+            self.endpoints.record_failure(api)
+            raise
+        
+        if response.status_code >= 500:
+            self.endpoints.record_failure(api)
+        else:
+            self.endpoints.record_success(api, time.perf_counter() - started)
+        return response
+    
+    def _send_hedged(self, primary: ApiEndpoint, secondary: ApiEndpoint, endpoint: str,
+                     params: Dict[str, Any], stream: bool = False) -> Tuple[requests.Response, bool]:
+        """Request an primary; nach dessen p95-Latenz zusätzlich an secondary - die erste brauchbare Antwort gewinnt
+        
+        Die zweite Anfrage geht an eine andere Instanz und belastet daher nicht deren Rate-Budget.
+        Liefert (Antwort, ob gehedged wurde)
+        """
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS,
+                                                          thread_name_prefix="api-hedge")
+            executor = self._hedge_executor
+        
+        pending = {executor.submit(self._send_once, primary, endpoint, params, stream)}
+        done, _ = wait(pending, timeout=primary.p95())
+        hedged = not done
+        if hedged:
+            self.metrics.inc("api_hedged_requests_total")
+            self.logger.debug(f"{primary.base_url} langsamer als p95 ({primary.p95():.2f}s) - "
+                              f"zusätzliche Anfrage an {secondary.base_url}")
+            pending.add(executor.submit(self._send_once, secondary, endpoint, params, stream))
+        
+        fallback = None
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = None
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+                    continue
+                if winner is None and response.status_code < 500:
+                    winner = response
+                elif fallback is None:
+                    fallback = response
+                else:
+                    response.close()
+            
+            if winner is not None:
+                for future in pending:
+                    future.add_done_callback(_close_response)
+                if fallback is not None:
+                    fallback.close()
+                return winner, hedged
+        
+        if fallback is not None:
+            return fallback, hedged
+        raise error
+    
+    @staticmethod
+    def _wire_bytes(response: Optional[requests.Response], decoded_bytes: int) -> int:
+        """Über die Leitung empfangene Bytes (vor gzip-Dekodierung) - sonst die dekodierten"""
+        try:
+            return int(response.raw.tell()) or decoded_bytes
+        except (AttributeError, TypeError, ValueError):
+            return decoded_bytes
+    
+    def _record_request(self, endpoint: str, status: str, started: float, received_bytes: int = 0):
+        """Verbuche Dauer, Status und empfangene Bytes eines API Requests"""
+        self.last_request_seconds = time.perf_counter() - started
+        self.metrics.observe("api_request_seconds", self.last_request_seconds, endpoint=endpoint)
+        self.metrics.inc("api_requests_total", endpoint=endpoint, status=status)
+        if received_bytes:
+            self.metrics.inc("api_response_bytes_total", received_bytes, endpoint=endpoint)
     
     def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Führe API Request durch mit Rate Limiting"""
-        if not self._check_rate_limit():
+        """Führe API Request durch - mit Cache (TTL, Stale-While-Revalidate, Stale-If-Error)"""
+        if self.cache is None or not self.cache.is_cacheable(endpoint):
+            return self._fetch(endpoint, params)
+        
+        entry = self.cache.lookup(endpoint, params)
+        if entry is not None:
+            if entry.is_fresh:
+                self.cache.record("hits")
+                self.logger.debug(f"Cache Hit: {endpoint} (Alter {entry.age_seconds:.0f}s)")
+                return entry.data
+            
+            if self.cache.can_revalidate_in_background(entry):
+                self.cache.record("stale_hits")
+                self.logger.debug(f"Cache Stale Hit: {endpoint} - erneuere im Hintergrund")
+                self._revalidate_in_background(endpoint, params)
+                return entry.data
+            
+            self.cache.record("misses")
+        
+        data = self._fetch(endpoint, params)
+        if data is not None:
+            self.cache.store(endpoint, params, data)
+            return data
+        
+        # API nicht erreichbar - veraltete Daten sind besser als keine
+        if entry is not None and self.cache.can_serve_on_error(entry):
+            self.cache.record("stale_on_error")
+            self.logger.warning(f"API nicht verfügbar - verwende Cache-Daten ({entry.age_seconds / 60:.0f} Minuten alt)")
+            return entry.data
+        
+        return None
+    
+    def _revalidate_in_background(self, endpoint: str, params: Dict[str, Any]):
+        """Erneuere Cache-Eintrag in einem Hintergrund-Thread (max. einer pro Schlüssel)"""
+        key = self.cache.make_key(endpoint, params)
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        
+        def revalidate():
+            try:
+                data = self._fetch(endpoint, params)
+                if data is not None:
+                    self.cache.store(endpoint, params, data)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+        
+        threading.Thread(target=revalidate, name="cache-revalidate", daemon=True).start()
+    
+    def _fetch(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Führe API Request durch mit Rate Limiting (wartet auf freies Token)"""
+        try:
+            self.rate_limiter.acquire(max_wait=self.rate_limit_max_wait)
+        except RateLimitTimeout as e:
+            self.logger.error(f"Rate Limit: {str(e)} - Request {endpoint} übersprungen")
             return None
         
-        url = f"{self.base_url}{endpoint}"
+        started = time.perf_counter()
+        status = "error"
+        received_bytes = 0
         try:
-            self.logger.debug(f"API Request: {url} mit params: {params}")
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self._send(endpoint, params)
+            status = str(response.status_code)
+            received_bytes = self._wire_bytes(response, len(response.content))
             
             if response.status_code == 200:
                 return response.json()
@@ -74,15 +422,142 @@ class DBClient:
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Request Exception: {str(e)}")
             return None
+        
+        finally:
+            self._record_request(endpoint, status, started, received_bytes)
+    
+    def _stream_items(self, endpoint: str, params: Dict[str, Any], array_key: str,
+                      metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Liefere die Elemente von response[array_key] einzeln - Cache-Verhalten wie _make_request
+        
+        Konnte die Antwort nicht (vollständig) abgerufen werden, wird metadata["error"] gesetzt
+        """
+        if not self.stream_responses:
+            data = self._make_request(endpoint, params)
+            if data is None:
+                metadata["error"] = True
+            yield from self._items_from_data(data, array_key, metadata)
+            return
+        
+        entry = None
+        if self.cache is not None and self.cache.is_cacheable(endpoint):
+            entry = self.cache.lookup(endpoint, params)
+            if entry is not None:
+                if entry.is_fresh:
+                    self.cache.record("hits")
+                    self.logger.debug(f"Cache Hit: {endpoint} (Alter {entry.age_seconds:.0f}s)")
+                    yield from self._items_from_data(entry.data, array_key, metadata)
+                    return
+                
+                if self.cache.can_revalidate_in_background(entry):
+                    self.cache.record("stale_hits")
+                    self.logger.debug(f"Cache Stale Hit: {endpoint} - erneuere im Hintergrund")
+                    self._revalidate_in_background(endpoint, params)
+                    yield from self._items_from_data(entry.data, array_key, metadata)
+                    return
+                
+                self.cache.record("misses")
+        
+        completed = yield from self._fetch_stream(endpoint, params, array_key, metadata)
+        
+        # Nichts empfangen - veraltete Daten sind besser als keine
+        if completed is None and entry is not None and self.cache.can_serve_on_error(entry):
+            self.cache.record("stale_on_error")
+            self.logger.warning(f"API nicht verfügbar - verwende Cache-Daten ({entry.age_seconds / 60:.0f} Minuten alt)")
+            yield from self._items_from_data(entry.data, array_key, metadata)
+        elif not completed:
+            metadata["error"] = True
+    
+    @staticmethod
+    def _items_from_data(data: Any, array_key: str, metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Elemente aus bereits dekodierter Antwort (Cache, Nicht-Streaming)"""
+        if not isinstance(data, dict):
+            return
+        metadata.update({key: value for key, value in data.items() if key != array_key})
+        yield from data.get(array_key) or []
+    
+    def _fetch_stream(self, endpoint: str, params: Dict[str, Any], array_key: str,
+                      metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Streaming-Request mit Rate Limiting - Rückgabe True (vollständig), False (abgebrochen) oder None (keine Daten)"""
+        try:
+            self.rate_limiter.acquire(max_wait=self.rate_limit_max_wait)
+        except RateLimitTimeout as e:
+            self.logger.error(f"Rate Limit: {str(e)} - Request {endpoint} übersprungen")
+            return None
+        
+        cacheable = self.cache is not None and self.cache.is_cacheable(endpoint)
+        compressor = zlib.compressobj() if cacheable else None
+        compressed: List[bytes] = []
+        received = 0
+        received_bytes = 0
+        started = time.perf_counter()
+        status = "error"
+        response = None
+        
+        try:
+            with self._send(endpoint, params, stream=True) as response:
+                status = str(response.status_code)
+                if response.status_code != 200:
+                    self.logger.error(f"API Error {response.status_code}: {response.text}")
+                    return None
+                
+                def chunks() -> Iterator[bytes]:
+                    # Body für den Cache komprimiert mitschreiben - nur komprimiert im Speicher
+                    nonlocal received_bytes
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        received_bytes += len(chunk)
+                        if compressor is not None:
+                            compressed.append(compressor.compress(chunk))
+                        yield chunk
+                
+                for item in iter_array_items(chunks(), array_key, metadata):
+                    received += 1
+                    yield item
+        
+        except (requests.exceptions.RequestException, ValueError) as e:
+            status = "error"
+            self.logger.error(f"Stream-Fehler nach {received} Elementen: {str(e)}")
+            return False if received else None
+        
+        finally:
+            # Auch bei vorzeitigem Abbruch durch den Aufrufer (Sweep hinter dem Zeitfenster)
+            self._record_request(endpoint, status, started, self._wire_bytes(response, received_bytes))
+        
+        if compressor is not None:
+            compressed.append(compressor.flush())
+            self.cache.store_payload(endpoint, params, b"".join(compressed))
+        return True
     
     def find_station(self, station_name: str) -> Optional[Station]:
-        """Finde Station anhand des Namens"""
+        """Finde Station anhand des Namens (exakter Treffer im lokalen Index, dann per API)
+        
+        Präfix- und Ähnlichkeitssuche im Index nur als Offline-Rückfall wenn /locations fehlschlägt
+        """
+        if self.station_index is not None:
+            station = self.station_index.resolve(station_name, fuzzy=False)
+            if station:
+                self.logger.debug(f"Station aus Index: {station_name} → {station.id}")
+                return station
+        
         params = {"query": station_name, "results": 5}
         data = self._make_request("/locations", params)
         
+        if data is None and self.station_index is not None:
+            station = self.station_index.resolve(station_name)
+            if station:
+                self.logger.warning(f"/locations nicht erreichbar - ungefährer Index-Treffer: "
+                                    f"{station_name} → {station.name} ({station.id})")
+            return station
+        
         if not data or not isinstance(data, list):
             return None
         
+        # Index mit allen gefundenen Stationen füllen
+        if self.station_index is not None:
+            added = self.station_index.add_locations(data)
+            if added:
+                self.logger.debug(f"{added} neue Stationen in Index übernommen")
+        
         # Suche nach exakter Übereinstimmung oder bester Match
         for location in data:
             if location.get("type") == "station":
@@ -105,39 +580,183 @@ class DBClient:
                        from_station_id: str, 
                        to_station_id: str, 
                        departure_date: datetime,
-                       max_results: int = 10) -> List[Journey]:
-        """Suche Zugverbindungen zwischen zwei Stationen"""
+                       max_results: int = 10,
+                       profile: Optional[str] = None) -> List[Journey]:
+        """Suche Zugverbindungen zwischen zwei Stationen (profile: Abfrageprofil statt dem des Clients)"""
+        query_profile = get_query_profile(profile) if profile else self.query_profile
+        if query_profile.max_results:
+            max_results = min(max_results, query_profile.max_results)
+        return list(self.iter_journeys(from_station_id, to_station_id, departure_date, max_results,
+                                       profile=profile))
+    
+    def iter_journeys(self,
+                      from_station_id: str,
+                      to_station_id: str,
+                      departure_date: datetime,
+                      max_results: int = 10,
+                      metadata: Optional[Dict[str, Any]] = None,
+                      later_than: Optional[str] = None,
+                      profile: Optional[str] = None) -> Iterator[Journey]:
+        """Generator-Variante von search_journeys - liefert jede Verbindung sobald sie empfangen ist
         
-        # Format: 2025-03-15T10:00:00+01:00
-        departure_str = departure_date.isoformat()
+        metadata erhält die übrigen Felder der Antwort (earlierRef, laterRef, ...) und
+        error=True falls die Seite nicht abgerufen werden konnte, vollständig erst nachdem
+        der Generator erschöpft ist. Mit later_than (laterRef
+        einer vorherigen Antwort) wird die Folgeseite abgefragt statt ab departure_date
+        """
         
+        metadata = metadata if metadata is not None else {}
+        query_profile = get_query_profile(profile) if profile else self.query_profile
         params = {
             "from": from_station_id,
             "to": to_station_id,
-            "departure": departure_str,
-            "results": max_results
+            "results": max_results,
+            **query_profile.params
         }
+        if later_than:
+            params["laterThan"] = later_than
+        else:
+            # Format: 2025-03-15T10:00:00+01:00 (auf das Raster abgerundet, damit gleiche Abfragen zusammenfallen)
+            if self.coalesce_requests:
+                departure_date = self._departure_slot(departure_date)
+            params["departure"] = departure_date.isoformat()
         
-        data = self._make_request("/journeys", params)
+        if self.coalesce_requests:
+            yield from self._coalesced_journeys(params, metadata, query_profile)
+        else:
+            yield from self._iter_page(params, metadata, query_profile)
+    
+    @staticmethod
+    def _departure_slot(departure_date: datetime) -> datetime:
+        """Abfahrtszeit auf COALESCE_SLOT_SECONDS abrunden (liefert eine Obermenge der Verbindungen)"""
+        midnight = departure_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        offset = (departure_date - midnight).total_seconds()
+        return midnight + timedelta(seconds=offset - offset % COALESCE_SLOT_SECONDS)
+    
+    def _coalesced_journeys(self, params: Dict[str, Any], metadata: Dict[str, Any],
+                            profile: QueryProfile) -> List[Journey]:
+        """Single-Flight: der erste Aufrufer fragt die API, gleichzeitige mit gleichen Parametern warten
         
-        if not data or "journeys" not in data:
-            self.logger.warning("Keine Verbindungen gefunden")
-            return []
+        Das Ergebnis (geparste Verbindungen und Metadaten) wird an alle Wartenden verteilt und
+        coalesce_window_seconds lang auch für kurz danach eintreffende Aufrufer verwendet. Die Seite
+        wird dafür vollständig gelesen (kein vorzeitiger Abbruch des Streams)
+        """
+        key = tuple(sorted(params.items()))
+        with self._flights_lock:
+            now = time.monotonic()
+            expired = [k for k, f in self._flights.items()
+                       if f.finished_at is not None and now - f.finished_at > self.coalesce_window_seconds]
+            for k in expired:
+                del self._flights[k]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
         
-        journeys = []
-        for journey_data in data["journeys"]:
+        if leader:
             try:
-                journey = self._parse_journey(journey_data)
-                if journey:
-                    journeys.append(journey)
+                flight.journeys = list(self._iter_page(params, flight.metadata, profile))
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._flights_lock:
+                    flight.finished_at = time.monotonic()
+                    # Leere oder fehlgeschlagene Ergebnisse nicht an spätere Aufrufer weitergeben
+                    if (flight.error is not None or flight.metadata.get("error") or not flight.journeys
+                            or self.coalesce_window_seconds <= 0):
+                        self._flights.pop(key, None)
+                flight.done.set()
+        else:
+            self.metrics.inc("api_coalesced_requests_total")
+            self.logger.debug(f"Gleiche Abfrage läuft bereits - warte auf deren Ergebnis: {params}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+        
+        metadata.update(flight.metadata)
+        return list(flight.journeys)
+    
+    def _iter_page(self, params: Dict[str, Any], metadata: Dict[str, Any],
+                   profile: QueryProfile) -> Iterator[Journey]:
+        """Verbindungen einer /journeys Antwort parsen und einzeln liefern"""
+        found = 0
+        for journey_data in self._stream_items("/journeys", params, "journeys", metadata):
+            try:
+                journey = self._parse_journey(journey_data, profile)
             except Exception as e:
+                self.metrics.inc("journey_parse_failures_total")
                 self.logger.error(f"Fehler beim Parsen der Verbindung: {str(e)}")
                 continue
+            if journey:
+                found += 1
+                yield journey
         
-        return journeys
+        if not found:
+            self.logger.warning("Keine Verbindungen gefunden")
     
-    def _parse_journey(self, journey_data: Dict[str, Any]) -> Optional[Journey]:
-        """Parse Journey Daten aus API Response"""
+    def sweep_journeys(self,
+                       from_station_id: str,
+                       to_station_id: str,
+                       window_start: datetime,
+                       window_end: datetime,
+                       page_size: int = 20,
+                       max_pages: int = 10,
+                       profile: Optional[str] = None) -> "JourneySweep":
+        """Alle Verbindungen mit Abfahrt im Zeitfenster - Folgeseiten über laterRef
+        
+        Überlappende Seiten werden dedupliziert; die Suche endet sobald eine Abfahrt
+        hinter dem Fenster liegt (Rest der Antwort wird nicht mehr gelesen). Schlägt eine
+        Seite fehl, endet die Suche mit failed=True und gilt nicht als vollständig
+        """
+        sweep = JourneySweep()
+        seen = set()
+        later_ref = None
+        
+        while sweep.pages < max_pages:
+            metadata: Dict[str, Any] = {}
+            sweep.pages += 1
+            new_on_page = 0
+            
+            for journey in self.iter_journeys(from_station_id, to_station_id, window_start,
+                                              page_size, metadata, later_than=later_ref, profile=profile):
+                departure = journey.departure_time.replace(tzinfo=None)
+                if departure > window_end:
+                    sweep.complete = True
+                    break
+                if departure < window_start or journey in seen:
+                    continue
+                seen.add(journey)
+                sweep.journeys.append(journey)
+                new_on_page += 1
+            
+            if sweep.complete:
+                break
+            
+            if metadata.get("error"):
+                # Seite fehlgeschlagen - ohne laterRef ist das Fenster nicht abgedeckt
+                sweep.failed = True
+                break
+            
+            later_ref = metadata.get("laterRef")
+            if not later_ref or not new_on_page:
+                # Keine weiteren Seiten bzw. nichts Neues mehr - Fenster ist abgedeckt
+                sweep.complete = True
+                break
+        
+        if not sweep.complete:
+            self.logger.warning(f"Zeitfenster bis {window_end.strftime('%H:%M')} nach {sweep.pages} Seiten "
+                                f"nicht vollständig abgedeckt (letzte Abfahrt "
+                                f"{sweep.journeys[-1].departure_time.strftime('%H:%M') if sweep.journeys else '-'})")
+        
+        self.logger.debug(f"Sweep {window_start.strftime('%Y-%m-%d %H:%M')}–{window_end.strftime('%H:%M')}: "
+                          f"{len(sweep.journeys)} Verbindungen in {sweep.pages} Abfragen")
+        return sweep
+    
+    def _parse_journey(self, journey_data: Dict[str, Any],
+                       profile: Optional[QueryProfile] = None) -> Optional[Journey]:
+        """Parse Journey Daten aus API Response (nur die Felder des Abfrageprofils)"""
+        profile = profile or self.query_profile
         try:
             legs = journey_data.get("legs", [])
             if not legs:
@@ -166,16 +785,34 @@ class DBClient:
             # Anzahl Umstiege
             transfers = len(legs) - 1
             
+            # Preis (fehlt oft oder ist null)
+            price = (journey_data.get("price") or {}).get("amount") if profile.populates("price") else None
+            
+            if profile.populates("legs"):
+                return Journey(
+                    departure_time=departure_time,
+                    arrival_time=arrival_time,
+                    duration_minutes=duration_minutes,
+                    transfers=transfers,
+                    legs=legs,
+                    raw_data=journey_data if self.keep_raw_data else None,
+                    price=float(price) if price is not None else None
+                )
+            
+            # Ohne Legs: nur Fahrten kompakt übernehmen (kein JSON/zlib für die Legs)
+            rides = [leg for leg in legs if not leg.get("walking")]
             return Journey(
                 departure_time=departure_time,
                 arrival_time=arrival_time,
                 duration_minutes=duration_minutes,
                 transfers=transfers,
-                legs=legs,
-                raw_data=journey_data
+                trip_ids=tuple(leg_trip_id(leg) for leg in rides),
+                line_names=tuple(leg_line_name(leg) for leg in rides),
+                price=float(price) if price is not None else None
             )
             
         except Exception as e:
+            self.metrics.inc("journey_parse_failures_total")
             self.logger.error(f"Fehler beim Parsen der Journey: {str(e)}")
             return None
     
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Endpoint Pool
+Mehrere Basis-URLs der Community API (Spiegel, selbst gehostete hafas-rest Instanz)
+mit Health-Tracking je Endpunkt:
+- Circuit Breaker: nach wiederholten Fehlern wird ein Endpunkt gesperrt (sofortiger
+  Fehler statt Timeout), nach der Sperrzeit prüft eine einzelne Anfrage ob er wieder geht
+- Auswahl nach gemessener Latenz (gleitender Mittelwert)
+- p95-Latenz je Endpunkt als Schwelle für Hedged Requests
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import requests
+
+from http_transport import DB_API_BASE_URL
+
+# Gewicht neuer Messwerte im gleitenden Mittel
+LATENCY_EWMA_ALPHA = 0.3
+
+# Messwerte für die p95-Schätzung (Hedging erst ab MIN_HEDGE_SAMPLES)
+LATENCY_WINDOW = 50
+MIN_HEDGE_SAMPLES = 10
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class EndpointsUnavailable(requests.exceptions.ConnectionError):
+    """Alle Endpunkte gesperrt - Anfrage wird ohne Netzwerkzugriff abgelehnt"""
+
+
+class ApiEndpoint:
+    """Basis-URL mit Circuit-Breaker-Zustand und Latenz-Statistik"""
+
+    def __init__(self, base_url: str, priority: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.priority = priority
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def p95(self) -> Optional[float]:
+        """95%-Quantil der letzten Latenzen (None bei zu wenigen Messwerten)"""
+        if len(self.latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def __repr__(self) -> str:
+        latency = f"{self.latency_ewma:.2f}s" if self.latency_ewma is not None else "-"
+        return f"ApiEndpoint({self.base_url}, {self.state}, {latency})"
+
+
+class EndpointPool:
+    """Auswahl gesunder Endpunkte - schnellster zuerst, gesperrte werden übersprungen"""
+
+    def __init__(self,
+                 base_urls: Optional[List[str]] = None,
+                 failure_threshold: int = 3,
+                 open_seconds: float = 60):
+        urls = base_urls or [DB_API_BASE_URL]
+        self.endpoints = [ApiEndpoint(url, priority) for priority, url in enumerate(urls)]
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "failures": 0,
+            "circuit_opened": 0,
+            "rejected": 0,
+        }
+
+    @property
+    def primary(self) -> ApiEndpoint:
+        """Erster konfigurierter Endpunkt"""
+        return self.endpoints[0]
+
+    def select(self) -> List[ApiEndpoint]:
+        """Nutzbare Endpunkte in Reihenfolge der Eignung
+
+        Noch nicht gemessene Endpunkte kommen zuerst (jeder wird einmal gemessen), danach
+        nach gleitender Latenz. Nach Ablauf der Sperrzeit wird ein gesperrter Endpunkt
+        halb geöffnet und als erster für genau eine Probe-Anfrage ausgewählt (bleibt die
+        Rückmeldung aus, gibt es nach einer weiteren Sperrzeit die nächste Probe)
+        """
+        now = time.monotonic()
+        with self._lock:
+            usable = []
+            for endpoint in self.endpoints:
+                if endpoint.state != CLOSED and now - endpoint.opened_at >= self.open_seconds:
+                    endpoint.state = HALF_OPEN
+                    endpoint.opened_at = now
+                    usable.append(endpoint)
+                elif endpoint.state == CLOSED:
+                    usable.append(endpoint)
+            if not usable:
+                self.stats["rejected"] += 1
+            return sorted(usable, key=lambda e: (e.state == CLOSED,
+                                                 -1.0 if e.latency_ewma is None else e.latency_ewma,
+                                                 e.priority))
+
+    def record_success(self, endpoint: ApiEndpoint, latency: float):
+        """Erfolgreiche Antwort - schließt den Circuit Breaker"""
+        with self._lock:
+            if endpoint.state != CLOSED:
+                self.logger.info(f"API-Endpunkt {endpoint.base_url} wieder erreichbar")
+            endpoint.state = CLOSED
+            endpoint.consecutive_failures = 0
+            endpoint.latencies.append(latency)
+            if endpoint.latency_ewma is None:
+                endpoint.latency_ewma = latency
+            else:
+                endpoint.latency_ewma += LATENCY_EWMA_ALPHA * (latency - endpoint.latency_ewma)
+
+    def record_failure(self, endpoint: ApiEndpoint):
+        """Timeout, Verbindungsfehler oder 5xx - öffnet den Breaker nach failure_threshold Fehlern in Folge"""
+        with self._lock:
+            self.stats["failures"] += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.state == HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+                if endpoint.state != OPEN:
+                    self.stats["circuit_opened"] += 1
+                    self.logger.warning(f"API-Endpunkt {endpoint.base_url} gesperrt für {self.open_seconds:.0f}s "
+                                        f"({endpoint.consecutive_failures} Fehler in Folge)")
+                endpoint.state = OPEN
+                endpoint.opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Zustand aller Endpunkte und Zähler dieses Prozesses"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["endpoints"] = {
+                endpoint.base_url: {
+                    "state": endpoint.state,
+                    "latency_seconds": endpoint.latency_ewma,
+                    "p95_seconds": endpoint.p95(),
+                }
+                for endpoint in self.endpoints
+            }
+        return stats
+
+
+def create_endpoint_pool(config) -> EndpointPool:
+    """Erstelle Endpunkt-Pool aus der Konfiguration"""
+    return EndpointPool(
+        base_urls=config.api_base_urls,
+        failure_threshold=config.api_circuit_failure_threshold,
+        open_seconds=config.api_circuit_open_seconds
+    )
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport
+Gemeinsame HTTP-Schicht mit Keep-Alive Connection-Pools pro Host
+Wird von DBClient und TelegramNotifier geteilt, damit DNS-, TCP- und
+TLS-Handshakes nur einmal pro Host anfallen
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DB_API_BASE_URL = "https://v6.db.transport.rest"
+TELEGRAM_API_BASE_URL = "https://api.telegram.org"
+
+
+class HttpTransport:
+    """Geteilte requests.Session mit Connection-Pool und Timeout pro Host"""
+
+    def __init__(self,
+                 pool_connections: int = 4,
+                 pool_maxsize: int = 10,
+                 default_timeout: float = 30):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.default_timeout = default_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._host_timeouts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        # gzip/deflate aushandeln - urllib3 dekomprimiert transparent
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+            "User-Agent": "bahnabfrage/1.0",
+        })
+        default_adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", default_adapter)
+        self.session.mount("http://", default_adapter)
+
+    def register_host(self,
+                      base_url: str,
+                      timeout: Optional[float] = None,
+                      pool_maxsize: Optional[int] = None):
+        """Registriere Host mit eigenem Connection-Pool und Timeout"""
+        parts = urlsplit(base_url)
+        prefix = f"{parts.scheme}://{parts.netloc}"
+
+        with self._lock:
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_maxsize or self.pool_maxsize
+            )
+            self.session.mount(prefix, adapter)
+            if timeout is not None:
+                self._host_timeouts[parts.netloc] = timeout
+
+        self.logger.debug(f"Host registriert: {prefix} (Timeout: {timeout}, Pool: {pool_maxsize or self.pool_maxsize})")
+
+    def get_timeout(self, url: str) -> float:
+        """Hole Timeout für den Host der URL"""
+        return self._host_timeouts.get(urlsplit(url).netloc, self.default_timeout)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """Führe Request über den gepoolten Host-Adapter aus"""
+        if timeout is None:
+            timeout = self.get_timeout(url)
+        return self.session.request(method, url, timeout=timeout, **kwargs)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """GET Request"""
+        return self.request("GET", url, params=params, timeout=timeout, **kwargs)
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None,
+             timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """POST Request"""
+        return self.request("POST", url, json=json, timeout=timeout, **kwargs)
+
+    def close(self):
+        """Schließe alle offenen Verbindungen"""
+        self.session.close()
+
+
+def create_transport(config) -> HttpTransport:
+    """Erstelle gemeinsamen Transport für DB API und Telegram aus der Konfiguration"""
+    transport = HttpTransport(
+        pool_connections=config.http_pool_connections,
+        pool_maxsize=config.http_pool_maxsize,
+        default_timeout=config.api_timeout_seconds
+    )
+    for base_url in config.api_base_urls:
+        transport.register_host(base_url, timeout=config.api_timeout_seconds)
+    transport.register_host(TELEGRAM_API_BASE_URL, timeout=config.telegram_timeout_seconds)
+    return transport
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Journey Cache
+Persistenter Response-Cache für die Community API (SQLite)
+- Schlüssel aus normalisierten Request-Parametern
+- TTL pro Endpunkt, LRU-Verdrängung bei Größenlimit
+- Stale-While-Revalidate und Stale-If-Error bei API-Ausfall
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+
+from metrics import Metrics
+
+DEFAULT_CACHE_PATH = os.path.join("data", "journey_cache.sqlite")
+
+# TTL pro Endpunkt in Sekunden (nicht aufgeführte Endpunkte werden nicht gecacht)
+DEFAULT_ENDPOINT_TTLS = {
+    "/journeys": 120,
+    "/locations": 7 * 24 * 3600,
+}
+
+
+@dataclass
+class CacheEntry:
+    """Gecachte API-Antwort"""
+    data: Any
+    age_seconds: float
+    ttl_seconds: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age_seconds <= self.ttl_seconds
+
+
+class JourneyCache:
+    """SQLite-basierter Response-Cache mit TTL, LRU-Verdrängung und Stale-Fallback"""
+
+    def __init__(self,
+                 db_path: str = DEFAULT_CACHE_PATH,
+                 endpoint_ttls: Optional[Dict[str, float]] = None,
+                 stale_while_revalidate_seconds: float = 60,
+                 stale_if_error_seconds: float = 6 * 3600,
+                 max_entries: int = 5000,
+                 max_bytes: int = 50 * 1024 * 1024,
+                 metrics: Optional[Metrics] = None):
+        self.db_path = db_path
+        self.endpoint_ttls = dict(DEFAULT_ENDPOINT_TTLS if endpoint_ttls is None else endpoint_ttls)
+        self.stale_while_revalidate_seconds = stale_while_revalidate_seconds
+        self.stale_if_error_seconds = stale_if_error_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+        # Statistik dieses Prozesses
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "stale_on_error": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Cache-Tabelle an"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " endpoint TEXT NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """Normalisierter Cache-Schlüssel (sortierte Parameter, Strings getrimmt und klein geschrieben)"""
+        normalized = []
+        for name in sorted(params):
+            value = params[name]
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            elif isinstance(value, str):
+                value = value.strip().lower()
+            normalized.append((name, str(value)))
+        raw = f"{endpoint}?{urlencode(normalized)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, endpoint: str) -> bool:
+        """Prüfe ob für den Endpunkt eine TTL konfiguriert ist"""
+        return self.endpoint_ttls.get(endpoint, 0) > 0
+
+    def lookup(self, endpoint: str, params: Dict[str, Any]) -> Optional[CacheEntry]:
+        """Hole Eintrag inkl. Alter (auch abgelaufen, solange innerhalb des Stale-Fensters)"""
+        if not self.is_cacheable(endpoint):
+            return None
+
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        ttl = self.endpoint_ttls[endpoint]
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                self.metrics.inc("cache_lookups_total", result="misses")
+                return None
+
+            payload, stored_at = row
+            age = now - stored_at
+            if age > ttl + max(self.stale_while_revalidate_seconds, self.stale_if_error_seconds):
+                self.stats["misses"] += 1
+                self.metrics.inc("cache_lookups_total", result="misses")
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        try:
+            data = json.loads(zlib.decompress(payload))
+        except (zlib.error, ValueError) as e:
+            self.logger.warning(f"Defekter Cache-Eintrag verworfen: {str(e)}")
+            self.invalidate(endpoint, params)
+            return None
+
+        return CacheEntry(data=data, age_seconds=age, ttl_seconds=ttl)
+
+    def can_revalidate_in_background(self, entry: CacheEntry) -> bool:
+        """Abgelaufener Eintrag darf noch ausgeliefert und im Hintergrund erneuert werden"""
+        return entry.age_seconds <= entry.ttl_seconds + self.stale_while_revalidate_seconds
+
+    def can_serve_on_error(self, entry: CacheEntry) -> bool:
+        """Abgelaufener Eintrag darf bei API-Ausfall ausgeliefert werden"""
+        return entry.age_seconds <= entry.ttl_seconds + self.stale_if_error_seconds
+
+    def record(self, outcome: str):
+        """Zähle Cache-Ergebnis (hits, stale_hits, stale_on_error, misses)"""
+        with self._lock:
+            self.stats[outcome] += 1
+        self.metrics.inc("cache_lookups_total", result=outcome)
+
+    def store(self, endpoint: str, params: Dict[str, Any], data: Any):
+        """Speichere API-Antwort komprimiert"""
+        if not self.is_cacheable(endpoint):
+            return
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        self.store_payload(endpoint, params, payload)
+
+    def store_payload(self, endpoint: str, params: Dict[str, Any], payload: bytes):
+        """Speichere bereits komprimierten JSON-Body (zlib) - z.B. beim Streaming mitgeschrieben"""
+        if not self.is_cacheable(endpoint):
+            return
+
+        key = self.make_key(endpoint, params)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, payload, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, payload, len(payload), now, now)
+            )
+            self._conn.commit()
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self):
+        """LRU-Verdrängung bis Einträge- und Größenlimit eingehalten sind (Lock muss gehalten werden)"""
+        count, total_size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        evicted = 0
+        while count > self.max_entries or total_size > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            count -= 1
+            total_size -= row[1]
+            evicted += 1
+
+        if evicted:
+            self._conn.commit()
+            self.stats["evictions"] += evicted
+            self.logger.debug(f"Cache: {evicted} Einträge verdrängt (LRU)")
+
+    def invalidate(self, endpoint: str, params: Dict[str, Any]):
+        """Entferne einzelnen Eintrag"""
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hole Cache-Statistik dieses Prozesses inkl. Trefferquote"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Schließe SQLite-Verbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_journey_cache(config, metrics: Optional[Metrics] = None) -> Optional[JourneyCache]:
+    """Erstelle Response-Cache aus der Konfiguration (None falls deaktiviert)"""
+    if not config.cache_enabled:
+        return None
+    return JourneyCache(
+        db_path=config.cache_db_path,
+        endpoint_ttls={
+            "/journeys": config.cache_journeys_ttl_seconds,
+            "/locations": config.cache_locations_ttl_seconds,
+        },
+        stale_while_revalidate_seconds=config.cache_stale_while_revalidate_seconds,
+        stale_if_error_seconds=config.cache_stale_if_error_seconds,
+        max_entries=config.cache_max_entries,
+        metrics=metrics
+    )
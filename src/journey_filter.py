@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Journey Filter
+Regeln für gemeldete Verbindungen (JOURNEY_FILTERS bzw. "filters" in der Watch-Datei),
+z.B. "max_transfers=2; arrive_before=20:00; min_transfer_minutes=8; exclude_products=bus; only_lines=ICE,RJ"
+
+Die Regeln werden einmal in Prädikate übersetzt und nach Kosten sortiert: erst Zeiten und
+Umstiege, dann Liniennamen, zuletzt Regeln die die komprimierten Legs dekodieren müssen -
+die erste verletzte Regel verwirft die Verbindung (Zählung je Regel)
+"""
+
+import logging
+from datetime import datetime, time as dt_time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from db_client import Journey
+from metrics import Metrics
+
+# Kosten einer Regel (Auswertungsreihenfolge)
+COST_SCALAR = 0   # Felder der Journey
+COST_LINES = 1    # Liniennamen (ohne Legs)
+COST_LEGS = 2     # Legs dekodieren
+
+
+def _parse_clock(value: Any) -> dt_time:
+    hour, minute = str(value).strip().split(":")
+    return dt_time(int(hour), int(minute))
+
+
+def _parse_list(value: Any) -> Tuple[str, ...]:
+    items = value if isinstance(value, (list, tuple)) else str(value).replace("/", ",").split(",")
+    parsed = tuple(str(item).strip().upper() for item in items if str(item).strip())
+    if not parsed:
+        raise ValueError("Liste ist leer")
+    return parsed
+
+
+def _wall_clock(moment: datetime) -> datetime:
+    """Ortszeit ohne Zeitzone (wie in der Antwort angegeben)"""
+    return moment.replace(tzinfo=None)
+
+
+def _line_prefix(line_name: str) -> str:
+    """Gattung aus dem Liniennamen ("ICE 500" → "ICE")"""
+    return line_name.split(" ", 1)[0].upper()
+
+
+def _leg_time(leg: Dict[str, Any], field: str) -> Optional[datetime]:
+    value = leg.get(field) or leg.get("planned" + field[0].upper() + field[1:])
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def _rides(legs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [leg for leg in legs if not leg.get("walking")]
+
+
+# Regelname → (Kosten, Übersetzung Wert → Prädikat); Prädikate der Kosten COST_LEGS erhalten die Legs
+def _max_transfers(value: Any) -> Callable[[Journey], bool]:
+    limit = int(value)
+    return lambda journey: journey.transfers <= limit
+
+
+def _max_duration_minutes(value: Any) -> Callable[[Journey], bool]:
+    limit = int(value)
+    return lambda journey: journey.duration_minutes <= limit
+
+
+def _depart_after(value: Any) -> Callable[[Journey], bool]:
+    clock = _parse_clock(value)
+    return lambda journey: journey.departure_time.time() >= clock
+
+
+def _depart_before(value: Any) -> Callable[[Journey], bool]:
+    clock = _parse_clock(value)
+    return lambda journey: journey.departure_time.time() <= clock
+
+
+def _arrive_before(value: Any) -> Callable[[Journey], bool]:
+    # Ankunft am Folgetag liegt immer nach der Uhrzeit
+    clock = _parse_clock(value)
+    return lambda journey: _wall_clock(journey.arrival_time) <= datetime.combine(journey.departure_time.date(), clock)
+
+
+def _arrive_after(value: Any) -> Callable[[Journey], bool]:
+    clock = _parse_clock(value)
+    return lambda journey: _wall_clock(journey.arrival_time) >= datetime.combine(journey.departure_time.date(), clock)
+
+
+def _max_price(value: Any) -> Callable[[Journey], bool]:
+    # Ohne Preis in der Antwort wird nicht verworfen
+    limit = float(value)
+    return lambda journey: journey.price is None or journey.price <= limit
+
+
+def _only_lines(value: Any) -> Callable[[Journey], bool]:
+    allowed = frozenset(_parse_list(value))
+    return lambda journey: all(_line_prefix(name) in allowed for name in journey.line_names if name)
+
+
+def _exclude_lines(value: Any) -> Callable[[Journey], bool]:
+    excluded = frozenset(_parse_list(value))
+    return lambda journey: not any(_line_prefix(name) in excluded for name in journey.line_names if name)
+
+
+def _exclude_products(value: Any) -> Callable[[List[Dict[str, Any]]], bool]:
+    # Produkte wie in der API: nationalExpress, national, regionalExpress, regional, suburban, bus, ferry, ...
+    excluded = frozenset(item.lower() for item in _parse_list(value))
+    return lambda legs: not any(str((leg.get("line") or {}).get("product", "")).lower() in excluded
+                                for leg in _rides(legs))
+
+
+def _min_transfer_minutes(value: Any) -> Callable[[List[Dict[str, Any]]], bool]:
+    minimum = float(value) * 60
+
+    def check(legs: List[Dict[str, Any]]) -> bool:
+        rides = _rides(legs)
+        for previous, following in zip(rides, rides[1:]):
+            arrival, departure = _leg_time(previous, "arrival"), _leg_time(following, "departure")
+            if arrival and departure and (departure - arrival).total_seconds() < minimum:
+                return False
+        return True
+
+    return check
+
+
+RULES: Dict[str, Tuple[int, Callable[[Any], Callable]]] = {
+    "max_transfers": (COST_SCALAR, _max_transfers),
+    "max_duration_minutes": (COST_SCALAR, _max_duration_minutes),
+    "depart_after": (COST_SCALAR, _depart_after),
+    "depart_before": (COST_SCALAR, _depart_before),
+    "arrive_before": (COST_SCALAR, _arrive_before),
+    "arrive_after": (COST_SCALAR, _arrive_after),
+    "max_price": (COST_SCALAR, _max_price),
+    "only_lines": (COST_LINES, _only_lines),
+    "exclude_lines": (COST_LINES, _exclude_lines),
+    "exclude_products": (COST_LEGS, _exclude_products),
+    "min_transfer_minutes": (COST_LEGS, _min_transfer_minutes),
+}
+
+
+def parse_filter_spec(spec: Union[str, Dict[str, Any], None]) -> List[Tuple[str, Any]]:
+    """Regeln aus "name=wert; ..." oder einem Dict (Watch-Datei) - in Angabe-Reihenfolge"""
+    if not spec:
+        return []
+    if isinstance(spec, dict):
+        return list(spec.items())
+
+    rules = []
+    for part in str(spec).replace("\n", ";").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" not in part:
+            raise ValueError(f"Filterregel '{part}' braucht die Form name=wert")
+        name, value = part.split("=", 1)
+        rules.append((name.strip(), value.strip()))
+    return rules
+
+
+class JourneyFilter:
+    """Übersetzte Filterregeln einer Überwachung mit Zählung der verworfenen Verbindungen je Regel"""
+
+    def __init__(self, spec: Union[str, Dict[str, Any], None] = None, metrics: Optional[Metrics] = None):
+        self.logger = logging.getLogger(__name__)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        # (Kosten, Label, Prädikat) - stabil nach Kosten sortiert
+        self.rules: List[Tuple[int, str, Callable]] = []
+        for name, value in parse_filter_spec(spec):
+            if name not in RULES:
+                raise ValueError(f"Unbekannte Filterregel '{name}' (verfügbar: {', '.join(RULES)})")
+            cost, compile_rule = RULES[name]
+            label = f"{name}={','.join(map(str, value)) if isinstance(value, (list, tuple)) else value}"
+            try:
+                predicate = compile_rule(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Filterregel '{label}' ungültig: {str(e)}")
+            self.rules.append((cost, label, predicate))
+        self.rules.sort(key=lambda rule: rule[0])
+
+        self.stats = {"checked": 0, "passed": 0}
+        self.rejections: Dict[str, int] = {label: 0 for _, label, _ in self.rules}
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    @property
+    def needs_legs(self) -> bool:
+        """Braucht mindestens eine Regel die Legs (nicht im Abfrageprofil probe)?"""
+        return any(cost == COST_LEGS for cost, _, _ in self.rules)
+
+    def rejected_by(self, journey: Journey) -> Optional[str]:
+        """Erste verletzte Regel (None = Verbindung wird gemeldet) - Legs höchstens einmal dekodiert"""
+        legs = None
+        for cost, label, predicate in self.rules:
+            if cost == COST_LEGS:
+                if legs is None:
+                    legs = journey.legs
+                if not predicate(legs):
+                    return label
+            elif not predicate(journey):
+                return label
+        return None
+
+    def apply(self, journeys: List[Journey]) -> List[Journey]:
+        """Verbindungen die alle Regeln erfüllen (Reihenfolge bleibt erhalten)"""
+        if not self.rules:
+            return journeys
+
+        passed = []
+        for journey in journeys:
+            label = self.rejected_by(journey)
+            if label is None:
+                passed.append(journey)
+            else:
+                self.rejections[label] += 1
+                self.metrics.inc("journey_filter_rejections_total", rule=label)
+        self.stats["checked"] += len(journeys)
+        self.stats["passed"] += len(passed)
+        return passed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Geprüfte, gemeldete und je Regel verworfene Verbindungen"""
+        return {**self.stats, "rejections": dict(self.rejections)}
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Journey Store
+Persistente Fingerprints aller gemeldeten Verbindungen pro Überwachung (SQLite)
+Jeder Check wird gegen den letzten Stand verglichen - gemeldet werden nur
+neue, entfallene und geänderte Verbindungen
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+from db_client import Journey
+
+DEFAULT_JOURNEY_STORE_PATH = os.path.join("data", "journeys.sqlite")
+
+
+@dataclass
+class JourneyFingerprint:
+    """Identität (Trip-IDs) und Inhalts-Signatur (Zeiten, Linien) einer Verbindung"""
+    key: str
+    signature: str
+    summary: str
+
+
+@dataclass
+class JourneyDiff:
+    """Unterschiede eines Tages gegenüber dem gespeicherten Stand"""
+    added: List[Journey] = field(default_factory=list)
+    changed: List[Journey] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)  # Kurzbeschreibungen entfallener Verbindungen
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def journey_fingerprint(journey: Journey) -> JourneyFingerprint:
+    """Berechne Fingerprint einer Verbindung (nur aus kompakten Feldern, ohne Legs zu dekodieren)"""
+    # Identität: Trip-IDs der Fahrten, ohne Fahrten die Abfahrtszeit
+    key_parts = list(journey.trip_ids) or [journey.departure_time.isoformat()]
+    key = hashlib.sha1("|".join(key_parts).encode("utf-8")).hexdigest()
+
+    # Inhalt: Zeiten, Linien, Umstiege
+    content = "|".join([
+        journey.departure_time.isoformat(),
+        journey.arrival_time.isoformat(),
+        str(journey.transfers),
+        ",".join(journey.line_names),
+    ])
+    signature = hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    summary = f"{journey.departure_time.strftime('%H:%M')} → {journey.arrival_time.strftime('%H:%M')}"
+    if any(journey.line_names):
+        summary += f" ({', '.join(name for name in journey.line_names if name)})"
+
+    return JourneyFingerprint(key=key, signature=signature, summary=summary)
+
+
+class JourneyStore:
+    """Persistenter Fingerprint-Speicher - Abfrage "ist neu?" in O(1) über Speicher-Dict"""
+
+    def __init__(self, db_path: str = DEFAULT_JOURNEY_STORE_PATH):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # watch_id → date → journey_key → (signature, summary)
+        self._loaded: Dict[str, Dict[str, Dict[str, Tuple[str, str]]]] = {}
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Tabelle an"""
+        if self.db_path != ":memory:":
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " watch_id TEXT NOT NULL,"
+            " travel_date TEXT NOT NULL,"
+            " journey_key TEXT NOT NULL,"
+            " signature TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " PRIMARY KEY (watch_id, travel_date, journey_key))"
+        )
+        conn.commit()
+        return conn
+
+    def _watch_state(self, watch_id: str) -> Dict[str, Dict[str, Tuple[str, str]]]:
+        """Stand einer Überwachung (einmalig aus SQLite geladen, Lock muss gehalten werden)"""
+        if watch_id not in self._loaded:
+            state: Dict[str, Dict[str, Tuple[str, str]]] = {}
+            rows = self._conn.execute(
+                "SELECT travel_date, journey_key, signature, summary FROM fingerprints WHERE watch_id = ?",
+                (watch_id,)
+            )
+            for travel_date, journey_key, signature, summary in rows:
+                state.setdefault(travel_date, {})[journey_key] = (signature, summary)
+            self._loaded[watch_id] = state
+        return self._loaded[watch_id]
+
+    def evict(self, watch_ids: Iterable[str]):
+        """Geladenen Stand verwerfen - beim nächsten Zugriff neu aus SQLite (z.B. nach Shard-Wechsel,
+        wenn ein anderer Container die Überwachung zwischenzeitlich geprüft hat)"""
+        with self._lock:
+            for watch_id in watch_ids:
+                self._loaded.pop(watch_id, None)
+
+    def forget(self, watch_id: str, travel_dates: Iterable[str]):
+        """Gespeicherten Stand einzelner Tage löschen - z.B. wenn die Meldung nie zugestellt wurde;
+        der nächste Vergleich meldet die Verbindungen dieser Tage erneut"""
+        travel_dates = list(travel_dates)
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM fingerprints WHERE watch_id = ? AND travel_date = ?",
+                [(watch_id, travel_date) for travel_date in travel_dates]
+            )
+            self._conn.commit()
+            state = self._loaded.get(watch_id)
+            if state is not None:
+                for travel_date in travel_dates:
+                    state.pop(travel_date, None)
+
+    def has_watch(self, watch_id: str) -> bool:
+        """Wurden für diese Überwachung schon jemals Verbindungen gespeichert?"""
+        with self._lock:
+            return any(self._watch_state(watch_id).values())
+
+    def is_new(self, watch_id: str, travel_date: str, journey: Journey) -> bool:
+        """Ist die Verbindung unbekannt? (O(1))"""
+        fingerprint = journey_fingerprint(journey)
+        with self._lock:
+            return fingerprint.key not in self._watch_state(watch_id).get(travel_date, {})
+
+    def diff(self, watch_id: str, travel_date: str, journeys: List[Journey]) -> JourneyDiff:
+        """Vergleiche aktuelle Verbindungen eines Tages mit dem gespeicherten Stand"""
+        result = JourneyDiff()
+        with self._lock:
+            known = self._watch_state(watch_id).get(travel_date, {})
+            seen = set()
+
+            for journey in journeys:
+                fingerprint = journey_fingerprint(journey)
+                if fingerprint.key in seen:
+                    continue
+                seen.add(fingerprint.key)
+
+                stored = known.get(fingerprint.key)
+                if stored is None:
+                    result.added.append(journey)
+                elif stored[0] != fingerprint.signature:
+                    result.changed.append(journey)
+                else:
+                    result.unchanged += 1
+
+            result.removed = [summary for key, (_, summary) in known.items() if key not in seen]
+
+        return result
+
+    def update(self, watch_id: str, travel_date: str, journeys: List[Journey], partial: bool = False):
+        """Ersetze den gespeicherten Stand eines Tages durch die aktuellen Verbindungen
+
+        partial=True (Suche nicht vollständig): nur ergänzen bzw. aktualisieren, fehlende
+        Verbindungen bleiben gespeichert statt als entfallen zu gelten
+        """
+        now = time.time()
+        fingerprints = {}
+        for journey in journeys:
+            fingerprint = journey_fingerprint(journey)
+            fingerprints[fingerprint.key] = fingerprint
+
+        with self._lock:
+            state = self._watch_state(watch_id)
+            known = state.get(travel_date, {})
+
+            removed_keys = [] if partial else [key for key in known if key not in fingerprints]
+            if removed_keys:
+                self._conn.executemany(
+                    "DELETE FROM fingerprints WHERE watch_id = ? AND travel_date = ? AND journey_key = ?",
+                    [(watch_id, travel_date, key) for key in removed_keys]
+                )
+
+            # first_seen bleibt bei bekannten Verbindungen erhalten
+            self._conn.executemany(
+                "INSERT INTO fingerprints (watch_id, travel_date, journey_key, signature, summary, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (watch_id, travel_date, journey_key)"
+                " DO UPDATE SET signature = excluded.signature, summary = excluded.summary, last_seen = excluded.last_seen",
+                [(watch_id, travel_date, fp.key, fp.signature, fp.summary, now, now) for fp in fingerprints.values()]
+            )
+            self._conn.commit()
+
+            current = {key: (fp.signature, fp.summary) for key, fp in fingerprints.items()}
+            state[travel_date] = {**known, **current} if partial else current
+
+    def close(self):
+        """Schließe SQLite-Verbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_journey_store(config) -> JourneyStore:
+    """Erstelle Fingerprint-Speicher aus der Konfiguration"""
+    return JourneyStore(db_path=config.journey_store_path)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+JSON Stream
+Inkrementelles Dekodieren großer API-Antworten ({"journeys": [...], ...})
+Die Elemente des gesuchten Arrays werden einzeln geliefert, sobald sie
+vollständig empfangen sind - im Speicher liegt nie mehr als ein Element
+plus der aktuelle Netzwerk-Chunk
+"""
+
+import json
+import codecs
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+_WHITESPACE = " \t\n\r"
+
+
+class _ChunkReader:
+    """Textpuffer über einem Byte-Chunk-Iterator (UTF-8, bereits gelesener Teil wird verworfen)"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self) -> bool:
+        """Nächsten Chunk anhängen - False am Ende des Streams"""
+        if self.exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.buffer = self.buffer[self.pos:] + self._decoder.decode(b"", final=True)
+            self.pos = 0
+            self.exhausted = True
+            return False
+        self.buffer = self.buffer[self.pos:] + self._decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Nächstes Zeichen ohne Whitespace ('' am Ende)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, *characters: str) -> str:
+        """Erwartetes Strukturzeichen konsumieren"""
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(f"Ungültiges JSON: erwartet {' oder '.join(characters)}, gefunden {character!r}")
+        self.pos += 1
+        return character
+
+    def value(self) -> Any:
+        """Nächsten vollständigen JSON-Wert dekodieren (lädt Chunks nach bis er komplett ist)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+                # Wert endet am Pufferende - eine Zahl könnte im nächsten Chunk weitergehen
+                if end < len(self.buffer) or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self.fill()
+
+
+def iter_array_items(chunks: Iterable[bytes],
+                     array_key: str,
+                     metadata: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """Liefere die Elemente von obj[array_key] einzeln; übrige Top-Level Felder landen in metadata"""
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError("Ungültiges JSON: Objekt-Schlüssel erwartet")
+        reader.expect(":")
+
+        if key == array_key and reader.peek() == "[":
+            reader.pos += 1
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(",", "]") == "]":
+                        break
+        else:
+            value = reader.value()
+            if metadata is not None:
+                metadata[key] = value
+
+        if reader.expect(",", "}") == "}":
+            return
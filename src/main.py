@@ -1,18 +1,35 @@
 #!/usr/bin/env python3
 """
 Deutsche Bahn Verbindungsüberwachung
-Hauptanwendung für automatische Überwachung Hamburg Hbf → Landeck-Zams
+Hauptanwendung für automatische Überwachung von Bahnverbindungen (eine oder viele Routen)
 """
 
 import sys
+import time
+import signal
 import logging
 import argparse
-# datetime import nicht mehr benötigt
+from datetime import datetime
 
 from config import load_config
 from db_client import DBClient
+from http_transport import create_transport
+from rate_limiter import create_rate_limiter
+from endpoint_pool import create_endpoint_pool
+from journey_cache import create_journey_cache
+from station_index import create_station_index
 from telegram_notifier import TelegramNotifier
+from telegram_outbox import create_telegram_outbox
+from telegram_messages import create_message_store
 from connection_monitor import ConnectionMonitor
+from scheduler import Scheduler
+from watch_registry import create_watch_registry
+from journey_store import JourneyStore, create_journey_store
+from availability_history import create_availability_history
+from shard_leases import create_shard_lease_manager
+from adaptive_polling import create_adaptive_poller
+from status_server import create_status_server
+from metrics import Metrics, create_metrics
 
 def setup_argument_parser():
     """Setup Command Line Arguments"""
@@ -22,6 +39,8 @@ def setup_argument_parser():
         epilog="""
 Beispiele:
   python main.py --run                 # Normale Ausführung (Production)
+  python main.py --daemon              # Dauerbetrieb mit internem Zeitplan
+  python main.py --bootstrap           # Container-Start: Checks + Startup-Nachricht
   python main.py --test                # Test-Modus (wenige Tage)
   python main.py --test-telegram       # Nur Telegram-Verbindung testen
   python main.py --config config/.env  # Mit spezifischer .env Datei
@@ -34,6 +53,18 @@ Beispiele:
         help="Führe normale Verbindungsüberwachung durch"
     )
     
+    parser.add_argument(
+        "--daemon", 
+        action="store_true",
+        help="Dauerbetrieb mit internem Scheduler (SCHEDULE_CRON / SCHEDULE_INTERVAL_SECONDS / SCHEDULE_ADAPTIVE)"
+    )
+    
+    parser.add_argument(
+        "--bootstrap", 
+        action="store_true",
+        help="Container-Start: Telegram- und API-Test, eine Suche und Startup-Nachricht in einem Prozess"
+    )
+    
     parser.add_argument(
         "--test", 
         action="store_true",
@@ -65,7 +96,8 @@ def test_telegram_connection(config) -> bool:
     print("🧪 Teste Telegram-Verbindung...")
     
     try:
-        telegram = TelegramNotifier(config.telegram_bot_token, config.telegram_chat_id)
+        telegram = TelegramNotifier(config.telegram_bot_token, config.telegram_chat_id,
+                                    transport=create_transport(config))
         
         # Teste Bot-Verbindung
         if not telegram.test_connection():
@@ -86,19 +118,100 @@ def test_telegram_connection(config) -> bool:
         print(f"❌ Telegram Test Exception: {str(e)}")
         return False
 
+def create_monitor(config, test_mode: bool = False) -> ConnectionMonitor:
+    """Initialisiere alle Komponenten (gemeinsamer HTTP-Transport mit Keep-Alive, gemeinsame Metriken)
+    
+    test_mode: Fingerprints nur im Speicher - ein Testlauf verbraucht nicht die Erstmeldung
+    """
+    metrics = create_metrics(config) or Metrics()
+    transport = create_transport(config)
+    db_client = DBClient(
+        timeout=config.api_timeout_seconds,
+        transport=transport,
+        rate_limiter=create_rate_limiter(config, metrics=metrics),
+        rate_limit_max_wait=config.rate_limit_max_wait_seconds,
+        cache=create_journey_cache(config, metrics=metrics),
+        station_index=create_station_index(config),
+        keep_raw_data=config.journey_keep_raw_data,
+        stream_responses=config.stream_responses,
+        metrics=metrics,
+        endpoints=create_endpoint_pool(config),
+        hedge_requests=config.api_hedge_requests,
+        coalesce_requests=config.api_coalesce_requests,
+        coalesce_window_seconds=config.api_coalesce_window_seconds,
+        query_profile=config.query_profile
+    )
+    message_store = create_message_store(config)
+    outbox = create_telegram_outbox(config, transport, message_store=message_store, metrics=metrics)
+    if outbox is not None:
+        outbox.start()
+    telegram = TelegramNotifier(config.telegram_bot_token, config.telegram_chat_id,
+                                transport=transport, outbox=outbox, message_store=message_store,
+                                metrics=metrics)
+    return ConnectionMonitor(
+        db_client,
+        telegram,
+        config,
+        registry=create_watch_registry(config),
+        journey_store=JourneyStore(":memory:") if test_mode else create_journey_store(config),
+        metrics=metrics,
+        history=create_availability_history(config)
+    )
+
+def log_watches(monitor: ConnectionMonitor):
+    """Schreibe überwachte Routen und Zieltage ins Log"""
+    logger = logging.getLogger(__name__)
+    logger.info(f"Überwachungen: {len(monitor.registry)}")
+    for watch in monitor.registry:
+        logger.info(f"  [{watch.display_name}] {watch.route_label}: {watch.get_formatted_days_description()}")
+
+def log_session_summary(monitor: ConnectionMonitor):
+    """Schreibe Session-Zusammenfassung ins Log"""
+    logger = logging.getLogger(__name__)
+    summary = monitor.get_session_summary()
+    logger.info(f"Session abgeschlossen: {summary['runtime_formatted']} Laufzeit")
+    logger.info(f"Statistik: {summary['watches_checked']} Überwachungen, {summary['dates_checked']} Tage, "
+                f"{summary['total_api_calls']} API calls")
+    logger.info(f"Gefunden: {summary['connections_found']} Verbindungen")
+    logger.info(f"Rate Limit: {summary['rate_limit']['tokens_acquired']} Tokens, "
+                f"{summary['rate_limit']['total_wait_seconds']:.1f}s Wartezeit")
+    if summary['telegram']:
+        logger.info(f"Telegram: {summary['telegram']['sent']} gesendet, {summary['telegram']['retries']} Wiederholungen, "
+                    f"{summary['telegram']['flood_waits']}x 429, {summary['telegram']['pending']} offen")
+    if summary['cache']:
+        logger.info(f"Cache: {summary['cache']['hits']} Hits, {summary['cache']['stale_hits']} Stale, "
+                    f"{summary['cache']['misses']} Misses (Quote {summary['cache']['hit_ratio']:.0%})")
+    
+    endpoints = summary['endpoints']
+    if endpoints['failures'] or endpoints['rejected']:
+        logger.info(f"API-Endpunkte: {endpoints['failures']} Fehler, {endpoints['circuit_opened']}x gesperrt, "
+                    f"{endpoints['rejected']} Anfragen abgelehnt")
+    
+    metrics = monitor.metrics
+    requests_total = metrics.total("api_requests_total")
+    if requests_total:
+        logger.info(f"API: {requests_total:.0f} Requests, "
+                    f"Ø {metrics.total('api_request_seconds_sum') / requests_total:.2f}s, "
+                    f"{metrics.total('api_response_bytes_total') / 1024:.0f} KiB empfangen, "
+                    f"{metrics.total('api_coalesced_requests_total'):.0f} zusammengeführt")
+    
+    filters = summary['filters']
+    if filters['checked'] > filters['passed']:
+        logger.info(f"Filter: {filters['checked'] - filters['passed']} von {filters['checked']} Verbindungen verworfen ("
+                    + ", ".join(f"{rule}: {count}" for rule, count in filters['rejections'].items() if count) + ")")
+    
+    if summary['errors']:
+        logger.warning(f"Fehler aufgetreten: {len(summary['errors'])}")
+
 def run_application(config, test_mode: bool = False) -> bool:
     """Führe Hauptanwendung aus"""
     logger = logging.getLogger(__name__)
     
     try:
-        # Komponenten initialisieren
-        db_client = DBClient(timeout=config.api_timeout_seconds)
-        telegram = TelegramNotifier(config.telegram_bot_token, config.telegram_chat_id)
-        monitor = ConnectionMonitor(db_client, telegram, config)
+        monitor = create_monitor(config, test_mode=test_mode)
         
         logger.info("🚀 Starte Deutsche Bahn Verbindungsüberwachung")
-        logger.info(f"Route: {config.departure_station} → {config.destination_station}")
-        logger.info(f"Zieltag: {config.get_formatted_date_description()}")
+        log_watches(monitor)
         logger.info(f"Modus: {'Test' if test_mode else 'Production'}")
         
         # Überwachung starten (führt Datumsabfrage durch und sendet Ergebnisse)
@@ -109,14 +222,21 @@ def run_application(config, test_mode: bool = False) -> bool:
         
         # Keine automatische Startup-Benachrichtigung mehr - nur bei gefundenen Verbindungen
         
+        # Outbox vor Prozessende zustellen (Reste bleiben gespeichert)
+        outbox = monitor.telegram.outbox
+        if outbox is not None:
+            outbox.flush(timeout=config.telegram_flush_timeout_seconds)
+        
         # Session-Zusammenfassung
-        summary = monitor.get_session_summary()
-        logger.info(f"Session abgeschlossen: {summary['runtime_formatted']} Laufzeit")
-        logger.info(f"Statistik: {summary['dates_checked']} Tage, {summary['total_api_calls']} API calls")
-        logger.info(f"Gefunden: {summary['connections_found']} Verbindungen")
+        log_session_summary(monitor)
         
-        if summary['errors']:
-            logger.warning(f"Fehler aufgetreten: {len(summary['errors'])}")
+        if outbox is not None:
+            outbox.close()
+        monitor.telegram.message_store.close()
+        if monitor.history is not None:
+            monitor.history.close()
+        # Nach der Zustellung: enthält auch die Telegram-Latenzen dieses Laufs
+        monitor.metrics.close()
         
         return success
         
@@ -132,19 +252,148 @@ def run_application(config, test_mode: bool = False) -> bool:
         
         return False
 
+def run_bootstrap(config) -> bool:
+    """Container-Start in einem Prozess: Verbindungstests, eine Suche und Startup-Nachricht
+    
+    Das Suchergebnis wird für API-Test und Startup-Nachricht gemeinsam verwendet.
+    False nur wenn Telegram nicht erreichbar ist - API-Probleme verhindern den Start nicht
+    """
+    timings = []
+    
+    def phase(name: str, started: float):
+        timings.append((name, time.perf_counter() - started))
+    
+    started = time.perf_counter()
+    try:
+        monitor = create_monitor(config)
+    except Exception as e:
+        print(f"❌ Komponenten konnten nicht initialisiert werden: {str(e)}")
+        return False
+    phase("Initialisierung", started)
+    
+    # Telegram-Verbindung testen (nur Konnektivität, keine Nachrichten)
+    print("📱 Teste Telegram-Verbindung...")
+    started = time.perf_counter()
+    if not monitor.telegram.test_connection():
+        print("❌ Telegram Bot Verbindung fehlgeschlagen")
+        return False
+    monitor.telegram_verified = True
+    print("✅ Telegram Bot erfolgreich verbunden")
+    phase("Telegram", started)
+    
+    # Deutsche Bahn API testen - Ergebnis auch für die Startup-Nachricht
+    print("🚄 Teste Deutsche Bahn Verbindungssuche...")
+    started = time.perf_counter()
+    date_desc = config.get_formatted_date_description()
+    try:
+        year, month = config.get_target_year_month()
+        from_id, to_id = monitor.get_route_ids()
+        # Nur Anzahl für die Startup-Nachricht - schlankstes Profil
+        journeys = monitor.db_client.search_journeys(from_id, to_id, datetime(year, month, config.target_day, 10, 0),
+                                                     max_results=10, profile="probe")
+        print(f"✅ Deutsche Bahn API Test erfolgreich: {len(journeys)} Verbindungen für {date_desc} gefunden")
+        if journeys:
+            connection_status = f"✅ {len(journeys)} Verbindung(en) verfügbar für {date_desc}"
+        else:
+            connection_status = f"❌ Keine Verbindungen für {date_desc} vorhanden"
+    except Exception as e:
+        print(f"⚠️ Deutsche Bahn API Test mit Problemen (Container startet trotzdem): {str(e)}")
+        connection_status = f"⚠️ Fehler bei Verbindungscheck: {str(e)}"
+    phase("DB API", started)
+    
+    # Startup-Benachrichtigung (über die Outbox, vor Prozessende zugestellt)
+    print("📢 Sende Container-Startup-Benachrichtigung...")
+    started = time.perf_counter()
+    monitor.telegram.notify_container_started(config.departure_station, config.destination_station,
+                                              date_desc, connection_status)
+    outbox = monitor.telegram.outbox
+    if outbox is not None:
+        outbox.flush(timeout=config.telegram_flush_timeout_seconds)
+        outbox.close()
+    monitor.telegram.message_store.close()
+    if monitor.history is not None:
+        monitor.history.close()
+    phase("Startup-Nachricht", started)
+    
+    monitor.metrics.close()
+    monitor.db_client.transport.close()
+    
+    print("⏱️ " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings)
+          + f" (gesamt {sum(seconds for _, seconds in timings):.2f}s)")
+    return True
+
+def run_daemon(config) -> bool:
+    """Dauerbetrieb: Komponenten bleiben warm (Connection-Pools, Caches, Zustand) zwischen den Checks"""
+    logger = logging.getLogger(__name__)
+    
+    try:
+        monitor = create_monitor(config)
+        
+        # Mehrere Container: Shards beanspruchen, Leases laufen im Hintergrund weiter
+        monitor.shards = create_shard_lease_manager(config, metrics=monitor.metrics)
+        if monitor.shards is not None:
+            monitor.shards.add_change_listener(monitor.on_shards_changed)
+            monitor.shards.start()
+        
+        # Adaptiv: jede Überwachung nach eigenem Takt (Abstand zum Buchungshorizont)
+        poller = create_adaptive_poller(config, monitor) if config.schedule_adaptive else None
+        scheduler = Scheduler(
+            cron=config.schedule_cron,
+            interval_seconds=config.schedule_interval_seconds or None,
+            jitter_seconds=config.schedule_jitter_seconds,
+            run_on_start=True,
+            next_run_fn=poller.next_run if poller else None
+        )
+        status_server = create_status_server(config, monitor, scheduler)
+        if status_server is not None:
+            status_server.start()
+    except Exception as e:
+        logger.error(f"Daemon konnte nicht gestartet werden: {str(e)}")
+        return False
+    
+    # Sauberes Beenden bei docker stop (SIGTERM) und Strg+C
+    def handle_signal(signum, frame):
+        logger.info(f"Signal {signal.Signals(signum).name} empfangen - beende nach aktuellem Check")
+        scheduler.stop()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    if status_server is not None:
+        scheduler.add_shutdown_hook(status_server.stop)
+    scheduler.add_shutdown_hook(lambda: log_session_summary(monitor))
+    if monitor.shards is not None:
+        # Sofort freigeben - andere Container übernehmen ohne Ablauf der Leases
+        scheduler.add_shutdown_hook(monitor.shards.close)
+    if monitor.telegram.outbox is not None:
+        scheduler.add_shutdown_hook(lambda: monitor.telegram.outbox.flush(timeout=10))
+        scheduler.add_shutdown_hook(monitor.telegram.outbox.close)
+    scheduler.add_shutdown_hook(monitor.telegram.message_store.close)
+    if monitor.history is not None:
+        scheduler.add_shutdown_hook(monitor.history.close)
+    scheduler.add_shutdown_hook(monitor.metrics.close)
+    scheduler.add_shutdown_hook(monitor.db_client.transport.close)
+    
+    logger.info("🚀 Starte Daemon-Modus")
+    log_watches(monitor)
+    
+    scheduler.run_forever(poller.run_due if poller else monitor.run_daily_check)
+    return True
+
 def main():
     """Hauptfunktion"""
     parser = setup_argument_parser()
     args = parser.parse_args()
     
     # Mindestens ein Modus muss gewählt werden
-    if not any([args.run, args.test, args.test_telegram]):
+    if not any([args.run, args.daemon, args.bootstrap, args.test, args.test_telegram]):
         parser.print_help()
-        print("\n❌ Bitte wähle einen Modus: --run, --test oder --test-telegram")
+        print("\n❌ Bitte wähle einen Modus: --run, --daemon, --bootstrap, --test oder --test-telegram")
         sys.exit(1)
     
     try:
         # Konfiguration laden
+        started = time.perf_counter()
         config = load_config(args.config)
         
         # Logging konfigurieren
@@ -173,6 +422,14 @@ def main():
             logger.info("Starte Production-Modus")
             success = run_application(config, test_mode=False)
         
+        elif args.bootstrap:
+            print(f"✅ Konfiguration geprüft ({time.perf_counter() - started:.2f}s)")
+            success = run_bootstrap(config)
+        
+        elif args.daemon:
+            logger.info("Starte Daemon-Modus")
+            success = run_daemon(config)
+        
         # Exit Code setzen
         if success:
             print("✅ Anwendung erfolgreich beendet")
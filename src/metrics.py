@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Zähler, Histogramme und Gauges für API-Latenz, Rate-Limit, Cache und Telegram
+Werte werden im Prozess gesammelt und bei flush() in SQLite aufsummiert -
+so überleben sie einzelne Cron-Läufe. Zusätzlich wird eine Textdatei im
+Prometheus-Format geschrieben (z.B. für den node_exporter Textfile-Collector)
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_METRICS_PATH = os.path.join("data", "metrics.sqlite")
+
+PREFIX = "bahnabfrage_"
+
+# Sekunden - von Cache-Treffern bis zu langsamen Sweeps
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "api_request_seconds": "Dauer von DB API Anfragen inkl. Body",
+    "api_requests_total": "DB API Anfragen nach Endpunkt und Status",
+    "api_response_bytes_total": "Empfangene Bytes der DB API (über die Leitung, vor gzip-Dekodierung)",
+    "api_failovers_total": "Wechsel auf den nächsten API-Endpunkt nach Fehler",
+    "api_hedged_requests_total": "Zusätzliche Anfragen nach Überschreiten der p95-Latenz",
+    "api_circuit_rejections_total": "Sofort abgelehnte Anfragen (alle Endpunkte gesperrt)",
+    "api_coalesced_requests_total": "Abfragen ohne eigenen Request (Ergebnis einer gleichen laufenden Abfrage)",
+    "journey_parse_failures_total": "Verbindungen die nicht geparst werden konnten",
+    "journey_filter_rejections_total": "Durch Filterregeln verworfene Verbindungen je Regel",
+    "rate_limit_tokens_total": "Entnommene Rate-Limit Tokens",
+    "rate_limit_wait_seconds": "Wartezeit auf ein Rate-Limit Token",
+    "rate_limit_timeouts_total": "Anfragen ohne Token innerhalb der maximalen Wartezeit",
+    "rate_limit_tokens_available": "Verfügbare Tokens im Bucket (beim letzten Flush)",
+    "cache_lookups_total": "Cache-Ergebnisse (hits, stale_hits, misses, stale_on_error)",
+    "telegram_request_seconds": "Dauer von Telegram API Anfragen",
+    "telegram_delivery_seconds": "Zeit vom Einreihen bis zur Zustellung einer Telegram Nachricht",
+    "telegram_messages_total": "Telegram Nachrichten nach Ergebnis",
+    "telegram_retries_total": "Erneute Zustellversuche nach Grund",
+    "check_seconds": "Dauer eines kompletten Checks",
+    "shard_leases_held": "Shards, auf die dieser Container eine Lease hält",
+    "checks_total": "Durchgeführte Checks nach Ergebnis",
+    "last_check_timestamp_seconds": "Zeitpunkt des letzten Checks (Unix)",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _sort_key(row: Tuple[str, str, str, str, float]) -> Tuple:
+    """Histogramm-Buckets numerisch nach le sortieren (+Inf zuletzt)"""
+    family, _, name, labels, _ = row
+    bound = 0.0
+    if 'le="' in labels:
+        le = labels.split('le="', 1)[1].split('"', 1)[0]
+        bound = float("inf") if le == "+Inf" else float(le)
+        labels = labels.replace(f'le="{le}"', "")
+    return family, name, labels, bound
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metrics:
+    """Metrik-Sammlung eines Prozesses - mit db_path persistent und prozessübergreifend summiert"""
+
+    def __init__(self, db_path: Optional[str] = None, textfile_path: Optional[str] = None):
+        self.db_path = db_path
+        self.textfile_path = textfile_path
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # Seit dem letzten Flush: (Familie, Typ, Sample-Name, Labels) → Wert
+        self._counters: Dict[Tuple[str, str, str, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[str, str, str, LabelKey], float] = {}
+        # Gesamtwerte dieses Prozesses (für Log-Zusammenfassung)
+        self._totals: Dict[Tuple[str, LabelKey], float] = {}
+        self._collectors: List[Callable[["Metrics"], None]] = []
+        self._conn = self._connect() if db_path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Tabelle an"""
+        if self.db_path != ":memory:":
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " family TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " labels TEXT NOT NULL,"
+            " value REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (name, labels))"
+        )
+        conn.commit()
+        return conn
+
+    def inc(self, family: str, value: float = 1.0, **labels):
+        """Zähler erhöhen"""
+        key = _label_key(labels)
+        with self._lock:
+            sample = (family, "counter", family, key)
+            self._counters[sample] = self._counters.get(sample, 0.0) + value
+            self._totals[(family, key)] = self._totals.get((family, key), 0.0) + value
+
+    def observe(self, family: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels):
+        """Messwert in Histogramm eintragen (kumulative Buckets wie bei Prometheus)"""
+        key = _label_key(labels)
+        with self._lock:
+            for bound in buckets + (float("inf"),):
+                if value <= bound:
+                    sample = (family, "histogram", f"{family}_bucket", key + (("le", _format_value(bound)),))
+                    self._counters[sample] = self._counters.get(sample, 0.0) + 1
+            for suffix, amount in (("_sum", value), ("_count", 1.0)):
+                sample = (family, "histogram", family + suffix, key)
+                self._counters[sample] = self._counters.get(sample, 0.0) + amount
+            self._totals[(family + "_sum", key)] = self._totals.get((family + "_sum", key), 0.0) + value
+            self._totals[(family + "_count", key)] = self._totals.get((family + "_count", key), 0.0) + 1
+
+    def set_gauge(self, family: str, value: float, **labels):
+        """Momentanwert setzen (überschreibt beim Flush)"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges[(family, "gauge", family, key)] = value
+
+    @contextmanager
+    def timer(self, family: str, **labels) -> Iterator[None]:
+        """Dauer eines Blocks als Histogramm-Messwert"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(family, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector: Callable[["Metrics"], None]):
+        """Funktion die vor jedem Flush aktuelle Gauges setzt"""
+        self._collectors.append(collector)
+
+    def total(self, family: str, **labels) -> float:
+        """Summe eines Zählers in diesem Prozess (Labels als Filter, leer = alle)"""
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(value for (name, key), value in self._totals.items()
+                       if name == family and wanted <= set(key))
+
+    def _collect(self):
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                self.logger.debug(f"Metrik-Collector fehlgeschlagen: {str(e)}")
+
+    def flush(self):
+        """Seit dem letzten Flush gesammelte Werte in SQLite aufsummieren und Textdatei schreiben"""
+        self._collect()
+        if self._conn is None:
+            return
+
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            gauges, self._gauges = self._gauges, {}
+            if not counters and not gauges:
+                return
+            now = time.time()
+            try:
+                self._conn.executemany(
+                    "INSERT INTO samples (family, kind, name, labels, value, updated_at) VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value,"
+                    " updated_at = excluded.updated_at",
+                    [(family, kind, name, _format_labels(key), value, now)
+                     for (family, kind, name, key), value in counters.items()]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO samples (family, kind, name, labels, value, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(family, kind, name, _format_labels(key), value, now)
+                     for (family, kind, name, key), value in gauges.items()]
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Metriken konnten nicht gespeichert werden: {str(e)}")
+                return
+
+        if self.textfile_path:
+            self._write_textfile()
+
+    def render_prometheus(self) -> str:
+        """Alle gespeicherten Werte im Prometheus Text-Format (0.0.4)"""
+        if self._conn is None:
+            rows = self._pending_rows()
+        else:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT family, kind, name, labels, value FROM samples ORDER BY family, name, labels"
+                ).fetchall()
+
+        lines = []
+        current_family = None
+        for family, kind, name, labels, value in sorted(rows, key=_sort_key):
+            if family != current_family:
+                current_family = family
+                if family in HELP:
+                    lines.append(f"# HELP {PREFIX}{family} {HELP[family]}")
+                lines.append(f"# TYPE {PREFIX}{family} {kind}")
+            lines.append(f"{PREFIX}{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _pending_rows(self) -> List[Tuple[str, str, str, str, float]]:
+        """Ohne Datenbank: noch nicht geflushte Werte dieses Prozesses"""
+        with self._lock:
+            samples = list(self._counters.items()) + list(self._gauges.items())
+        return sorted((family, kind, name, _format_labels(key), value)
+                      for (family, kind, name, key), value in samples)
+
+    def _write_textfile(self):
+        """Textdatei atomar ersetzen (Collector liest nie eine halbe Datei)"""
+        directory = os.path.dirname(self.textfile_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(temp_path, self.textfile_path)
+        except OSError as e:
+            self.logger.error(f"Metrik-Datei konnte nicht geschrieben werden: {str(e)}")
+
+    def close(self):
+        """Restliche Werte speichern und SQLite-Verbindung schließen"""
+        self.flush()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+
+def create_metrics(config) -> Optional[Metrics]:
+    """Erstelle persistente Metriken aus der Konfiguration (None falls deaktiviert)"""
+    if not config.metrics_enabled:
+        return None
+    return Metrics(db_path=config.metrics_db_path, textfile_path=config.metrics_textfile_path or None)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Query Profiles
+Benannte Parameter-Sätze für /journeys: welche Zusatzdaten die API mitschickt
+(Zwischenhalte, Hinweise, Polylinien, Tickets) und welche Journey-Felder daraus
+befüllt werden. Ohne Profil liefert die API ihren Standardumfang (u.a. Hinweise
+je Leg und Unter-Haltestellen), von dem nur Zeiten und Fahrten gebraucht werden
+
+db-rest kennt keine Schalter, die eine Verbindung schlanker machen als die von
+standard abgeschalteten - Legs mit Halten und Linien kommen immer mit. probe spart
+auf der Leitung daher nur über weniger Ergebnisse je Einzelabfrage (max_results),
+gegenüber standard zusätzlich beim Parsen (keine Legs, kein Preis)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+
+# Felder die jedes Profil befüllt
+CORE_FIELDS = frozenset({"departure_time", "arrival_time", "duration_minutes", "transfers", "trip_ids", "line_names"})
+
+# Gemeinsame Ausschlüsse der schlanken Profile (db-rest v6 Parameter)
+_LEAN_PARAMS = {
+    "stopovers": "false",
+    "remarks": "false",
+    "polylines": "false",
+    "tickets": "false",
+    "subStops": "false",
+    "entrances": "false",
+    "scheduledDays": "false",
+    "language": "de",
+}
+
+
+@dataclass(frozen=True)
+class QueryProfile:
+    """API-Parameter und befüllte Journey-Felder eines Profils"""
+    name: str
+    params: Dict[str, str]
+    fields: FrozenSet[str]
+    description: str
+    # Obergrenze für Ergebnisse einer Einzelabfrage (Sweeps blättern weiter mit ihrer Seitengröße)
+    max_results: Optional[int] = None
+
+    def populates(self, field: str) -> bool:
+        """Wird das Journey-Feld in diesem Profil befüllt?"""
+        return field in self.fields
+
+
+QUERY_PROFILES: Dict[str, QueryProfile] = {
+    profile.name: profile for profile in (
+        QueryProfile(
+            name="probe",
+            params=dict(_LEAN_PARAMS),
+            fields=CORE_FIELDS,
+            description="Nur Zeiten, Umstiege und Fahrten, höchstens 5 Ergebnisse je Einzelabfrage "
+                        "- z.B. für Erreichbarkeit",
+            max_results=5
+        ),
+        QueryProfile(
+            name="standard",
+            params=dict(_LEAN_PARAMS),
+            fields=CORE_FIELDS | {"price", "legs"},
+            description="Wie probe, zusätzlich Preis und Legs (Gleise, Linien) ohne Hinweise"
+        ),
+        QueryProfile(
+            name="full",
+            params={
+                "stopovers": "true",
+                "remarks": "true",
+                "polylines": "true",
+                "tickets": "true",
+                "language": "de",
+            },
+            fields=CORE_FIELDS | {"price", "legs"},
+            description="Alles inkl. Zwischenhalten, Hinweisen, Polylinien und Tickets in den Legs (Debugging)"
+        ),
+    )
+}
+
+DEFAULT_QUERY_PROFILE = "standard"
+
+
+def get_query_profile(name: str) -> QueryProfile:
+    """Profil nach Name (ValueError bei unbekanntem Namen)"""
+    try:
+        return QUERY_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unbekanntes Abfrageprofil '{name}' (verfügbar: {', '.join(QUERY_PROFILES)})")
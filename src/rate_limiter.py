@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter
+Token-Bucket für die Community API, gespeichert in SQLite
+Alle Prozesse und Threads auf dem Host teilen sich ein gemeinsames Budget
+(Cron-Läufe, Entrypoint-Checks, Daemon)
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from metrics import Metrics
+
+DEFAULT_RATE_LIMIT_PATH = os.path.join("data", "rate_limit.sqlite")
+
+
+class RateLimitTimeout(Exception):
+    """Kein Token innerhalb der maximalen Wartezeit verfügbar"""
+
+
+class TokenBucketRateLimiter:
+    """Prozessübergreifender Token-Bucket (SQLite-Datei als gemeinsamer Zustand)"""
+
+    def __init__(self,
+                 db_path: str = DEFAULT_RATE_LIMIT_PATH,
+                 requests_per_window: int = 75,
+                 window_seconds: float = 60,
+                 bucket_name: str = "db_api",
+                 metrics: Optional[Metrics] = None):
+        self.db_path = db_path
+        self.capacity = float(requests_per_window)
+        self.refill_rate = requests_per_window / window_seconds  # Tokens pro Sekunde
+        self.bucket_name = bucket_name
+        self.logger = logging.getLogger(__name__)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector(
+            lambda metrics: metrics.set_gauge("rate_limit_tokens_available", self.available_tokens(),
+                                              bucket=self.bucket_name)
+        )
+
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+        # Statistik dieses Prozesses
+        self.stats = {
+            "tokens_acquired": 0,
+            "total_wait_seconds": 0.0,
+            "last_wait_seconds": 0.0,
+            "timeouts": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Bucket-Tabelle an"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # isolation_level=None: Transaktionen explizit über BEGIN IMMEDIATE steuern
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " name TEXT PRIMARY KEY,"
+            " tokens REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _try_take(self) -> float:
+        """Versuche ein Token zu nehmen - liefert 0 bei Erfolg, sonst Sekunden bis zum nächsten Token"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?",
+                    (self.bucket_name,)
+                ).fetchone()
+
+                if row is None:
+                    tokens = self.capacity
+                else:
+                    tokens, updated_at = row
+                    # Uhr-Sprünge rückwärts nicht als negative Zeit werten
+                    elapsed = max(0.0, now - updated_at)
+                    tokens = min(self.capacity, tokens + elapsed * self.refill_rate)
+
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                    wait = 0.0
+                else:
+                    wait = (1.0 - tokens) / self.refill_rate
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.bucket_name, tokens, now)
+                )
+                conn.execute("COMMIT")
+                return wait
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def acquire(self, max_wait: float = 60) -> float:
+        """Blockiere bis ein Token verfügbar ist - liefert die Wartezeit in Sekunden"""
+        start = time.monotonic()
+        deadline = start + max_wait
+
+        while True:
+            wait = self._try_take()
+            if wait == 0.0:
+                waited = time.monotonic() - start
+                with self._lock:
+                    self.stats["tokens_acquired"] += 1
+                    self.stats["total_wait_seconds"] += waited
+                    self.stats["last_wait_seconds"] = waited
+                self.metrics.inc("rate_limit_tokens_total", bucket=self.bucket_name)
+                self.metrics.observe("rate_limit_wait_seconds", waited, bucket=self.bucket_name)
+                if waited > 0.1:
+                    self.logger.info(f"Rate Limit: {waited:.2f}s auf Token gewartet")
+                return waited
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                self.metrics.inc("rate_limit_timeouts_total", bucket=self.bucket_name)
+                raise RateLimitTimeout(f"Kein API-Token innerhalb von {max_wait:.0f}s verfügbar")
+
+            self.logger.debug(f"Rate Limit erreicht - warte {min(wait, remaining):.2f}s auf Token")
+            time.sleep(min(wait, remaining))
+
+    def available_tokens(self) -> float:
+        """Aktuell verfügbare Tokens (gemeinsamer Bucket aller Prozesse, ohne Entnahme)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?",
+                (self.bucket_name,)
+            ).fetchone()
+        if row is None:
+            return self.capacity
+        tokens, updated_at = row
+        return min(self.capacity, tokens + max(0.0, time.time() - updated_at) * self.refill_rate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hole Limiter-Statistik dieses Prozesses"""
+        return dict(self.stats)
+
+    def close(self):
+        """Schließe SQLite-Verbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_rate_limiter(config, metrics: Optional[Metrics] = None) -> TokenBucketRateLimiter:
+    """Erstelle Rate Limiter aus der Konfiguration"""
+    return TokenBucketRateLimiter(
+        db_path=config.rate_limit_db_path,
+        requests_per_window=config.rate_limit_requests,
+        window_seconds=config.rate_limit_window_seconds,
+        metrics=metrics
+    )
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Scheduler
+Interner Zeitplaner für den Daemon-Modus (ersetzt die Cron-Einträge)
+Unterstützt Cron-Ausdrücke (5 Felder) oder feste Intervalle, jeweils mit Jitter
+"""
+
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+
+
+class CronExpression:
+    """Minimaler Cron-Parser: Minute Stunde Tag Monat Wochentag (*, Listen, Bereiche, Schritte)"""
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron-Ausdruck braucht 5 Felder: '{expression}'")
+
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+
+        # Sonntag als 0 oder 7
+        if 7 in weekdays:
+            weekdays = (weekdays - {7}) | {0}
+        self.weekdays = weekdays
+
+        # Cron-Semantik: sind Tag UND Wochentag eingeschränkt, reicht einer der beiden
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        """Parse ein Cron-Feld in die Menge erlaubter Werte"""
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_str = part.split("/", 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Ungültige Schrittweite in '{field}'")
+
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start_str, end_str = part.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Wert außerhalb {low}-{high} in '{field}'")
+
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        """Prüfe Tag/Wochentag nach Cron-Semantik"""
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Nächster passender Zeitpunkt strikt nach moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (1 if candidate.month == 12 else 0)
+                month = 1 if candidate.month == 12 else candidate.month + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+
+        raise ValueError(f"Cron-Ausdruck '{self.expression}' liefert keinen Zeitpunkt")
+
+
+class Scheduler:
+    """Führt einen Job nach Cron-Ausdruck oder Intervall aus, bis stop() aufgerufen wird"""
+
+    def __init__(self,
+                 cron: Optional[str] = None,
+                 interval_seconds: Optional[float] = None,
+                 jitter_seconds: float = 0,
+                 run_on_start: bool = False,
+                 next_run_fn: Optional[Callable[[datetime], datetime]] = None):
+        if not cron and not interval_seconds and next_run_fn is None:
+            raise ValueError("Scheduler braucht einen Cron-Ausdruck, ein Intervall oder eine Zeitplan-Funktion")
+
+        # Zeitplan-Funktion (z.B. adaptives Polling) hat Vorrang vor Intervall und Cron
+        self.next_run_fn = next_run_fn
+        self.cron = CronExpression(cron) if cron and not interval_seconds and next_run_fn is None else None
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.run_on_start = run_on_start
+        self.logger = logging.getLogger(__name__)
+
+        # Nächster geplanter Lauf (für /status)
+        self.next_run_at: Optional[datetime] = None
+
+        self._stop_event = threading.Event()
+        self._hooks: List[Callable[[], None]] = []
+
+    def describe(self) -> str:
+        """Lesbare Beschreibung des Zeitplans"""
+        if self.next_run_fn is not None:
+            base = "adaptiv"
+        elif self.cron:
+            base = f"Cron '{self.cron.expression}'"
+        else:
+            base = f"alle {self.interval_seconds:.0f}s"
+        sign = "+" if self.next_run_fn is not None else "±"
+        return f"{base} (Jitter {sign}{self.jitter_seconds:.0f}s)" if self.jitter_seconds else base
+
+    def next_run(self, now: datetime) -> datetime:
+        """Nächster Ausführungszeitpunkt inkl. Jitter"""
+        if self.next_run_fn is not None:
+            # Nur nach hinten verschieben - ein zu früher Lauf fände nichts Fälliges
+            scheduled = self.next_run_fn(now)
+            if self.jitter_seconds:
+                scheduled += timedelta(seconds=random.uniform(0, self.jitter_seconds))
+            return max(scheduled, now)
+
+        if self.cron:
+            scheduled = self.cron.next_after(now)
+        else:
+            scheduled = now + timedelta(seconds=self.interval_seconds)
+
+        if self.jitter_seconds:
+            scheduled += timedelta(seconds=random.uniform(-self.jitter_seconds, self.jitter_seconds))
+        return max(scheduled, now)
+
+    def add_shutdown_hook(self, hook: Callable[[], None]):
+        """Registriere Aufräum-Funktion für das Beenden"""
+        self._hooks.append(hook)
+
+    def stop(self):
+        """Beende die Schleife (signal-sicher)"""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run_forever(self, job: Callable[[], object]):
+        """Scheduler-Schleife - blockiert bis stop()"""
+        self.logger.info(f"⏰ Scheduler gestartet: {self.describe()}")
+
+        if self.run_on_start and not self.stopped:
+            self._run_job(job)
+
+        while not self.stopped:
+            now = datetime.now()
+            next_run = self.next_run(now)
+            self.next_run_at = next_run
+            wait_seconds = (next_run - now).total_seconds()
+            self.logger.info(f"Nächster Check: {next_run.strftime('%d.%m.%Y %H:%M:%S')}")
+
+            # Event.wait statt sleep - SIGTERM beendet sofort
+            if self._stop_event.wait(timeout=wait_seconds):
+                break
+
+            self._run_job(job)
+
+        self.logger.info("Scheduler beendet - räume auf")
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception as e:
+                self.logger.error(f"Fehler beim Beenden: {str(e)}")
+
+    def _run_job(self, job: Callable[[], object]):
+        """Führe Job aus - Fehler beenden den Daemon nicht"""
+        try:
+            job()
+        except Exception as e:
+            self.logger.error(f"Fehler im geplanten Check: {str(e)}")
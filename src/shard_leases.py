@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Shard Leases
+Verteilt die Überwachungen auf mehrere gleichartige Container (je eigene IP und Rate-Budget)
+- Jede Überwachung gehört über ihre ID fest zu einem von SHARD_COUNT Shards
+- Container beanspruchen Shards über ablaufende Leases in einer gemeinsamen SQLite-Datei
+  (geteiltes Volume) und erneuern sie im Hintergrund
+- Jeder nimmt sich seinen gerechten Anteil (Shards / lebende Container); fällt ein Container
+  aus, laufen seine Leases ab und die übrigen übernehmen die Shards
+"""
+
+import os
+import math
+import time
+import zlib
+import socket
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from metrics import Metrics
+from watch_registry import Watch
+
+DEFAULT_LEASE_PATH = os.path.join("data", "leases.sqlite")
+
+
+def shard_of(watch_id: str, shard_count: int) -> int:
+    """Shard einer Überwachung (stabil über Prozesse und Neustarts)"""
+    return zlib.crc32(watch_id.encode("utf-8")) % shard_count
+
+
+def default_worker_id() -> str:
+    """Hostname (in Docker die Container-ID) und PID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardLeaseManager:
+    """Beansprucht und erneuert Shard-Leases in einer gemeinsamen SQLite-Datei"""
+
+    def __init__(self,
+                 db_path: str = DEFAULT_LEASE_PATH,
+                 shard_count: int = 4,
+                 worker_id: Optional[str] = None,
+                 lease_seconds: float = 90,
+                 metrics: Optional[Metrics] = None):
+        if shard_count < 1:
+            raise ValueError("shard_count muss mindestens 1 sein")
+        self.db_path = db_path
+        self.shard_count = shard_count
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.logger = logging.getLogger(__name__)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector(lambda metrics: metrics.set_gauge("shard_leases_held", len(self.held)))
+
+        # Aktuell gehaltene Shards (nach der letzten Erneuerung)
+        self.held: Set[int] = set()
+        self.live_workers = 0
+        # Aufgerufen mit (gewonnene, abgegebene) Shards wenn sich der Bestand ändert
+        self._listeners: List[Callable[[Set[int], Set[int]], None]] = []
+
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Tabellen an"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # isolation_level=None: Transaktionen explizit über BEGIN IMMEDIATE steuern
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS workers ("
+            " worker_id TEXT PRIMARY KEY,"
+            " heartbeat_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " shard INTEGER PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        return conn
+
+    def add_change_listener(self, listener: Callable[[Set[int], Set[int]], None]):
+        """Callback bei geänderten Shards - z.B. um Zustand abgegebener Überwachungen zu verwerfen"""
+        self._listeners.append(listener)
+
+    def _notify_change(self, gained: Set[int], lost: Set[int]):
+        for listener in self._listeners:
+            try:
+                listener(gained, lost)
+            except Exception as e:
+                self.logger.error(f"Fehler bei Shard-Änderung: {str(e)}")
+
+    def renew(self) -> Set[int]:
+        """Leases erneuern und auf den gerechten Anteil bringen - liefert die gehaltenen Shards
+
+        Überzählige Shards (ein weiterer Container ist hinzugekommen) werden freigegeben,
+        freie oder abgelaufene bis zum Anteil übernommen. Ist die Datei nicht erreichbar,
+        bleiben die bisherigen Shards bis zum Ablauf ihrer Leases gültig
+        """
+        with self._lock:
+            conn = self._conn
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error as e:
+                self.logger.error(f"Shard-Leases nicht erreichbar: {str(e)}")
+                return set(self.held)
+            try:
+                now = time.time()
+                expires_at = now + self.lease_seconds
+                conn.execute(
+                    "INSERT OR REPLACE INTO workers (worker_id, heartbeat_at) VALUES (?, ?)",
+                    (self.worker_id, now)
+                )
+                conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (now - self.lease_seconds,))
+                live_workers = conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+                share = math.ceil(self.shard_count / live_workers)
+
+                leases = {shard: (owner, lease_expires)
+                          for shard, owner, lease_expires in conn.execute("SELECT shard, owner, expires_at FROM leases")}
+                own = sorted(shard for shard, (owner, lease_expires) in leases.items()
+                             if owner == self.worker_id and shard < self.shard_count)
+
+                # Überzählige abgeben (höchste zuerst), Rest verlängern
+                for shard in own[share:]:
+                    conn.execute("DELETE FROM leases WHERE shard = ? AND owner = ?", (shard, self.worker_id))
+                own = own[:share]
+                for shard in own:
+                    conn.execute("UPDATE leases SET expires_at = ? WHERE shard = ?", (expires_at, shard))
+
+                # Freie und abgelaufene Shards bis zum Anteil übernehmen
+                free = [shard for shard in range(self.shard_count)
+                        if shard not in leases or (leases[shard][0] != self.worker_id and leases[shard][1] < now)]
+                taken = free[:max(0, share - len(own))]
+                for shard in taken:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO leases (shard, owner, expires_at) VALUES (?, ?, ?)",
+                        (shard, self.worker_id, expires_at)
+                    )
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK")
+                self.logger.error(f"Shard-Leases konnten nicht erneuert werden: {str(e)}")
+                return set(self.held)
+
+            held = set(own) | set(taken)
+            previous = self.held
+            if held != previous:
+                self.logger.info(f"Shards {sorted(held)} von {self.shard_count} "
+                                 f"({live_workers} Container, Anteil {share})")
+            self.held = held
+            self.live_workers = live_workers
+
+        if held != previous:
+            self._notify_change(held - previous, previous - held)
+        return set(held)
+
+    def owns(self, watch: Watch) -> bool:
+        """Gehört die Überwachung zu einem gehaltenen Shard?"""
+        return shard_of(watch.id, self.shard_count) in self.held
+
+    def filter(self, watches: List[Watch]) -> List[Watch]:
+        """Nur Überwachungen der gehaltenen Shards"""
+        return [watch for watch in watches if self.owns(watch)]
+
+    def start(self):
+        """Leases beanspruchen und im Hintergrund erneuern (alle lease_seconds / 3)"""
+        self.renew()
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="shard-leases", daemon=True)
+        self._worker.start()
+
+    def _run(self):
+        """Erneuerungs-Schleife des Hintergrund-Threads"""
+        while not self._stop_event.wait(timeout=self.lease_seconds / 3):
+            self.renew()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Zustand dieses Containers"""
+        return {
+            "worker_id": self.worker_id,
+            "shards": sorted(self.held),
+            "shard_count": self.shard_count,
+            "live_workers": self.live_workers,
+        }
+
+    def release(self):
+        """Leases sofort freigeben (beim Beenden) - andere Container übernehmen ohne Ablauf abzuwarten"""
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM leases WHERE owner = ?", (self.worker_id,))
+                self._conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            except sqlite3.Error as e:
+                self.logger.error(f"Shard-Leases konnten nicht freigegeben werden: {str(e)}")
+            previous, self.held = self.held, set()
+        if previous:
+            self._notify_change(set(), previous)
+
+    def close(self):
+        """Leases freigeben und SQLite-Verbindung schließen"""
+        self.release()
+        with self._lock:
+            self._conn.close()
+
+
+def create_shard_lease_manager(config, metrics: Optional[Metrics] = None) -> Optional[ShardLeaseManager]:
+    """Erstelle Lease-Manager aus der Konfiguration (None falls SHARD_COUNT=0)"""
+    if not config.shard_count:
+        return None
+    return ShardLeaseManager(
+        db_path=config.shard_lease_db_path,
+        shard_count=config.shard_count,
+        worker_id=config.shard_worker_id,
+        lease_seconds=config.shard_lease_seconds,
+        metrics=metrics
+    )
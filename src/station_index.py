@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Station Index
+Persistenter lokaler Index Stationsname → Station-ID
+- Normalisierung (Umlaute, Groß-/Kleinschreibung, Hbf/Hauptbahnhof)
+- Exakte, Präfix- und Trigramm-Fuzzy-Suche im Speicher
+- Füllt sich automatisch aus /locations Antworten, Offline-Import aus JSON/CSV
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import bisect
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Iterable, Any
+
+from db_client import Station, HAMBURG_HBF_ID, LANDECK_ZAMS_ID
+
+DEFAULT_STATION_INDEX_PATH = os.path.join("data", "stations.sqlite")
+
+# Bekannte Stationen - damit die Standard-Route ohne API-Aufruf auflösbar ist
+BUILTIN_STATIONS = [
+    Station(id=HAMBURG_HBF_ID, name="Hamburg Hbf", latitude=53.552736, longitude=10.006909),
+    Station(id=LANDECK_ZAMS_ID, name="Landeck-Zams", latitude=47.146427, longitude=10.566955),
+]
+
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", "é": "e", "è": "e"})
+_ABBREVIATIONS = [
+    (re.compile(r"\bhauptbahnhof\b"), "hbf"),
+    (re.compile(r"\bbahnhof\b"), "bf"),
+    (re.compile(r"\bsankt\b"), "st"),
+]
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_station_name(name: str) -> str:
+    """Normalisiere Stationsnamen für den Vergleich ("Zürich Hauptbahnhof" → "zuerich hbf")"""
+    text = name.lower().translate(_UMLAUTS)
+    text = text.replace("(", " ").replace(")", " ")
+    for pattern, replacement in _ABBREVIATIONS:
+        text = pattern.sub(replacement, text)
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Trigramme mit Randmarkierung"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StationIndex:
+    """Lokaler Stationsindex (SQLite persistent, Suche komplett im Speicher)"""
+
+    def __init__(self, db_path: str = DEFAULT_STATION_INDEX_PATH, min_fuzzy_score: float = 0.5):
+        self.db_path = db_path
+        self.min_fuzzy_score = min_fuzzy_score
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, Station] = {}
+        self._by_name: Dict[str, str] = {}          # normalisierter Name → ID
+        self._trigram_index: Dict[str, Set[str]] = {}  # Trigramm → normalisierte Namen
+        self._trigram_counts: Dict[str, int] = {}      # normalisierter Name → Anzahl Trigramme
+        self._sorted_names: List[str] = []
+
+        self._conn = self._connect()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Stations-Tabelle an"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS stations ("
+            " id TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " latitude REAL,"
+            " longitude REAL)"
+        )
+        conn.commit()
+        return conn
+
+    def _load(self):
+        """Lade persistierte Stationen in den Speicher-Index"""
+        rows = self._conn.execute("SELECT id, name, latitude, longitude FROM stations").fetchall()
+        for station_id, name, lat, lon in rows:
+            self._index(Station(id=station_id, name=name, latitude=lat, longitude=lon))
+
+        for station in BUILTIN_STATIONS:
+            if station.id not in self._by_id:
+                self._index(station)
+
+        self._sorted_names = sorted(self._by_name)
+        self.logger.debug(f"Stationsindex geladen: {len(self._by_id)} Stationen")
+
+    def _index(self, station: Station):
+        """Station in die Speicher-Indizes aufnehmen"""
+        normalized = normalize_station_name(station.name)
+        if not normalized:
+            return
+        self._by_id[station.id] = station
+        self._by_name[normalized] = station.id
+        grams = _trigrams(normalized)
+        self._trigram_counts[normalized] = len(grams)
+        for gram in grams:
+            self._trigram_index.setdefault(gram, set()).add(normalized)
+
+    def add_stations(self, stations: Iterable[Station]) -> int:
+        """Füge Stationen hinzu (persistent) - liefert Anzahl neuer Einträge"""
+        added = 0
+        with self._lock:
+            rows = []
+            for station in stations:
+                if not station.id or not station.name:
+                    continue
+                if station.id not in self._by_id:
+                    added += 1
+                self._index(station)
+                rows.append((station.id, station.name, station.latitude, station.longitude))
+
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO stations (id, name, latitude, longitude) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+                self._sorted_names = sorted(self._by_name)
+
+        return added
+
+    def add_locations(self, locations: List[Dict[str, Any]]) -> int:
+        """Übernehme Stationen aus einer /locations API-Antwort"""
+        stations = []
+        for location in locations:
+            if location.get("type") != "station":
+                continue
+            coords = location.get("location") or {}
+            stations.append(Station(
+                id=location.get("id"),
+                name=location.get("name", ""),
+                latitude=coords.get("latitude"),
+                longitude=coords.get("longitude")
+            ))
+        return self.add_stations(stations)
+
+    def get(self, station_id: str) -> Optional[Station]:
+        """Hole Station anhand der ID"""
+        return self._by_id.get(station_id)
+
+    def resolve(self, query: str, fuzzy: bool = True) -> Optional[Station]:
+        """Finde Station: exakt → Präfix → Trigramm-Ähnlichkeit (fuzzy=False: nur ID und exakter Name)"""
+        normalized = normalize_station_name(query)
+        if not normalized:
+            return None
+
+        # Direkte ID-Angabe (z.B. "8002549")
+        if query.strip() in self._by_id:
+            return self._by_id[query.strip()]
+
+        station_id = self._by_name.get(normalized)
+        if station_id:
+            return self._by_id[station_id]
+
+        if not fuzzy:
+            return None
+
+        prefix_match = self._prefix_match(normalized)
+        if prefix_match:
+            return self._by_id[self._by_name[prefix_match]]
+
+        fuzzy_match = self._fuzzy_match(normalized)
+        if fuzzy_match:
+            return self._by_id[self._by_name[fuzzy_match]]
+
+        return None
+
+    def _prefix_match(self, normalized: str) -> Optional[str]:
+        """Kürzester Name der mit der Anfrage beginnt (binäre Suche in sortierter Liste)"""
+        names = self._sorted_names
+        position = bisect.bisect_left(names, normalized)
+        best = None
+        while position < len(names) and names[position].startswith(normalized):
+            if best is None or len(names[position]) < len(best):
+                best = names[position]
+            position += 1
+        return best
+
+    def _fuzzy_match(self, normalized: str) -> Optional[str]:
+        """Bester Treffer nach Trigramm-Dice-Koeffizient"""
+        query_grams = _trigrams(normalized)
+        shared: Dict[str, int] = {}
+        for gram in query_grams:
+            for name in tuple(self._trigram_index.get(gram, ())):
+                shared[name] = shared.get(name, 0) + 1
+
+        best_name, best_score = None, 0.0
+        for name, count in shared.items():
+            score = 2 * count / (len(query_grams) + self._trigram_counts[name])
+            if score > best_score:
+                best_name, best_score = name, score
+
+        if best_score >= self.min_fuzzy_score:
+            return best_name
+        return None
+
+    def import_file(self, path: str) -> int:
+        """Offline-Import aus JSON (Liste oder /locations-Format) oder CSV (id,name[,latitude,longitude])"""
+        if path.lower().endswith(".csv"):
+            with open(path, encoding="utf-8", newline="") as f:
+                stations = [
+                    Station(
+                        id=row["id"],
+                        name=row["name"],
+                        latitude=float(row["latitude"]) if row.get("latitude") else None,
+                        longitude=float(row["longitude"]) if row.get("longitude") else None
+                    )
+                    for row in csv.DictReader(f)
+                ]
+            return self.add_stations(stations)
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = list(data.values())
+
+        # /locations-Format (mit "type") oder einfache {id, name} Objekte
+        for entry in data:
+            entry.setdefault("type", "station")
+        return self.add_locations(data)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def close(self):
+        """Schließe SQLite-Verbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_station_index(config) -> StationIndex:
+    """Erstelle Stationsindex aus der Konfiguration"""
+    return StationIndex(db_path=config.station_index_path)
+
+
+if __name__ == "__main__":
+    # Offline-Import: python src/station_index.py stations.json [weitere Dateien]
+    if len(sys.argv) < 2:
+        print("Verwendung: python src/station_index.py <stations.json|stations.csv> [...]")
+        sys.exit(1)
+
+    index = StationIndex(os.getenv("STATION_INDEX_PATH", DEFAULT_STATION_INDEX_PATH))
+    for file_path in sys.argv[1:]:
+        count = index.import_file(file_path)
+        print(f"✅ {count} neue Stationen aus {file_path} importiert")
+    print(f"📊 Stationsindex enthält {len(index)} Stationen")
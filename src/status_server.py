@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Status Server
+Eingebetteter HTTP-Server für den Daemon-Modus (ersetzt den config.py Healthcheck)
+- /healthz: Prozess lebt, Checks laufen und schlagen nicht wiederholt fehl
+- /readyz:  erster Check erfolgreich abgeschlossen
+- /status:  Zustand als JSON (letzter Check, API-Latenz, Telegram-Warteschlange, Fehlerserie)
+Alle Antworten kommen aus dem Speicher des laufenden Prozesses - keine API-Anfragen
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from connection_monitor import ConnectionMonitor
+    from scheduler import Scheduler
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds") if timestamp else None
+
+
+class StatusServer:
+    """HTTP-Server in einem Hintergrund-Thread, liest den Zustand von Monitor und Scheduler"""
+
+    def __init__(self,
+                 monitor: "ConnectionMonitor",
+                 scheduler: Optional["Scheduler"] = None,
+                 host: str = "0.0.0.0",
+                 port: int = 8080,
+                 max_error_streak: int = 3,
+                 max_check_seconds: float = 1800):
+        self.monitor = monitor
+        self.scheduler = scheduler
+        self.host = host
+        self.port = port
+        self.max_error_streak = max_error_streak
+        self.max_check_seconds = max_check_seconds
+        self.started_at = time.time()
+        self.logger = logging.getLogger(__name__)
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def health_problems(self) -> List[str]:
+        """Gründe für einen fehlgeschlagenen Healthcheck (leer = gesund)"""
+        problems = []
+        now = time.time()
+
+        check_started_at = self.monitor.check_started_at
+        if check_started_at and now - check_started_at > self.max_check_seconds:
+            problems.append(f"Check läuft seit {now - check_started_at:.0f}s")
+
+        if self.monitor.error_streak >= self.max_error_streak:
+            problems.append(f"{self.monitor.error_streak} Checks in Folge mit Fehlern")
+
+        # Geplanter Lauf nicht gestartet (Scheduler hängt)
+        next_run_at = self.scheduler.next_run_at if self.scheduler else None
+        if next_run_at and not check_started_at and now - next_run_at.timestamp() > self.max_check_seconds:
+            problems.append(f"Geplanter Check seit {now - next_run_at.timestamp():.0f}s überfällig")
+
+        return problems
+
+    @property
+    def ready(self) -> bool:
+        """Bereit sobald ein Check erfolgreich abgeschlossen wurde"""
+        return self.monitor.last_success_at is not None
+
+    def status(self) -> Dict[str, Any]:
+        """Zustand für /status"""
+        monitor = self.monitor
+        db_client = monitor.db_client
+        outbox = monitor.telegram.outbox
+        problems = self.health_problems()
+        last_check = dict(monitor.last_check)
+        if last_check:
+            last_check["started_at"] = _isoformat(last_check["started_at"])
+        next_run_at = self.scheduler.next_run_at if self.scheduler else None
+
+        return {
+            "status": "unhealthy" if problems else "ok",
+            "problems": problems,
+            "ready": self.ready,
+            "uptime_seconds": int(time.time() - self.started_at),
+            "check_running_since": _isoformat(monitor.check_started_at),
+            "last_check": last_check or None,
+            "last_success_at": _isoformat(monitor.last_success_at),
+            "next_check_at": next_run_at.isoformat(timespec="seconds") if next_run_at else None,
+            "error_streak": monitor.error_streak,
+            "watches": len(monitor.registry),
+            "shards": monitor.shards.get_stats() if monitor.shards is not None else None,
+            "api": {
+                "last_latency_seconds": (round(db_client.last_request_seconds, 3)
+                                         if db_client.last_request_seconds is not None else None),
+                "endpoints": db_client.endpoints.get_stats()["endpoints"],
+                "rate_limit": db_client.rate_limiter.get_stats(),
+            },
+            "telegram_queue": outbox.pending() if outbox is not None else 0,
+            "session": {
+                "total_api_calls": monitor.session_stats["total_api_calls"],
+                "dates_checked": monitor.session_stats["dates_checked"],
+                "connections_found": monitor.session_stats["connections_found"],
+                "errors": len(monitor.session_stats["errors"]),
+            },
+        }
+
+    def handle(self, path: str) -> Tuple[int, Dict[str, Any]]:
+        """HTTP-Status und JSON-Antwort für einen Pfad"""
+        path = path.split("?", 1)[0].rstrip("/")
+        if path == "/healthz":
+            problems = self.health_problems()
+            return (503 if problems else 200), {"status": "unhealthy" if problems else "ok", "problems": problems}
+        if path == "/readyz":
+            return (200 if self.ready else 503), {"ready": self.ready}
+        if path == "/status":
+            return 200, self.status()
+        return 404, {"error": "not found"}
+
+    def start(self):
+        """Starte HTTP-Server im Hintergrund"""
+        status_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    code, body = status_server.handle(self.path)
+                except Exception as e:
+                    status_server.logger.error(f"Status-Anfrage fehlgeschlagen: {str(e)}")
+                    code, body = 500, {"error": str(e)}
+                payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Häufige Health-Probes nicht ins Info-Log schreiben
+                status_server.logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="status-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Status-Server auf {self.host}:{self._server.server_address[1]} "
+                         "(/healthz, /readyz, /status)")
+
+    @property
+    def server_port(self) -> Optional[int]:
+        """Port auf dem der Server lauscht"""
+        return self._server.server_address[1] if self._server else None
+
+    def stop(self):
+        """Beende HTTP-Server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def create_status_server(config, monitor: "ConnectionMonitor",
+                         scheduler: Optional["Scheduler"] = None) -> Optional[StatusServer]:
+    """Erstelle Status-Server aus der Konfiguration (None falls STATUS_PORT=0)"""
+    if not config.status_port:
+        return None
+    return StatusServer(
+        monitor,
+        scheduler=scheduler,
+        host=config.status_host,
+        port=config.status_port,
+        max_error_streak=config.status_max_error_streak,
+        max_check_seconds=config.status_max_check_seconds
+    )
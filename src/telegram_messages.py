@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Telegram Messages
+Merkt sich pro Überwachung die Status-Nachricht (message_id + Inhalts-Hash)
+Damit kann die Nachricht per editMessageText aktualisiert werden statt jedes
+Mal eine neue Liste zu senden - unveränderter Inhalt wird gar nicht übertragen
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_MESSAGES_PATH = os.path.join("data", "telegram_messages.sqlite")
+
+
+def content_hash(text: str) -> str:
+    """Hash des gerenderten Inhalts (ohne Zeitstempel-Zeilen rendern!)"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class TrackedMessage:
+    """Gesendete Status-Nachricht"""
+    chat_id: str
+    ref: str
+    message_id: Optional[int]  # None solange die Nachricht noch in der Outbox liegt
+    content_hash: str
+    updated_at: float
+
+
+class TelegramMessageStore:
+    """Persistente Zuordnung (Chat, Referenz) → message_id und Inhalts-Hash"""
+
+    def __init__(self, db_path: str = DEFAULT_MESSAGES_PATH):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Tabelle an"""
+        if self.db_path != ":memory:":
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " chat_id TEXT NOT NULL,"
+            " ref TEXT NOT NULL,"
+            " message_id INTEGER,"
+            " content_hash TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (chat_id, ref))"
+        )
+        conn.commit()
+        return conn
+
+    def get(self, chat_id: str, ref: str) -> Optional[TrackedMessage]:
+        """Hole gemerkte Nachricht"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_id, content_hash, updated_at FROM messages WHERE chat_id = ? AND ref = ?",
+                (str(chat_id), ref)
+            ).fetchone()
+        if row is None:
+            return None
+        return TrackedMessage(chat_id=str(chat_id), ref=ref, message_id=row[0], content_hash=row[1], updated_at=row[2])
+
+    def remember(self, chat_id: str, ref: str, message_id: Optional[int], content_hash: str):
+        """Neue Status-Nachricht merken (message_id None = Versand ausstehend)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (chat_id, ref, message_id, content_hash, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (str(chat_id), ref, message_id, content_hash, time.time())
+            )
+            self._conn.commit()
+
+    def set_message_id(self, chat_id: str, ref: str, message_id: int):
+        """message_id nach erfolgreichem Versand nachtragen"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE messages SET message_id = ?, updated_at = ? WHERE chat_id = ? AND ref = ?",
+                (message_id, time.time(), str(chat_id), ref)
+            )
+            self._conn.commit()
+
+    def set_hash(self, chat_id: str, ref: str, content_hash: str):
+        """Inhalts-Hash nach Bearbeitung aktualisieren"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE messages SET content_hash = ?, updated_at = ? WHERE chat_id = ? AND ref = ?",
+                (content_hash, time.time(), str(chat_id), ref)
+            )
+            self._conn.commit()
+
+    def forget(self, chat_id: str, ref: str):
+        """Nachricht vergessen (z.B. gelöscht) - nächste Aktualisierung sendet neu"""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE chat_id = ? AND ref = ?", (str(chat_id), ref))
+            self._conn.commit()
+
+    def close(self):
+        """Schließe SQLite-Verbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_message_store(config) -> TelegramMessageStore:
+    """Erstelle Message-Store aus der Konfiguration"""
+    return TelegramMessageStore(db_path=config.telegram_messages_path)
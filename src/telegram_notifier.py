@@ -2,66 +2,147 @@
 """
 Telegram Notifier  
 Sendet Benachrichtigungen über neue Zugverbindungen via Telegram Bot
-Produktionsversion - optimiert für zuverlässige Nachrichten
+Produktionsversion - optimiert für zuverlässige Nachrichten (mehrere Routen und Chats)
 """
 
+import time
 import requests
 import logging
 from typing import List, Optional, Dict
 from datetime import datetime
 from db_client import Journey
+from journey_store import JourneyDiff
+from http_transport import HttpTransport, TELEGRAM_API_BASE_URL
+from telegram_outbox import TelegramOutbox, retry_after_seconds, backoff_delay
+from telegram_messages import TelegramMessageStore, content_hash
+from metrics import Metrics
 
 class TelegramNotifier:
     """Telegram Bot für Bahnverbindungs-Benachrichtigungen"""
     
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, transport: Optional[HttpTransport] = None,
+                 outbox: Optional[TelegramOutbox] = None,
+                 message_store: Optional[TelegramMessageStore] = None,
+                 metrics: Optional[Metrics] = None):
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.api_url = f"https://api.telegram.org/bot{bot_token}"
+        self.api_url = f"{TELEGRAM_API_BASE_URL}/bot{bot_token}"
         self.logger = logging.getLogger(__name__)
-    
-    def send_message(self, message: str, retry_count: int = 2) -> bool:
-        """Sende Textnachricht an Telegram Chat mit Retry-Logik"""
-        url = f"{self.api_url}/sendMessage"
         
+        # Gemeinsamer Transport mit Keep-Alive Pool (eigener falls keiner übergeben)
+        if transport is None:
+            transport = HttpTransport(default_timeout=15)
+            transport.register_host(TELEGRAM_API_BASE_URL, timeout=15)
+        self.transport = transport
+        
+        # Persistente Outbox - Versand im Hintergrund statt blockierend (optional)
+        self.outbox = outbox
+        # Status-Nachrichten je Überwachung (editMessageText statt neuer Nachricht, optional)
+        self.message_store = message_store
+        # Direktversand (ohne Outbox) - gleiche Metriken wie die Outbox
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._chat_notifiers: Dict[str, "TelegramNotifier"] = {}
+    
+    def for_chat(self, chat_id: str) -> "TelegramNotifier":
+        """Notifier für einen anderen Chat (gleicher Bot und Transport)"""
+        if chat_id == self.chat_id:
+            return self
+        if chat_id not in self._chat_notifiers:
+            self._chat_notifiers[chat_id] = TelegramNotifier(self.bot_token, chat_id,
+                                                             transport=self.transport, outbox=self.outbox,
+                                                             message_store=self.message_store,
+                                                             metrics=self.metrics)
+        return self._chat_notifiers[chat_id]
+    
+    def send_message(self, message: str, retry_count: int = 2,
+                     ref: Optional[str] = None, status_hash: Optional[str] = None,
+                     tag: Optional[str] = None) -> bool:
+        """Sende Textnachricht an Telegram Chat (über die Outbox sofort zurück, sonst direkt mit Retry)
+        
+        Mit ref wird die Nachricht als Status-Nachricht gemerkt und später per update_status bearbeitet.
+        tag meldet die Outbox ihren Drop-Listenern, falls die Nachricht später verworfen wird
+        """
         payload = {
             "chat_id": self.chat_id,
             "text": message,
             "parse_mode": "Markdown",
             "disable_web_page_preview": True
         }
+        if self.message_store is None:
+            ref = None
+        
+        if self.outbox is not None:
+            if ref:
+                # message_id und Inhalts-Hash trägt die Outbox erst nach erfolgreichem Versand nach -
+                # wird die Nachricht verworfen, sendet das nächste update_status sie erneut
+                self.message_store.remember(self.chat_id, ref, None, "")
+            self.outbox.enqueue(self.chat_id, "sendMessage", payload, ref=ref, content_hash=status_hash, tag=tag)
+            self.logger.debug(f"Telegram Nachricht an Outbox übergeben: {message[:50]}...")
+            return True
+        
+        response = self._send_now("sendMessage", payload, retry_count)
+        if response is None:
+            return False
+        if ref:
+            try:
+                self.message_store.remember(self.chat_id, ref, response.json()["result"]["message_id"],
+                                            status_hash or "")
+            except (ValueError, KeyError, TypeError):
+                self.logger.warning("Telegram Antwort ohne message_id - Status-Nachricht wird neu gesendet")
+        return True
+    
+    def _send_now(self, method: str, payload: Dict, retry_count: int = 2) -> Optional[requests.Response]:
+        """Direkter Versand (blockierend) - beachtet retry_after bei 429, sonst Backoff mit Jitter
+        
+        Liefert die erfolgreiche Antwort oder None
+        """
+        url = f"{self.api_url}/{method}"
+        started = time.time()
         
         for attempt in range(retry_count + 1):
+            delay = backoff_delay(attempt + 1)
+            response = None
             try:
-                self.logger.debug(f"Sende Telegram Nachricht (Versuch {attempt + 1}): {message[:50]}...")
-                response = requests.post(url, json=payload, timeout=15)
+                self.logger.debug(f"Sende Telegram Nachricht (Versuch {attempt + 1}): {str(payload.get('text'))[:50]}...")
+                with self.metrics.timer("telegram_request_seconds", method=method):
+                    response = self.transport.post(url, json=payload)
+                
+                if response.status_code == 200 or (method == "editMessageText"
+                                                   and "message is not modified" in response.text):
+                    self.metrics.observe("telegram_delivery_seconds", time.time() - started, method=method)
+                    self.metrics.inc("telegram_messages_total",
+                                     result="edited" if method == "editMessageText" else "sent")
+                    if response.status_code == 200:
+                        self.logger.info("Telegram Nachricht erfolgreich gesendet")
+                    return response
                 
-                if response.status_code == 200:
-                    self.logger.info("Telegram Nachricht erfolgreich gesendet")
-                    return True
-                else:
-                    self.logger.error(f"Telegram API Error {response.status_code}: {response.text}")
-                    if attempt < retry_count:
-                        self.logger.info(f"Wiederhole in 5 Sekunden... (Versuch {attempt + 2})")
-                        import time
-                        time.sleep(5)
+                self.logger.error(f"Telegram API Error {response.status_code}: {response.text}")
+                if response.status_code == 429:
+                    delay = retry_after_seconds(response) or delay
+                elif 400 <= response.status_code < 500:
+                    # Dauerhafter Fehler - erneuter Versuch sinnlos
+                    self.metrics.inc("telegram_messages_total", result="dropped")
+                    return None
                         
             except requests.exceptions.RequestException as e:
                 self.logger.error(f"Telegram Request Exception: {str(e)}")
-                if attempt < retry_count:
-                    self.logger.info(f"Wiederhole in 5 Sekunden... (Versuch {attempt + 2})")
-                    import time
-                    time.sleep(5)
+            
+            if attempt < retry_count:
+                self.metrics.inc("telegram_retries_total",
+                                 reason="flood_control" if response is not None and response.status_code == 429 else "error")
+                self.logger.info(f"Wiederhole in {delay:.1f} Sekunden... (Versuch {attempt + 2})")
+                time.sleep(delay)
         
+        self.metrics.inc("telegram_messages_total", result="dropped")
         self.logger.error("Telegram Nachricht konnte nach allen Versuchen nicht gesendet werden")
-        return False
+        return None
     
     def test_connection(self) -> bool:
         """Teste Telegram Bot Verbindung"""
         url = f"{self.api_url}/getMe"
         
         try:
-            response = requests.get(url, timeout=10)
+            response = self.transport.get(url, timeout=10)
             if response.status_code == 200:
                 bot_info = response.json()
                 bot_name = bot_info.get("result", {}).get("username", "Unknown")
@@ -113,7 +194,7 @@ class TelegramNotifier:
         message_lines.extend([
             f"⏰ *Abfrage vom:* {datetime.now().strftime('%d.%m.%Y %H:%M')}",
             "",
-            "🤖 _Automatische Verbindungssuche Hamburg → Landeck-Zams_"
+            f"🤖 _Automatische Verbindungssuche {from_station} → {to_station}_"
         ])
         
         message = "\n".join(message_lines)
@@ -158,7 +239,7 @@ class TelegramNotifier:
         message_lines.extend([
             f"⏰ *Abfrage vom:* {datetime.now().strftime('%d.%m.%Y %H:%M')}",
             "",
-            "🤖 _Automatische Verbindungssuche Hamburg → Landeck-Zams_"
+            f"🤖 _Automatische Verbindungssuche {from_station} → {to_station}_"
         ])
         
         message = "\n".join(message_lines)
@@ -167,7 +248,10 @@ class TelegramNotifier:
     def notify_all_connections(self, 
                              connections_by_date: Dict[str, List[Journey]],
                              from_station: str = "Hamburg Hbf",
-                             to_station: str = "Landeck-Zams") -> bool:
+                             to_station: str = "Landeck-Zams",
+                             first_time: bool = False,
+                             status_ref: Optional[str] = None,
+                             tag: Optional[str] = None) -> bool:
         """Benachrichtige über alle gefundenen Verbindungen (alle Tage zusammen)"""
         
         if not connections_by_date:
@@ -178,8 +262,9 @@ class TelegramNotifier:
         total_days = len(connections_by_date)
         
         # Header
+        headline = "🎉 *NEUE VERBINDUNGEN VERFÜGBAR!*" if first_time else "🚄 *Alle gefundenen Verbindungen*"
         message_lines = [
-            f"🚄 *Alle gefundenen Verbindungen*",
+            headline,
             f"🚉 *Route:* {from_station} → {to_station}",
             f"📊 *{total_connections} Verbindungen an {total_days} Tagen*",
             "",
@@ -207,11 +292,143 @@ class TelegramNotifier:
         message_lines.extend([
             f"⏰ *Abfrage vom:* {datetime.now().strftime('%d.%m.%Y %H:%M')}",
             "",
-            "🤖 _Automatische Verbindungssuche Hamburg → Landeck-Zams_"
+            f"🤖 _Automatische Verbindungssuche {from_station} → {to_station}_"
         ])
         
         message = "\n".join(message_lines)
-        return self.send_message(message)
+        if status_ref:
+            return self.send_message(message, ref=status_ref,
+                                     status_hash=self.status_hash(connections_by_date, from_station, to_station),
+                                     tag=tag)
+        return self.send_message(message, tag=tag)
+    
+    def notify_connection_changes(self,
+                                  diffs_by_date: Dict[str, JourneyDiff],
+                                  from_station: str = "Hamburg Hbf",
+                                  to_station: str = "Landeck-Zams",
+                                  tag: Optional[str] = None) -> bool:
+        """Benachrichtige nur über neue, geänderte und entfallene Verbindungen"""
+        
+        if not diffs_by_date:
+            return True
+        
+        message_lines = [
+            "🔔 *Änderungen bei Verbindungen*",
+            f"🚉 *Route:* {from_station} → {to_station}",
+            "",
+        ]
+        
+        for date_str in sorted(diffs_by_date.keys()):
+            diff = diffs_by_date[date_str]
+            display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.%Y")
+            message_lines.append(f"📅 **{display_date}**")
+            
+            for label, journeys in (("🆕 Neu", diff.added), ("✏️ Geändert", diff.changed)):
+                for journey in journeys:
+                    dep_time = journey.departure_time.strftime("%H:%M")
+                    arr_time = journey.arrival_time.strftime("%H:%M")
+                    duration_str = f"{journey.duration_minutes // 60}h {journey.duration_minutes % 60:02d}m"
+                    transfers_text = "Direktverbindung" if journey.transfers == 0 else f"{journey.transfers} Umstieg{'e' if journey.transfers > 1 else ''}"
+                    message_lines.append(f"   {label}: {dep_time} → {arr_time} ({duration_str}, {transfers_text})")
+            
+            for summary in diff.removed:
+                message_lines.append(f"   ❌ Entfallen: {summary}")
+            
+            message_lines.append("")
+        
+        # Footer
+        message_lines.extend([
+            f"⏰ *Abfrage vom:* {datetime.now().strftime('%d.%m.%Y %H:%M')}",
+            "",
+            f"🤖 _Automatische Verbindungssuche {from_station} → {to_station}_"
+        ])
+        
+        message = "\n".join(message_lines)
+        return self.send_message(message, tag=tag)
+    
+    def render_status_body(self,
+                           connections_by_date: Dict[str, List[Journey]],
+                           from_station: str = "Hamburg Hbf",
+                           to_station: str = "Landeck-Zams") -> str:
+        """Inhalt der Status-Nachricht ohne Zeitstempel (Grundlage des Inhalts-Hashs)"""
+        total_connections = sum(len(journeys) for journeys in connections_by_date.values())
+        message_lines = [
+            "📋 *Aktuelle Verbindungen*",
+            f"🚉 *Route:* {from_station} → {to_station}",
+            f"📊 *{total_connections} Verbindungen an {len(connections_by_date)} Tagen*",
+            "",
+        ]
+        
+        for date_str in sorted(connections_by_date.keys()):
+            journeys = connections_by_date[date_str]
+            display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.%Y")
+            message_lines.append(f"📅 **{display_date}** ({len(journeys)} Verbindungen):")
+            
+            for journey in journeys:
+                dep_time = journey.departure_time.strftime("%H:%M")
+                arr_time = journey.arrival_time.strftime("%H:%M")
+                duration_str = f"{journey.duration_minutes // 60}h {journey.duration_minutes % 60:02d}m"
+                transfers_text = "Direktverbindung" if journey.transfers == 0 else f"{journey.transfers} Umstieg{'e' if journey.transfers > 1 else ''}"
+                message_lines.append(f"   • {dep_time} → {arr_time} ({duration_str}, {transfers_text})")
+            
+            message_lines.append("")
+        
+        message_lines.append(f"🤖 _Automatische Verbindungssuche {from_station} → {to_station}_")
+        return "\n".join(message_lines)
+    
+    def status_hash(self,
+                    connections_by_date: Dict[str, List[Journey]],
+                    from_station: str = "Hamburg Hbf",
+                    to_station: str = "Landeck-Zams") -> str:
+        """Inhalts-Hash der Status-Nachricht"""
+        return content_hash(self.render_status_body(connections_by_date, from_station, to_station))
+    
+    def update_status(self,
+                      ref: str,
+                      connections_by_date: Dict[str, List[Journey]],
+                      from_station: str = "Hamburg Hbf",
+                      to_station: str = "Landeck-Zams",
+                      tag: Optional[str] = None) -> bool:
+        """Status-Nachricht einer Überwachung bearbeiten (still, ohne neue Benachrichtigung)
+        
+        Unveränderter Inhalt wird nicht übertragen, unbekannte oder gelöschte Nachrichten werden neu gesendet
+        """
+        body = self.render_status_body(connections_by_date, from_station, to_station)
+        body_hash = content_hash(body)
+        message = f"{body}\n⏰ *Stand:* {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+        
+        if self.message_store is None:
+            return self.send_message(message, tag=tag)
+        
+        tracked = self.message_store.get(self.chat_id, ref)
+        if tracked is not None and tracked.content_hash == body_hash:
+            self.logger.debug(f"Status-Nachricht {ref} unverändert - keine Telegram-Anfrage")
+            return True
+        
+        if tracked is None:
+            return self.send_message(message, ref=ref, status_hash=body_hash, tag=tag)
+        
+        payload = {
+            "chat_id": self.chat_id,
+            "text": message,
+            "parse_mode": "Markdown",
+            "disable_web_page_preview": True
+        }
+        
+        if self.outbox is not None:
+            # message_id löst die Outbox erst beim Versand auf (ursprüngliche Nachricht evtl. noch unterwegs)
+            self.outbox.enqueue(self.chat_id, "editMessageText", payload, ref=ref, content_hash=body_hash, tag=tag)
+            return True
+        
+        if tracked.message_id is not None:
+            payload["message_id"] = tracked.message_id
+            if self._send_now("editMessageText", payload) is not None:
+                self.message_store.set_hash(self.chat_id, ref, body_hash)
+                return True
+        
+        # Nachricht gelöscht oder nicht mehr bearbeitbar - neu senden
+        self.message_store.forget(self.chat_id, ref)
+        return self.send_message(message, ref=ref, status_hash=body_hash, tag=tag)
     
     def notify_error(self, error_message: str, context: str = "") -> bool:
         """Benachrichtige über Fehler"""
@@ -236,7 +453,9 @@ class TelegramNotifier:
     
     def notify_status(self, 
                      checked_dates: int, 
-                     total_connections: int) -> bool:
+                     total_connections: int,
+                     from_station: str = "Hamburg Hbf",
+                     to_station: str = "Landeck-Zams") -> bool:
         """Sende Status-Update"""
         message_lines = [
             "📊 *Verbindungssuche Status*",
@@ -252,18 +471,18 @@ class TelegramNotifier:
             "",
             f"⏰ *Letzter Check:* {datetime.now().strftime('%d.%m.%Y %H:%M')}",
             "",
-            "🤖 _Automatische Verbindungssuche Hamburg → Landeck-Zams_"
+            f"🤖 _Automatische Verbindungssuche {from_station} → {to_station}_"
         ])
         
         message = "\n".join(message_lines)
         return self.send_message(message)
     
-    def notify_startup(self) -> bool:
+    def notify_startup(self, from_station: str = "Hamburg Hbf", to_station: str = "Landeck-Zams") -> bool:
         """Benachrichtige über Anwendungsstart"""
         message_lines = [
             "🚀 *Verbindungssuche gestartet*",
             "",
-            "🚉 *Route:* Hamburg Hbf → Landeck-Zams",
+            f"🚉 *Route:* {from_station} → {to_station}",
             "⏰ *Frequenz:* 4x täglich",
             "",
             f"*Gestartet:* {datetime.now().strftime('%d.%m.%Y %H:%M')}",
@@ -274,6 +493,23 @@ class TelegramNotifier:
         message = "\n".join(message_lines)
         return self.send_message(message)
     
+    def notify_container_started(self, from_station: str, to_station: str,
+                                 date_description: str, connection_status: str) -> bool:
+        """Benachrichtige über Container-Start mit Ergebnis der Startup-Suche"""
+        message_lines = [
+            "🐳 **Container gestartet**",
+            "",
+            f"🚄 Route: {from_station} → {to_station}",
+            f"🎯 Überwacht: {date_description}",
+            connection_status,
+            "",
+            "⏰ Checks: 07:00, 10:00, 13:00, 15:00, 18:00, 21:00, 00:00",
+            "💬 Benachrichtigung nur bei gefundenen Verbindungen"
+        ]
+        
+        message = "\n".join(message_lines)
+        return self.send_message(message)
+    
     def notify_startup_completed(self, target_day: int, connections_found: int, 
                                from_station: str = "Hamburg Hbf", 
                                to_station: str = "Landeck-Zams",
@@ -310,7 +546,9 @@ class TelegramNotifier:
                                        date: str,
                                        from_station: str = "Hamburg Hbf",
                                        to_station: str = "Landeck-Zams",
-                                       date_description: str = None) -> bool:
+                                       date_description: str = None,
+                                       status_ref: Optional[str] = None,
+                                       tag: Optional[str] = None) -> bool:
         """Benachrichtige über ERSTMALIG verfügbare Verbindungen (wichtig!)"""
         
         if not connections:
@@ -354,7 +592,11 @@ class TelegramNotifier:
         ])
         
         message = "\n".join(message_lines)
-        return self.send_message(message)
+        if status_ref:
+            return self.send_message(message, ref=status_ref,
+                                     status_hash=self.status_hash({date: connections}, from_station, to_station),
+                                     tag=tag)
+        return self.send_message(message, tag=tag)
     
     def notify_no_connections_found(self, target_day: int, checked_dates: int,
                                    from_station: str = "Hamburg Hbf",
@@ -385,6 +627,6 @@ class TelegramNotifier:
             "🧪 *Test-Nachricht*\n\n"
             f"Bot funktioniert korrekt!\n"
             f"Zeit: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
-            "🤖 _Bahnverbindungsüberwachung Hamburg → Landeck-Zams_"
+            "🤖 _Bahnverbindungsüberwachung_"
         )
         return self.send_message(message)
\ No newline at end of file
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Telegram Outbox
+Persistente Warteschlange für ausgehende Telegram-Nachrichten (SQLite)
+Der Check übergibt Nachrichten nur noch an die Outbox; ein Hintergrund-Thread
+stellt sie zu - mit exponentiellem Backoff (Jitter), Beachtung von retry_after
+bei 429 und Sende-Limits pro Chat und global. Nicht zugestellte Nachrichten
+bleiben in der Datei und werden beim nächsten Start nachgeholt
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import requests
+
+from http_transport import HttpTransport, TELEGRAM_API_BASE_URL
+from metrics import Metrics
+from rate_limiter import TokenBucketRateLimiter, RateLimitTimeout
+from telegram_messages import TelegramMessageStore
+
+DEFAULT_OUTBOX_PATH = os.path.join("data", "telegram_outbox.sqlite")
+
+# Nachricht gilt als in Zustellung - andere Prozesse überspringen sie solange
+CLAIM_SECONDS = 120
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Wartezeit aus einer 429-Antwort (parameters.retry_after)"""
+    try:
+        retry_after = response.json().get("parameters", {}).get("retry_after")
+        return float(retry_after) if retry_after else None
+    except (ValueError, AttributeError):
+        return None
+
+
+def backoff_delay(attempt: int, base_seconds: float = 2.0, max_seconds: float = 900.0) -> float:
+    """Exponentieller Backoff mit Full Jitter"""
+    return random.uniform(0, min(max_seconds, base_seconds * 2 ** attempt))
+
+
+class TelegramOutbox:
+    """Persistente Outbox mit Hintergrund-Zustellung"""
+
+    def __init__(self,
+                 api_url: str,
+                 transport: HttpTransport,
+                 db_path: str = DEFAULT_OUTBOX_PATH,
+                 global_limiter: Optional[TokenBucketRateLimiter] = None,
+                 chat_interval_seconds: float = 1.0,
+                 max_attempts: int = 10,
+                 base_backoff_seconds: float = 2.0,
+                 max_backoff_seconds: float = 900.0,
+                 message_store: Optional[TelegramMessageStore] = None,
+                 metrics: Optional[Metrics] = None):
+        self.api_url = api_url
+        self.transport = transport
+        self.db_path = db_path
+        self.global_limiter = global_limiter
+        self.chat_interval_seconds = chat_interval_seconds
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.message_store = message_store
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._idle = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        # Frühester nächster Versand je Chat (Sende-Limit, 429 retry_after)
+        self._chat_ready_at: Dict[str, float] = {}
+
+        # Aufgerufen mit (chat_id, tag) wenn eine Nachricht mit tag endgültig verworfen wird
+        self._drop_listeners: List[Callable[[str, str], None]] = []
+
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "edited": 0,
+            "retries": 0,
+            "flood_waits": 0,
+            "dropped": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Öffne SQLite-Datei und lege Outbox-Tabelle an"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " chat_id TEXT NOT NULL,"
+            " method TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " claimed_until REAL NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " created_at REAL NOT NULL,"
+            " ref TEXT,"
+            " content_hash TEXT,"
+            " tag TEXT)"
+        )
+        # Dateien aus Versionen ohne Status-Nachrichten bzw. Tags nachrüsten
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+        for column in ("ref", "content_hash", "tag"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} TEXT")
+        conn.commit()
+        return conn
+
+    def enqueue(self, chat_id: str, method: str, payload: Dict[str, Any],
+                ref: Optional[str] = None, content_hash: Optional[str] = None,
+                tag: Optional[str] = None) -> int:
+        """Nachricht zur Zustellung einreihen (kehrt sofort zurück) - liefert Outbox-ID
+        
+        Mit ref wird die gesendete Nachricht im Message-Store gemerkt; editMessageText ohne
+        message_id bearbeitet die zuletzt unter ref gesendete Nachricht. tag erhalten die
+        Drop-Listener, falls die Nachricht endgültig verworfen wird
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (chat_id, method, payload, next_attempt_at, created_at, ref, content_hash, tag)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(chat_id), method, json.dumps(payload, ensure_ascii=False), now, now, ref, content_hash, tag)
+            )
+            self._conn.commit()
+            self.stats["enqueued"] += 1
+        self._idle.clear()
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def add_drop_listener(self, listener: Callable[[str, str], None]):
+        """Callback (chat_id, tag) für endgültig verworfene Nachrichten mit tag - z.B. um gespeicherten
+        Stand zurückzunehmen, dessen Meldung nie angekommen ist"""
+        self._drop_listeners.append(listener)
+
+    def pending(self) -> int:
+        """Anzahl noch nicht zugestellter Nachrichten"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def start(self):
+        """Starte Hintergrund-Zustellung (stellt auch Reste früherer Läufe zu)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="telegram-outbox", daemon=True)
+        self._worker.start()
+
+        backlog = self.pending()
+        if backlog:
+            self.logger.info(f"Telegram Outbox: {backlog} Nachrichten aus früheren Läufen werden zugestellt")
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Warte bis die Outbox leer ist (z.B. vor Prozessende) - False bei Timeout"""
+        if self._worker is None or not self._worker.is_alive():
+            self.start()
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.logger.warning(f"Telegram Outbox: {self.pending()} Nachrichten noch offen - "
+                                    "werden beim nächsten Lauf zugestellt")
+                return False
+            self._idle.wait(timeout=min(remaining, 1.0))
+        return True
+
+    def stop(self, timeout: float = 5):
+        """Beende Hintergrund-Zustellung (offene Nachrichten bleiben gespeichert)"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+
+    def _next_message(self) -> Tuple[Optional[Tuple], float]:
+        """Nächste zustellbare Nachricht (älteste je Chat, FIFO) oder Wartezeit bis zur nächsten"""
+        now = time.time()
+        with self._lock:
+            heads = self._conn.execute(
+                "SELECT id, chat_id, method, payload, attempts, next_attempt_at, claimed_until, ref, content_hash, created_at"
+                " FROM outbox"
+                " WHERE id IN (SELECT MIN(id) FROM outbox GROUP BY chat_id) ORDER BY id"
+            ).fetchall()
+
+            wait = None
+            for row in heads:
+                outbox_id, chat_id, _, _, _, next_attempt_at, claimed_until, _, _, _ = row
+                ready_at = max(next_attempt_at, claimed_until, self._chat_ready_at.get(chat_id, 0))
+                if ready_at > now:
+                    wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                    continue
+
+                # Beanspruchen - verhindert Doppelversand durch parallele Prozesse
+                claimed = self._conn.execute(
+                    "UPDATE outbox SET claimed_until = ? WHERE id = ? AND claimed_until <= ?",
+                    (now + CLAIM_SECONDS, outbox_id, now)
+                ).rowcount
+                self._conn.commit()
+                if claimed:
+                    return row, 0.0
+
+        return None, wait if wait is not None else 60.0
+
+    def _run(self):
+        """Zustell-Schleife des Hintergrund-Threads"""
+        while not self._stop_event.is_set():
+            try:
+                row, wait = self._next_message()
+            except sqlite3.Error as e:
+                self.logger.error(f"Telegram Outbox nicht lesbar: {str(e)}")
+                row, wait = None, 5.0
+
+            if row is None:
+                if not self.pending():
+                    self._idle.set()
+                self._wakeup.wait(timeout=wait)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._deliver(row)
+            except Exception as e:
+                # Unerwarteter Fehler (z.B. defekter Payload, SQLite) - Nachricht freigeben, Worker läuft weiter
+                self.logger.error(f"Telegram Nachricht {row[0]} nicht zustellbar: {str(e)}")
+                self._release_failed(row, f"{type(e).__name__}: {str(e)}")
+
+    def _deliver(self, row: Tuple):
+        """Eine Nachricht senden und Ergebnis verbuchen"""
+        outbox_id, chat_id, method, payload_json, attempts, _, _, ref, content_hash, created_at = row
+        payload = json.loads(payload_json)
+
+        # Bearbeitung der Status-Nachricht: message_id erst jetzt bekannt (Versand lag evtl. noch in der Outbox)
+        if method == "editMessageText" and "message_id" not in payload:
+            tracked = self.message_store.get(chat_id, ref) if self.message_store and ref else None
+            if tracked is None or tracked.message_id is None:
+                method, payload = "sendMessage", self._as_new_message(payload)
+            else:
+                payload["message_id"] = tracked.message_id
+
+        if self.global_limiter is not None:
+            try:
+                self.global_limiter.acquire(max_wait=30)
+            except RateLimitTimeout:
+                self._reschedule(outbox_id, attempts, 1.0, "globales Sende-Limit", count_attempt=False)
+                return
+
+        error = None
+        retry_after = None
+        try:
+            with self.metrics.timer("telegram_request_seconds", method=method):
+                response = self.transport.post(f"{self.api_url}/{method}", json=payload)
+            if response.status_code == 200:
+                self._chat_ready_at[chat_id] = time.time() + self.chat_interval_seconds
+                self._complete(outbox_id, chat_id, method, ref, content_hash, response, created_at)
+                return
+
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code == 429:
+                retry_after = retry_after_seconds(response)
+            elif method == "editMessageText" and "message is not modified" in response.text:
+                self._complete(outbox_id, chat_id, method, ref, content_hash, response, created_at)
+                return
+            elif method == "editMessageText" and response.status_code == 400:
+                # Nachricht gelöscht oder nicht mehr bearbeitbar - stattdessen neu senden
+                self.logger.info(f"Status-Nachricht nicht bearbeitbar ({error}) - sende neu")
+                if self.message_store and ref:
+                    self.message_store.forget(chat_id, ref)
+                self._replace(outbox_id, "sendMessage", self._as_new_message(payload))
+                return
+            elif 400 <= response.status_code < 500:
+                # Dauerhafter Fehler (z.B. ungültiges Markdown, Chat nicht gefunden) - erneuter Versuch sinnlos
+                self._drop(outbox_id, error)
+                return
+
+        except requests.exceptions.RequestException as e:
+            error = f"Request Exception: {str(e)}"
+
+        if retry_after is not None:
+            # Flood Control: Telegram nennt die Wartezeit - gilt für den ganzen Chat
+            self.stats["flood_waits"] += 1
+            self.metrics.inc("telegram_retries_total", reason="flood_control")
+            self._chat_ready_at[chat_id] = time.time() + retry_after
+            self.logger.warning(f"Telegram 429 für Chat {chat_id} - warte {retry_after:.0f}s (retry_after)")
+            self._reschedule(outbox_id, attempts, retry_after, error, count_attempt=False)
+            return
+
+        # Exponentieller Backoff mit Full Jitter
+        attempts += 1
+        if attempts >= self.max_attempts:
+            self._drop(outbox_id, error)
+            return
+        delay = backoff_delay(attempts, self.base_backoff_seconds, self.max_backoff_seconds)
+        self.logger.warning(f"Telegram Versand fehlgeschlagen ({error}) - Versuch {attempts + 1} in {delay:.1f}s")
+        self.metrics.inc("telegram_retries_total", reason="error")
+        self._reschedule(outbox_id, attempts, delay, error)
+
+    def _release_failed(self, row: Tuple, error: str):
+        """Nach unerwartetem Fehler mit Backoff erneut einplanen (bzw. nach max_attempts verwerfen)"""
+        outbox_id, attempts = row[0], row[4] + 1
+        try:
+            if attempts >= self.max_attempts:
+                self._drop(outbox_id, error)
+            else:
+                self.metrics.inc("telegram_retries_total", reason="error")
+                self._reschedule(outbox_id, attempts,
+                                 backoff_delay(attempts, self.base_backoff_seconds, self.max_backoff_seconds), error)
+        except sqlite3.Error as e:
+            # Beanspruchung läuft nach CLAIM_SECONDS ab - bis dahin kurz pausieren
+            self.logger.error(f"Telegram Outbox nicht beschreibbar: {str(e)}")
+            self._stop_event.wait(timeout=5.0)
+
+    @staticmethod
+    def _as_new_message(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """editMessageText-Payload als sendMessage"""
+        return {key: value for key, value in payload.items() if key != "message_id"}
+
+    def _complete(self, outbox_id: int, chat_id: str, method: str, ref: Optional[str],
+                  content_hash: Optional[str], response: requests.Response, created_at: float):
+        """Zugestellte Nachricht aus der Outbox entfernen, Status-Nachricht merken"""
+        if ref and self.message_store is not None:
+            if method == "sendMessage":
+                try:
+                    telegram_message_id = response.json()["result"]["message_id"]
+                    self.message_store.remember(chat_id, ref, telegram_message_id, content_hash or "")
+                except (ValueError, KeyError, TypeError):
+                    self.logger.warning("Telegram Antwort ohne message_id - Status-Nachricht wird neu gesendet")
+            elif content_hash:
+                self.message_store.set_hash(chat_id, ref, content_hash)
+
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (outbox_id,))
+            self._conn.commit()
+            self.stats["edited" if method == "editMessageText" else "sent"] += 1
+        # Zustell-Latenz inkl. Wartezeit in der Outbox (Backoff, Flood-Control, frühere Läufe)
+        self.metrics.observe("telegram_delivery_seconds", max(0.0, time.time() - created_at), method=method)
+        self.metrics.inc("telegram_messages_total", result="edited" if method == "editMessageText" else "sent")
+        self.logger.info("Telegram Nachricht erfolgreich " + ("aktualisiert" if method == "editMessageText" else "gesendet"))
+
+    def _replace(self, outbox_id: int, method: str, payload: Dict[str, Any]):
+        """Nachricht mit anderer Methode sofort erneut einplanen"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET method = ?, payload = ?, next_attempt_at = ?, claimed_until = 0 WHERE id = ?",
+                (method, json.dumps(payload, ensure_ascii=False), time.time(), outbox_id)
+            )
+            self._conn.commit()
+
+    def _reschedule(self, outbox_id: int, attempts: int, delay: float, error: Optional[str],
+                    count_attempt: bool = True):
+        """Nachricht für späteren Versuch freigeben"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, outbox_id)
+            )
+            self._conn.commit()
+            if count_attempt:
+                self.stats["retries"] += 1
+
+    def _drop(self, outbox_id: int, error: Optional[str]):
+        """Nachricht endgültig verwerfen"""
+        with self._lock:
+            row = self._conn.execute("SELECT chat_id, tag FROM outbox WHERE id = ?", (outbox_id,)).fetchone()
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (outbox_id,))
+            self._conn.commit()
+            self.stats["dropped"] += 1
+        self.metrics.inc("telegram_messages_total", result="dropped")
+        self.logger.error(f"Telegram Nachricht verworfen: {error}")
+
+        if row is not None and row[1]:
+            for listener in self._drop_listeners:
+                try:
+                    listener(row[0], row[1])
+                except Exception as e:
+                    self.logger.error(f"Fehler bei verworfener Nachricht ({row[1]}): {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hole Outbox-Statistik dieses Prozesses"""
+        stats = dict(self.stats)
+        stats["pending"] = self.pending()
+        return stats
+
+    def close(self):
+        """Worker beenden und SQLite-Verbindung schließen"""
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+
+def create_telegram_outbox(config, transport: HttpTransport,
+                           message_store: Optional[TelegramMessageStore] = None,
+                           metrics: Optional[Metrics] = None) -> Optional[TelegramOutbox]:
+    """Erstelle Outbox aus der Konfiguration (None wenn deaktiviert - dann wird direkt gesendet)"""
+    if not config.telegram_outbox_enabled:
+        return None
+
+    # Globales Limit als Token-Bucket in der gemeinsamen Rate-Limit-Datei (alle Prozesse)
+    global_limiter = TokenBucketRateLimiter(
+        db_path=config.rate_limit_db_path,
+        requests_per_window=config.telegram_global_rate_per_second,
+        window_seconds=1,
+        bucket_name="telegram",
+        metrics=metrics
+    )
+    return TelegramOutbox(
+        api_url=f"{TELEGRAM_API_BASE_URL}/bot{config.telegram_bot_token}",
+        transport=transport,
+        db_path=config.telegram_outbox_path,
+        global_limiter=global_limiter,
+        chat_interval_seconds=config.telegram_chat_interval_seconds,
+        max_attempts=config.telegram_max_attempts,
+        message_store=message_store,
+        metrics=metrics
+    )
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Watch Registry
+Verwaltet mehrere Überwachungen (Route + Zieltage) für einen Prozess
+Definition über JSON- oder YAML-Datei (WATCHES_FILE), sonst eine Überwachung aus der .env
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterator
+
+MONTHS_GERMAN = [
+    "Januar", "Februar", "März", "April", "Mai", "Juni",
+    "Juli", "August", "September", "Oktober", "November", "Dezember"
+]
+
+# Felder die direkt auf Watch abgebildet werden - alles andere landet in Watch.options
+WATCH_FILE_KEYS = {
+    "id", "name", "departure", "destination", "month", "days",
+    "start_hour", "end_hour", "max_results", "chat_id",
+}
+
+
+@dataclass
+class Watch:
+    """Eine Überwachung: Route, Zielmonat und Zieltage"""
+    id: str
+    departure_station: str
+    destination_station: str
+    year: int
+    month: int
+    days: List[int]
+    start_hour: int = 8
+    end_hour: int = 20  # Abfahrten bis end_hour:00 werden erfasst (Folgeseiten)
+    max_results: int = 20
+    chat_id: Optional[str] = None  # Abweichender Telegram-Chat (sonst TELEGRAM_CHAT_ID)
+    name: Optional[str] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def route_label(self) -> str:
+        return f"{self.departure_station} → {self.destination_station}"
+
+    @property
+    def display_name(self) -> str:
+        return self.name or self.id
+
+    def get_formatted_days_description(self) -> str:
+        """Formatierte Beschreibung der Zieltage (z.B. "14.–17. März 2025")"""
+        month_name = MONTHS_GERMAN[self.month - 1]
+        days = self.days
+
+        if len(days) == 1:
+            return f"{days[0]}. {month_name} {self.year}"
+        if days == list(range(days[0], days[-1] + 1)):
+            return f"{days[0]}.–{days[-1]}. {month_name} {self.year}"
+        return f"{', '.join(f'{day}.' for day in days)} {month_name} {self.year}"
+
+
+def parse_days(value: Any) -> List[int]:
+    """Parse Zieltage aus Liste, Zahl oder String ("14-17,20")"""
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, list):
+        days = set()
+        for item in value:
+            days.update(parse_days(item))
+        return sorted(days)
+
+    days = set()
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = sorted((int(start_str), int(end_str)))
+            days.update(range(start, end + 1))
+        else:
+            days.add(int(part))
+    return sorted(days)
+
+
+class WatchRegistry:
+    """Sammlung aller Überwachungen eines Prozesses"""
+
+    def __init__(self, watches: Optional[List[Watch]] = None):
+        self.logger = logging.getLogger(__name__)
+        self._watches: Dict[str, Watch] = {}
+        for watch in watches or []:
+            self.add(watch)
+
+    def add(self, watch: Watch):
+        """Füge Überwachung hinzu (ID muss eindeutig sein)"""
+        if watch.id in self._watches:
+            raise ValueError(f"Doppelte Watch-ID: {watch.id}")
+        if not watch.days or any(not (1 <= day <= 31) for day in watch.days):
+            raise ValueError(f"Watch {watch.id}: Tage müssen zwischen 1 und 31 liegen")
+        self._watches[watch.id] = watch
+
+    def get(self, watch_id: str) -> Optional[Watch]:
+        return self._watches.get(watch_id)
+
+    def __iter__(self) -> Iterator[Watch]:
+        return iter(self._watches.values())
+
+    def __len__(self) -> int:
+        return len(self._watches)
+
+    @classmethod
+    def from_config(cls, config) -> "WatchRegistry":
+        """Eine Überwachung aus den .env Werten (bisheriges Verhalten)"""
+        year, month = config.get_target_year_month()
+        watch = Watch(
+            id="default",
+            departure_station=config.departure_station,
+            destination_station=config.destination_station,
+            year=year,
+            month=month,
+            days=list(config.target_days),
+            start_hour=config.check_start_hour,
+            end_hour=config.check_end_hour,
+            max_results=config.max_results_per_query,
+        )
+        return cls([watch])
+
+    @classmethod
+    def from_file(cls, path: str, defaults: Optional[Dict[str, Any]] = None) -> "WatchRegistry":
+        """Lade Überwachungen aus JSON- oder YAML-Datei"""
+        with open(path, encoding="utf-8") as f:
+            if path.lower().endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ValueError("PyYAML ist nicht installiert - bitte JSON verwenden oder 'pip install pyyaml'")
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+
+        entries = data.get("watches", []) if isinstance(data, dict) else data
+        defaults = dict(defaults or {})
+        if isinstance(data, dict):
+            defaults.update(data.get("defaults", {}))
+
+        registry = cls()
+        for index, entry in enumerate(entries, 1):
+            merged = {**defaults, **entry}
+            try:
+                year_str, month_str = str(merged["month"]).split("-")
+                start_hour = int(merged.get("start_hour", 8))
+                end_hour = int(merged.get("end_hour", 20))
+                if not (0 <= start_hour <= 23 and 0 <= end_hour <= 23):
+                    raise ValueError("start_hour und end_hour müssen zwischen 0 und 23 liegen")
+                if start_hour >= end_hour:
+                    raise ValueError("start_hour muss vor end_hour liegen")
+                registry.add(Watch(
+                    id=str(merged.get("id") or f"watch-{index}"),
+                    name=merged.get("name"),
+                    departure_station=merged["departure"],
+                    destination_station=merged["destination"],
+                    year=int(year_str),
+                    month=int(month_str),
+                    days=parse_days(merged["days"]),
+                    start_hour=start_hour,
+                    end_hour=end_hour,
+                    max_results=int(merged.get("max_results", 20)),
+                    chat_id=str(merged["chat_id"]) if merged.get("chat_id") else None,
+                    options={k: v for k, v in merged.items() if k not in WATCH_FILE_KEYS},
+                ))
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"Watch #{index} in {path} ungültig: {str(e)}")
+
+        registry.logger.info(f"{len(registry)} Überwachungen aus {path} geladen")
+        return registry
+
+
+def create_watch_registry(config) -> WatchRegistry:
+    """Registry aus WATCHES_FILE oder aus der Einzel-Konfiguration"""
+    if config.watches_file:
+        if not os.path.exists(config.watches_file):
+            raise ValueError(f"WATCHES_FILE nicht gefunden: {config.watches_file}")
+        return WatchRegistry.from_file(
+            config.watches_file,
+            defaults={
+                "max_results": config.max_results_per_query,
+                "start_hour": config.check_start_hour,
+                "end_hour": config.check_end_hour,
+            }
+        )
+    return WatchRegistry.from_config(config)